@@ -13,13 +13,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("images", type=Path, help="Directory with PNG files")
     parser.add_argument("--model", type=Path, required=False)
     parser.add_argument("--classes", type=Path, required=False)
+    parser.add_argument("--batch-size", type=int, default=8, help="Pages per inference batch")
+    parser.add_argument("--imgsz", type=int, default=None, help="Fixed inference size in pixels")
+    parser.add_argument("--half", action="store_true", help="FP16 inference (CUDA only)")
+    parser.add_argument("--tile-size", type=int, default=None, help="Enable tiled detection with this tile size")
+    parser.add_argument("--tile-overlap", type=int, default=128, help="Overlap between tiles in pixels")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
     class_names = args.classes.read_text().splitlines() if args.classes and args.classes.exists() else None
-    detector = SymbolDetector(model_path=args.model, class_names=class_names)
+    detector = SymbolDetector(
+        model_path=args.model,
+        class_names=class_names,
+        batch_size=args.batch_size,
+        imgsz=args.imgsz,
+        half=args.half,
+        tile_size=args.tile_size,
+        tile_overlap=args.tile_overlap,
+    )
     images = [
         PageImage(page_number=i + 1, image_path=path, width=0, height=0)
         for i, path in enumerate(sorted(args.images.glob("*.png")))
@@ -27,6 +40,8 @@ def main() -> None:
     detections = detector.detect(images)
     for det in detections:
         print(det)
+    stats = detector.last_stats
+    print(f"{stats.pages} pages in {stats.seconds:.2f}s ({stats.pages_per_second:.2f} pages/s)")
 
 
 if __name__ == "__main__":
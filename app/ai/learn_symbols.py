@@ -0,0 +1,54 @@
+"""CLI helper to build the vector symbol library from labelled or YOLO-detected plans."""
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from app.core.pdf_loader import PDFLoader
+from app.core.symbol_detector import SymbolDetector
+from app.core.vector_symbols import SymbolLibrary, VectorSymbolMatcher
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Learn vector symbol fingerprints from a CAD-exported PDF")
+    parser.add_argument("pdf", type=Path)
+    parser.add_argument("library", type=Path, help="Library JSON to create or extend")
+    parser.add_argument(
+        "--labels",
+        type=Path,
+        required=False,
+        help='JSON list of {"page": 1, "label": "wc", "bbox": [x0, top, x1, bottom]} in PDF points',
+    )
+    parser.add_argument("--model", type=Path, required=False, help="YOLO weights used when no labels are given")
+    parser.add_argument("--classes", type=Path, required=False)
+    parser.add_argument("--dpi", type=int, default=300, help="Raster resolution for YOLO labelling")
+    parser.add_argument("--min-confidence", type=float, default=0.5, help="Ignore weaker YOLO detections")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    library = SymbolLibrary.load(args.library) if args.library.exists() else SymbolLibrary()
+    boxes = defaultdict(list)
+    if args.labels:
+        matcher = VectorSymbolMatcher(library)
+        document = PDFLoader().ingest(args.pdf, rasterize=False)
+        for item in json.loads(args.labels.read_text()):
+            boxes[item["page"]].append((item["label"], tuple(item["bbox"])))
+    else:
+        matcher = VectorSymbolMatcher(library, scale=args.dpi / 72)
+        class_names = args.classes.read_text().splitlines() if args.classes and args.classes.exists() else None
+        document = PDFLoader(raster_dpi=args.dpi).ingest(args.pdf)
+        for det in SymbolDetector(model_path=args.model, class_names=class_names).detect(document.images):
+            if det.confidence >= args.min_confidence:
+                boxes[det.page_number].append((det.label, det.bbox))
+
+    learned = sum(matcher.learn(page, boxes.get(page.page_number, [])) for page in document.vector_pages)
+    library.save(args.library)
+    print(f"learned {learned} examples; library has {len(library)} fingerprints")
+
+
+if __name__ == "__main__":
+    main()
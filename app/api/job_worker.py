@@ -0,0 +1,43 @@
+"""Standalone worker that drains the SQLite job queue.
+
+Run one or more of these next to the API (started with ``MEP_JOB_RUNNER=external``)
+to scale pipeline capacity independently of the HTTP processes::
+
+    python -m app.api.job_worker --db $MEP_DATA_DIR/jobs.sqlite3
+
+``--db`` defaults to the API's queue under ``MEP_DATA_DIR``.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from app.api.jobs import JobStore, default_db_path
+from app.api.workers import run_job
+
+LOGGER = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued MEP extraction jobs")
+    parser.add_argument(
+        "--db", type=Path, default=default_db_path(), help="Job queue (default: $MEP_DATA_DIR/jobs.sqlite3)"
+    )
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = JobStore(args.db)
+    while True:
+        job = store.claim_next()
+        if job is None:
+            time.sleep(args.poll)
+            continue
+        LOGGER.info("Running job %s", job["id"])
+        run_job(args.db, job["id"])
+
+
+if __name__ == "__main__":
+    main()
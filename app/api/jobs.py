@@ -0,0 +1,202 @@
+"""SQLite-backed job queue shared by the API and pipeline workers."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.core.pipeline import STAGES
+from app.utils.file_utils import ensure_dir
+
+LOGGER = logging.getLogger(__name__)
+
+# A running job whose worker has not renewed it for this long is considered lost.
+DEFAULT_LEASE_SECONDS = float(os.getenv("MEP_JOB_LEASE", "300"))
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def data_dir() -> Path:
+    """Root for uploads, job outputs and the queue database (``MEP_DATA_DIR``)."""
+
+    return Path(os.getenv("MEP_DATA_DIR", "/tmp/mep"))
+
+
+def default_db_path() -> Path:
+    """The queue the API and ``app.api.job_worker`` share unless told otherwise."""
+
+    return data_dir() / "jobs.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    pdf_path TEXT NOT NULL,
+    export_dir TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    artifacts TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+
+class JobStore:
+    """Persists job state so any process (API or worker) can read and update it.
+
+    Every call opens its own connection, which keeps the store safe to use from
+    pool workers and from separately scaled ``app.api.job_worker`` processes.
+
+    Running jobs hold a lease: their worker renews ``updated`` at least every
+    ``lease_seconds`` (see :meth:`touch`), and :meth:`reclaim_expired` requeues
+    or fails jobs whose worker died without finishing them.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> None:
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        ensure_dir(db_path.parent)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "attempts" not in columns:  # queues created before leases existed
+                conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, pdf_path: Path, export_dir: Path, job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        stages = json.dumps({stage: "pending" for stage in STAGES})
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, pdf_path, export_dir, stages, created, updated)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, str(pdf_path), str(export_dir), stages, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["stages"] = json.loads(job["stages"])
+        job["artifacts"] = json.loads(job["artifacts"])
+        return job
+
+    def claim_next(self) -> Optional[Dict]:
+        """Atomically move the oldest queued job to ``running`` and return it.
+
+        Jobs whose lease expired are requeued first, so a crashed worker's job
+        is picked up by the next claim.
+        """
+
+        self.reclaim_expired()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated = ? WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        return self.get(row["id"])
+
+    def mark_running(self, job_id: str) -> None:
+        """Start a job; one that :meth:`claim_next` already claimed is not counted twice."""
+
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET attempts = attempts + (status != 'running'), status = 'running', updated = ?"
+                " WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def touch(self, job_id: str) -> None:
+        """Renew a running job's lease."""
+
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+
+    def reclaim_expired(self, requeue: bool = True) -> List[str]:
+        """Requeue running jobs whose lease expired, or fail them; returns their ids.
+
+        Jobs are failed instead when ``requeue`` is false (nobody would claim
+        them again) or after ``max_attempts`` runs.
+        """
+
+        now = time.time()
+        pending = json.dumps({stage: "pending" for stage in STAGES})
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = 'running' AND updated < ?", (now - self.lease_seconds,)
+            ).fetchall()
+            for row in rows:
+                if requeue and row["attempts"] < self.max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', stages = ?, updated = ? WHERE id = ?",
+                        (pending, now, row["id"]),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                        (f"Worker stopped responding (attempt {row['attempts']})", now, row["id"]),
+                    )
+            conn.execute("COMMIT")
+        for row in rows:
+            LOGGER.warning("Lease of job %s expired after attempt %s", row["id"], row["attempts"])
+        return [row["id"] for row in rows]
+
+    def update_stage(self, job_id: str, stage: str, state: str) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None:
+                stages = json.loads(row["stages"])
+                stages[stage] = state
+                conn.execute(
+                    "UPDATE jobs SET stages = ?, updated = ? WHERE id = ?",
+                    (json.dumps(stages), time.time(), job_id),
+                )
+            conn.execute("COMMIT")
+
+    def complete(self, job_id: str, artifacts: Dict[str, str]) -> None:
+        self._set(job_id, status="done", artifacts=json.dumps(artifacts))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._set(job_id, status="failed", error=error)
+
+    def _set(self, job_id: str, **columns: str) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated = ? WHERE id = ?",
+                (*columns.values(), time.time(), job_id),
+            )
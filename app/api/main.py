@@ -1,38 +1,162 @@
 """FastAPI interface for the MEP extraction service."""
 from __future__ import annotations
 
+import asyncio
+import functools
+import json
 import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional, Set
 
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 
-from app.core.pipeline import MEPExtractionPipeline
-from app.core.models import ProjectQuantities
+from app.api.jobs import JobStore, data_dir, default_db_path
+from app.api.workers import ExecutorSaturated, PipelineExecutor, run_job, run_pipeline
+from app.core.profiling import StageMetrics
 
-app = FastAPI(title="MEP Extraction API", version="1.0.0")
 LOGGER = logging.getLogger(__name__)
-pipeline = MEPExtractionPipeline()
+DATA_DIR = data_dir()
+# "inline": this process' executor runs jobs; "external": only enqueue for app.api.job_worker.
+JOB_RUNNER = os.getenv("MEP_JOB_RUNNER", "inline")
+# Load libraries and model weights in every worker at startup instead of on the first request.
+WARMUP = os.getenv("MEP_WARMUP", "1") == "1"
+# Expose per-stage timing totals at /metrics in the Prometheus text format.
+METRICS = os.getenv("MEP_METRICS", "1") == "1"
+ARTIFACT_MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "pdf": "application/pdf",
+    "profile": "application/json",
+    "diff": "application/json",
+}
+
+executor = PipelineExecutor.from_env()
+job_store = JobStore(default_db_path())
+stage_metrics = StageMetrics()
+_job_tasks: Set[asyncio.Future] = set()
+
+
+def _observe(artifacts: Optional[Dict[str, str]]) -> None:
+    """Add a finished run's stage timings to :data:`stage_metrics`."""
+
+    if not METRICS or not artifacts or "profile" not in artifacts:
+        return
+    try:
+        stage_metrics.observe(json.loads(Path(artifacts["profile"]).read_text()))
+    except (OSError, ValueError):
+        LOGGER.warning("Could not read stage profile %s", artifacts["profile"])
+
+
+def _observe_job(job_id: str, task: "asyncio.Future[Optional[Dict[str, str]]]") -> None:
+    _job_tasks.discard(task)
+    if task.cancelled():
+        job_store.fail(job_id, "Cancelled")
+    elif task.exception() is not None:  # the pool worker died (run_job records its own errors)
+        job_store.fail(job_id, f"Worker failed: {task.exception()!r}")
+    else:
+        _observe(task.result())
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Jobs left running by a crashed process: external workers claim them again, inline ones are failed.
+    job_store.reclaim_expired(requeue=JOB_RUNNER == "external")
+    executor.start()
+    if WARMUP:
+        await executor.warmup()
+    yield
+    executor.shutdown()
+
+
+app = FastAPI(title="MEP Extraction API", version="1.0.0", lifespan=lifespan)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(status_code=503, detail="Pipeline queue is full", headers={"Retry-After": "30"})
 
 
 @app.post("/analyze")
 async def analyze_plan(file: UploadFile = File(...)) -> Dict[str, str]:
-    temp_dir = Path("/tmp/mep")
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = temp_dir / file.filename
+    if executor.saturated:
+        raise _busy()
+    # One directory per request: concurrent uploads of the same file name must not share inputs or outputs.
+    request_dir = DATA_DIR / "analyze" / uuid.uuid4().hex
+    request_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = request_dir / Path(file.filename or "plan.pdf").name
+    pdf_path.write_bytes(await file.read())
+    try:
+        artifacts = await executor.submit(run_pipeline, pdf_path, request_dir / "output")
+    except ExecutorSaturated:
+        raise _busy()
+    _observe(artifacts)
+    return artifacts
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...)) -> Dict[str, str]:
+    if JOB_RUNNER == "inline" and executor.saturated:
+        raise _busy()
+    job_id = uuid.uuid4().hex
+    job_dir = DATA_DIR / "jobs" / job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = job_dir / Path(file.filename or "plan.pdf").name
     pdf_path.write_bytes(await file.read())
-    export_paths = pipeline.run(pdf_path, temp_dir / pdf_path.stem)
-    return {key: str(path) for key, path in export_paths.items()}
+    job_store.create(pdf_path, job_dir / "output", job_id=job_id)
+    if JOB_RUNNER == "inline":
+        try:
+            task = executor.submit_nowait(run_job, job_store.db_path, job_id)
+        except ExecutorSaturated:
+            job_store.fail(job_id, "Pipeline queue is full")
+            raise _busy()
+        _job_tasks.add(task)
+        task.add_done_callback(functools.partial(_observe_job, job_id))
+    return {"id": job_id, "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> Dict[str, Any]:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "stages": job["stages"],
+        "error": job["error"],
+        "artifacts": {kind: f"/jobs/{job_id}/artifacts/{kind}" for kind in job["artifacts"]},
+    }
+
+
+@app.get("/jobs/{job_id}/artifacts/{kind}")
+async def job_artifact(job_id: str, kind: str) -> FileResponse:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if kind not in ARTIFACT_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown artifact type: {kind}")
+    if job["status"] != "done" or kind not in job["artifacts"]:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    path = Path(job["artifacts"][kind])
+    return FileResponse(path, media_type=ARTIFACT_MEDIA_TYPES[kind], filename=f"{job_id}{path.suffix}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    if not METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return stage_metrics.render()
 
 
 @app.get("/health")
 async def health() -> Dict[str, str]:
-    return {"status": "ok"}
+    return {"status": "ok", "pending_jobs": str(executor.pending)}
 
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc: Exception):  # type: ignore[override]
     LOGGER.exception("Unhandled error")
     return JSONResponse(status_code=500, content={"detail": str(exc)})
-
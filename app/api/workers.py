@@ -0,0 +1,221 @@
+"""Bounded executor that runs the pipeline off the API event loop."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.api.jobs import JobStore
+from app.core.pipeline import MEPExtractionPipeline
+
+LOGGER = logging.getLogger(__name__)
+
+_worker_state = threading.local()
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the pending-job limit is reached and a request must be rejected."""
+
+
+def _init_worker() -> None:
+    """Build and warm one pipeline per worker process/thread."""
+
+    pipeline = MEPExtractionPipeline(
+        workers=int(os.getenv("MEP_PAGE_WORKERS", "1")),
+        streaming=os.getenv("MEP_STREAMING", "0") == "1",
+        symbol_library=Path(os.environ["MEP_SYMBOL_LIBRARY"]) if os.getenv("MEP_SYMBOL_LIBRARY") else None,
+        room_source=os.getenv("MEP_ROOM_SOURCE", "rects"),
+        triage=os.getenv("MEP_TRIAGE", "1") == "1",
+        cache_renders=os.getenv("MEP_CACHE_RENDERS", "0") == "1",
+        extraction=os.getenv("MEP_EXTRACTION", "full"),
+        tile_size=int(os.getenv("MEP_TILE_SIZE", "0")) or None,
+        tile_overlap=int(os.getenv("MEP_TILE_OVERLAP", "128")),
+    )
+    pipeline.warmup()
+    _worker_state.pipeline = pipeline
+    LOGGER.info("Pipeline worker %s ready", os.getpid())
+
+
+def _worker_pipeline() -> MEPExtractionPipeline:
+    pipeline = getattr(_worker_state, "pipeline", None)
+    if pipeline is None:
+        _init_worker()
+        pipeline = _worker_state.pipeline
+    return pipeline
+
+
+def warmup_worker() -> int:
+    """Executor task that makes sure the worker running it has a warm pipeline."""
+
+    _worker_pipeline()
+    return os.getpid()
+
+
+def run_pipeline(pdf_path: Path, export_dir: Path) -> Dict[str, str]:
+    """Executor entry point; returns plain strings so results pickle cheaply."""
+
+    export_paths = _worker_pipeline().run(pdf_path, export_dir)
+    return {key: str(path) for key, path in export_paths.items()}
+
+
+def run_job(db_path: Path, job_id: str) -> Optional[Dict[str, str]]:
+    """Executor entry point for queued jobs; progress and outcome go to the job store.
+
+    Returns the artifact paths of a successful run, ``None`` otherwise.
+    """
+
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    if job is None:
+        LOGGER.warning("Job %s disappeared before it ran", job_id)
+        return None
+    store.mark_running(job_id)
+    try:
+        with _renew_lease(store, job_id):
+            export_paths = _worker_pipeline().run(
+                Path(job["pdf_path"]),
+                Path(job["export_dir"]),
+                progress=lambda stage, state: store.update_stage(job_id, stage, state),
+            )
+    except Exception as exc:  # recorded on the job; the pool keeps serving
+        LOGGER.exception("Job %s failed", job_id)
+        store.fail(job_id, str(exc))
+        return None
+    artifacts = {key: str(path) for key, path in export_paths.items()}
+    store.complete(job_id, artifacts)
+    return artifacts
+
+
+@contextlib.contextmanager
+def _renew_lease(store: JobStore, job_id: str) -> Iterator[None]:
+    """Renew the job's lease from a background thread while the pipeline runs."""
+
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(store.lease_seconds / 3):
+            store.touch(job_id)
+
+    thread = threading.Thread(target=renew, name=f"lease-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+class PipelineExecutor:
+    """Admission-controlled pool for pipeline runs.
+
+    At most ``max_workers`` runs execute concurrently and at most ``max_pending``
+    (running plus queued) are admitted; beyond that :meth:`submit` raises
+    :class:`ExecutorSaturated` so the API can answer 503 instead of queueing
+    without bound. A process pool broken by a dying worker (OOM kill, crash in
+    a native library) is replaced, so later submissions are served again.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, kind: str = "process") -> None:
+        if kind not in {"process", "thread"}:
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.kind = kind
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+        self._initializer: Optional[Callable[[], None]] = _init_worker
+        self._warm = False
+        self._rewarming: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def from_env(cls) -> "PipelineExecutor":
+        return cls(
+            max_workers=int(os.getenv("MEP_MAX_WORKERS", "2")),
+            max_pending=int(os.getenv("MEP_MAX_PENDING", "8")),
+            kind=os.getenv("MEP_EXECUTOR", "process"),
+        )
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def start(self, initializer: Optional[Callable[[], None]] = _init_worker) -> None:
+        if self._executor is not None:
+            return
+        self._initializer = initializer
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=initializer)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, initializer=initializer, thread_name_prefix="mep-pipeline"
+            )
+        LOGGER.info("Started %s executor with %s workers", self.kind, self.max_workers)
+
+    async def warmup(self) -> None:
+        """Start the workers and warm their pipelines before the first request arrives."""
+
+        if self._executor is None:
+            self.start(self._initializer)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, warmup_worker) for _ in range(self.max_workers)))
+        self._warm = True
+        LOGGER.info("Warmed %s pipeline workers", self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit_nowait(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """Admit and schedule ``fn`` synchronously, returning a future for its result.
+
+        Admission and scheduling happen without yielding to the event loop, so
+        the pending count can never overshoot ``max_pending``.
+        """
+
+        if self.saturated:
+            raise ExecutorSaturated(f"{self.pending} pipeline jobs pending")
+        if self._executor is None:
+            self.start(self._initializer)
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, fn, *args)
+        except BrokenProcessPool:  # a worker died since the last run finished
+            self._replace(self._executor)
+            future = loop.run_in_executor(self._executor, fn, *args)
+        self.pending += 1
+        future.add_done_callback(functools.partial(self._release, self._executor))
+        return future
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await self.submit_nowait(fn, *args)
+
+    def _release(self, executor: Optional[Executor], future: "asyncio.Future[Any]") -> None:
+        self.pending -= 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._replace(executor)
+
+    def _replace(self, broken: Optional[Executor]) -> None:
+        """Swap a broken pool for a fresh one; runs that were in flight on it fail."""
+
+        if broken is None or broken is not self._executor:  # already replaced
+            return
+        LOGGER.warning("A pipeline worker died; restarting the %s executor", self.kind)
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.start(self._initializer)
+        if self._warm:
+            self._rewarming = asyncio.get_running_loop().create_task(self._rewarm())
+
+    async def _rewarm(self) -> None:
+        try:
+            await self.warmup()
+        except BrokenProcessPool:
+            LOGGER.exception("Pipeline workers died while warming up")
@@ -3,18 +3,78 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+from app.core.batch import MANIFEST_SUFFIXES, BatchRunner, print_report
 from app.core.pipeline import MEPExtractionPipeline
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run the MEP extraction pipeline")
-    parser.add_argument("pdf", type=Path)
+    parser.add_argument("pdf", type=Path, help="PDF plan, or a folder/.txt/.json manifest for batch runs")
     parser.add_argument("output", type=Path)
+    parser.add_argument("--workers", type=int, default=1, help="Process page ranges in parallel worker processes")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Stage result cache (default: .cache/results)")
+    parser.add_argument("--stream", action="store_true", help="Process one page at a time to bound memory")
+    parser.add_argument("--symbol-library", type=Path, default=None, help="Learned vector symbol library (JSON)")
+    parser.add_argument(
+        "--room-source",
+        choices=("rects", "walls", "auto"),
+        default="rects",
+        help="Rooms from rects, from faces of the wall linework, or walls where a page has linework",
+    )
+    parser.add_argument(
+        "--no-triage",
+        action="store_true",
+        help="Rasterize every page at full DPI instead of skipping schedule/title sheets",
+    )
+    parser.add_argument(
+        "--extraction",
+        choices=("full", "lean"),
+        default="full",
+        help="Keep all pdfplumber objects, or only the shapes and words the pipeline reads (PyMuPDF if installed)",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        default=None,
+        help="Detect symbols on tiles of this many pixels, rendered one at a time instead of whole sheets",
+    )
+    parser.add_argument("--tile-overlap", type=int, default=128, help="Overlap between tiles in pixels")
+    parser.add_argument("--jobs", type=int, default=1, help="Batch mode: drawings processed in parallel")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage wall/CPU time and memory")
+    parser.add_argument(
+        "--profile-dir",
+        type=Path,
+        default=None,
+        help="Also dump a cProfile (or pyinstrument, with MEP_PROFILER=pyinstrument) profile of each run here",
+    )
     args = parser.parse_args()
-    pipeline = MEPExtractionPipeline()
-    result = pipeline.run(args.pdf, args.output)
+    options = {
+        "cache_dir": args.cache_dir,
+        "workers": args.workers,
+        "streaming": args.stream,
+        "symbol_library": args.symbol_library,
+        "room_source": args.room_source,
+        "profile_dir": args.profile_dir,
+        "triage": not args.no_triage,
+        "extraction": args.extraction,
+        "tile_size": args.tile_size,
+        "tile_overlap": args.tile_overlap,
+    }
+    if args.pdf.is_dir() or args.pdf.suffix.lower() in MANIFEST_SUFFIXES:
+        report = BatchRunner(jobs=args.jobs, pipeline_options=options).run(args.pdf, args.output)
+        print_report(report)
+        if args.profile and report.outputs:
+            print(report.stage_profile().summary())
+        return
+    pipeline = MEPExtractionPipeline(**options)
+    try:
+        result = pipeline.run(args.pdf, args.output)
+    finally:
+        pipeline.close()
     for key, path in result.items():
         print(f"{key}: {path}")
+    if args.profile and pipeline.last_profile is not None:
+        print(pipeline.last_profile.summary())
 
 
 if __name__ == "__main__":
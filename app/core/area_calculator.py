@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Union
 
 from app.core.models import RoomGeometry
+from app.core.tables import RoomTable, category_codes, sequential_sum
+from app.utils.lazy import optional_import
 
 
 @dataclass
@@ -17,7 +19,9 @@ class AreaSummary:
 class AreaCalculator:
     RESTRICTED_KEYWORDS = {"wardrobe", "shower", "wc", "kitchen", "cabinet"}
 
-    def summarize(self, rooms: Iterable[RoomGeometry]) -> AreaSummary:
+    def summarize(self, rooms: Union[Iterable[RoomGeometry], RoomTable]) -> AreaSummary:
+        if isinstance(rooms, RoomTable):
+            return self._summarize_table(rooms)
         total = 0.0
         restricted = 0.0
         for room in rooms:
@@ -28,3 +32,16 @@ class AreaCalculator:
         useful = max(total - restricted, 0)
         return AreaSummary(total_area=total, useful_area=useful, restricted_area=restricted)
 
+    def _summarize_table(self, rooms: RoomTable) -> AreaSummary:
+        """Batched :meth:`summarize`: keywords are tested once per distinct label."""
+
+        np = optional_import("numpy")
+        labels, codes = category_codes(rooms.labels)
+        restricted_labels = np.array(
+            [any(keyword in label.lower() for keyword in self.RESTRICTED_KEYWORDS) for label in labels], dtype=bool
+        )
+        total = sequential_sum(rooms.areas)
+        restricted = sequential_sum(rooms.areas[restricted_labels[codes]])
+        useful = max(total - restricted, 0)
+        return AreaSummary(total_area=total, useful_area=useful, restricted_area=restricted)
+
@@ -0,0 +1,185 @@
+"""Batch processing of whole project folders with warmed, reused pipelines."""
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.pipeline import MEPExtractionPipeline
+from app.core.profiling import StageProfiler, StageTiming
+from app.output.export_project import ProjectExporter
+from app.utils.file_utils import ensure_dir, hash_file
+
+LOGGER = logging.getLogger(__name__)
+
+STATE_FILE = "batch_state.json"
+MANIFEST_SUFFIXES = {".txt", ".json"}
+
+_worker_pipeline: Optional[MEPExtractionPipeline] = None
+
+
+def _init_worker(pipeline_options: dict) -> None:
+    global _worker_pipeline
+    _worker_pipeline = MEPExtractionPipeline(**pipeline_options)
+    _worker_pipeline.warmup()
+
+
+def _run_in_worker(pdf_path: Path, export_dir: Path) -> Dict[str, str]:
+    assert _worker_pipeline is not None
+    return {key: str(path) for key, path in _worker_pipeline.run(pdf_path, export_dir).items()}
+
+
+@dataclass
+class BatchReport:
+    processed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    # Output paths of the drawings processed in this run.
+    outputs: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    project_json: Optional[Path] = None
+    project_csv: Optional[Path] = None
+
+    def stage_profile(self) -> StageProfiler:
+        """Stage totals over the drawings processed in this run, from their ``profile.json``."""
+
+        profiler = StageProfiler()
+        for outputs in self.outputs.values():
+            if "profile" in outputs:
+                stages = json.loads(Path(outputs["profile"]).read_text())["stages"]
+                profiler.merge([StageTiming(**entry) for entry in stages])
+        return profiler
+
+
+def collect_inputs(source: Path) -> Dict[str, Path]:
+    """Map a stable drawing name to each PDF in a directory or manifest.
+
+    A manifest is a ``.txt`` file with one path per line or a ``.json`` list of
+    paths; relative entries resolve against the manifest's directory.
+    """
+
+    if source.is_dir():
+        return {str(path.relative_to(source).with_suffix("")): path for path in sorted(source.rglob("*.pdf"))}
+    if source.suffix.lower() not in MANIFEST_SUFFIXES:
+        raise ValueError(f"Expected a directory or a .txt/.json manifest, got {source}")
+    if source.suffix.lower() == ".json":
+        entries = json.loads(source.read_text())
+    else:
+        entries = [line.strip() for line in source.read_text().splitlines()]
+    paths = [Path(entry) if Path(entry).is_absolute() else source.parent / entry for entry in entries if entry]
+    inputs: Dict[str, Path] = {}
+    for path in paths:
+        name = path.stem
+        suffix = 2
+        while name in inputs:  # same file name in different folders
+            name = f"{path.stem}_{suffix}"
+            suffix += 1
+        inputs[name] = path
+    return inputs
+
+
+class BatchRunner:
+    """Runs many drawings through one warmed pipeline, or a pool of them.
+
+    Each drawing's quantities cache key (its file hash plus every stage's
+    settings) is kept in ``<output>/batch_state.json``; drawings whose key is
+    unchanged and whose outputs still exist are skipped but still contribute to
+    the consolidated project totals. Rerunning with other settings (room source,
+    extraction profile, triage, symbol library...) therefore reprocesses them.
+    """
+
+    def __init__(
+        self,
+        jobs: int = 1,
+        pipeline_options: Optional[dict] = None,
+        pipeline: Optional[MEPExtractionPipeline] = None,
+    ) -> None:
+        self.jobs = max(1, jobs)
+        # Keyword arguments for MEPExtractionPipeline in this process or each pool worker.
+        self.pipeline_options = pipeline_options or {}
+        self._pipeline = pipeline
+        self.project_exporter = ProjectExporter()
+
+    def run(self, source: Path, output_dir: Path) -> BatchReport:
+        ensure_dir(output_dir)
+        inputs = collect_inputs(source)
+        state_path = output_dir / STATE_FILE
+        state: Dict[str, dict] = json.loads(state_path.read_text()) if state_path.exists() else {}
+        report = BatchReport()
+
+        pending: Dict[str, Path] = {}
+        hashes: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+        pipeline = self._local_pipeline()
+        for name, pdf_path in inputs.items():
+            hashes[name] = hash_file(pdf_path)
+            keys[name] = pipeline.stage_keys(hashes[name])["quantities"]
+            previous = state.get(name, {})
+            outputs = previous.get("outputs", {})
+            if previous.get("key") == keys[name] and outputs and all(Path(p).exists() for p in outputs.values()):
+                report.skipped.append(name)
+            else:
+                pending[name] = pdf_path
+        LOGGER.info("Batch: %s drawings, %s unchanged, %s to process", len(inputs), len(report.skipped), len(pending))
+
+        for name, outputs in self._process(pending, output_dir, report).items():
+            state[name] = {"hash": hashes[name], "key": keys[name], "source": str(inputs[name]), "outputs": outputs}
+            report.processed.append(name)
+            report.outputs[name] = outputs
+        state = {name: entry for name, entry in state.items() if name in inputs}
+        state_path.write_text(json.dumps(state, indent=2))
+
+        per_file = {
+            name: json.loads(Path(state[name]["outputs"]["json"]).read_text())
+            for name in inputs
+            if name in state and name not in report.failed
+        }
+        report.project_json = self.project_exporter.export_json(per_file, output_dir / "project.json")
+        report.project_csv = self.project_exporter.export_csv(per_file, output_dir / "project.csv")
+        return report
+
+    def _process(self, pending: Dict[str, Path], output_dir: Path, report: BatchReport) -> Dict[str, Dict[str, str]]:
+        results: Dict[str, Dict[str, str]] = {}
+        if not pending:
+            return results
+        if self.jobs == 1:
+            pipeline = self._local_pipeline()
+            for name, pdf_path in pending.items():
+                try:
+                    outputs = pipeline.run(pdf_path, output_dir / name)
+                except Exception as exc:
+                    LOGGER.exception("Failed to process %s", pdf_path)
+                    report.failed[name] = str(exc)
+                    continue
+                results[name] = {key: str(path) for key, path in outputs.items()}
+            return results
+
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=(self.pipeline_options,)) as pool:
+            futures = {name: pool.submit(_run_in_worker, pdf_path, output_dir / name) for name, pdf_path in pending.items()}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    LOGGER.error("Failed to process %s: %s", pending[name], exc)
+                    report.failed[name] = str(exc)
+        return results
+
+    def _local_pipeline(self) -> MEPExtractionPipeline:
+        """The pipeline run in this process; with ``jobs > 1`` it only provides the settings key.
+
+        Models load lazily, so building one without running it is cheap.
+        """
+
+        if self._pipeline is None:
+            self._pipeline = MEPExtractionPipeline(**self.pipeline_options)
+        return self._pipeline
+
+
+def print_report(report: BatchReport) -> None:
+    print(f"processed: {len(report.processed)}, skipped: {len(report.skipped)}, failed: {len(report.failed)}")
+    for name, error in report.failed.items():
+        print(f"failed {name}: {error}")
+    print(f"project json: {report.project_json}")
+    print(f"project csv: {report.project_csv}")
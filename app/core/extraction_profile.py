@@ -0,0 +1,149 @@
+"""What vector extraction keeps from each page, and a lean PyMuPDF reader for it.
+
+The ``full`` profile stores pdfplumber's ``page.objects`` as they are: every
+char, line, curve, rect and image with all of its attributes, which is far
+more than room extraction, symbol matching and triage read. The ``lean``
+profile keeps only rects, lines, curves and images with their bbox and points,
+plus the words. When PyMuPDF is installed it reads them with ``get_cdrawings``
+and ``get_text("words")`` and skips pdfplumber's char-level layout altogether.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+Point = Tuple[float, float]
+
+BBOX_FIELDS = ("x0", "top", "x1", "bottom")
+WORD_FIELDS = ("text", *BBOX_FIELDS)
+
+
+@dataclass(frozen=True)
+class ExtractionProfile:
+    """Object types and fields kept per page; ``object_types=None`` keeps ``page.objects`` whole."""
+
+    object_types: Optional[Tuple[str, ...]] = None
+    fields: Tuple[str, ...] = (*BBOX_FIELDS, "pts")
+    # Read drawings and words with PyMuPDF when it is installed (only with object_types set).
+    prefer_pymupdf: bool = False
+
+    def cache_settings(self) -> dict:
+        return asdict(self)
+
+
+PROFILES: Dict[str, ExtractionProfile] = {
+    "full": ExtractionProfile(),
+    "lean": ExtractionProfile(object_types=("rect", "line", "curve", "image"), prefer_pymupdf=True),
+}
+
+
+def resolve_profile(profile: Union[str, ExtractionProfile]) -> ExtractionProfile:
+    if isinstance(profile, ExtractionProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile}")
+    return PROFILES[profile]
+
+
+def plumber_vectors(page, profile: ExtractionProfile) -> Tuple[dict, List[dict]]:
+    """``(shapes, words)`` of a pdfplumber page under ``profile``."""
+
+    words = page.extract_words() if hasattr(page, "extract_words") else []
+    if profile.object_types is None:
+        return page.objects, words
+    keep = ("object_type", *profile.fields)
+    shapes = {
+        object_type: [{name: obj[name] for name in keep if name in obj} for obj in page.objects.get(object_type, [])]
+        for object_type in profile.object_types
+    }
+    return shapes, [{name: word[name] for name in WORD_FIELDS} for word in words]
+
+
+def fitz_vectors(page, profile: ExtractionProfile) -> Tuple[dict, List[dict]]:
+    """``(shapes, words)`` of a PyMuPDF page, shaped like pdfplumber's objects.
+
+    Paths are split into subpaths and classified the way pdfminer does it: a
+    lone ``re`` or a closed axis-aligned four-point polyline (which PyMuPDF
+    reports as a ``qu``) is a rect, a single segment is a line, anything else
+    is a curve through its on-curve points. Word boxes span the font's ascender
+    to descender, a little taller than pdfplumber's font-size boxes. Rotated
+    pages are read in unrotated page space.
+    """
+
+    shapes: Dict[str, List[dict]] = {object_type: [] for object_type in profile.object_types or ()}
+    if {"rect", "line", "curve"} & shapes.keys():
+        for path in page.get_cdrawings():
+            for object_type, pts in _subpaths(path["items"]):
+                if object_type in shapes:
+                    shapes[object_type].append(_object(object_type, pts, profile.fields))
+    if "image" in shapes:
+        for info in page.get_image_info():
+            x0, top, x1, bottom = info["bbox"]
+            pts = [(x0, bottom), (x1, bottom), (x1, top), (x0, top)]
+            shapes["image"].append(_object("image", pts, profile.fields))
+    words = [
+        {"text": text, "x0": x0, "top": top, "x1": x1, "bottom": bottom}
+        for x0, top, x1, bottom, text, *_ in page.get_text("words")
+    ]
+    return shapes, words
+
+
+def _subpaths(items: Sequence[tuple]) -> List[Tuple[str, List[Point]]]:
+    objects: List[Tuple[str, List[Point]]] = []
+    points: List[Point] = []
+    curved = False
+    for item in items:
+        kind = item[0]
+        if kind in ("re", "qu"):
+            objects.extend(_classify(points, curved))
+            points, curved = [], False
+            if kind == "re":
+                x0, top, x1, bottom = item[1]
+                objects.append(("rect", [(x0, bottom), (x1, bottom), (x1, top), (x0, top)]))
+            else:  # PyMuPDF folds closed four-point polylines into quads
+                ul, ur, ll, lr = (tuple(point) for point in item[1])
+                objects.extend(_classify([ul, ur, lr, ll, ul], curved=False))
+            continue
+        start, end = tuple(item[1]), tuple(item[-1])
+        if points and points[-1] != start:  # a new subpath starts elsewhere
+            objects.extend(_classify(points, curved))
+            points, curved = [], False
+        if not points:
+            points.append(start)
+        points.append(end)
+        curved = curved or kind == "c"
+    objects.extend(_classify(points, curved))
+    return objects
+
+
+def _classify(points: List[Point], curved: bool) -> List[Tuple[str, List[Point]]]:
+    if len(points) < 2:
+        return []
+    distinct = list(dict.fromkeys(points))
+    if not curved and len(distinct) == 2:
+        return [("line", distinct)]
+    if not curved and _is_rect(points):
+        return [("rect", points[:4])]
+    return [("curve", points)]
+
+
+def _is_rect(points: List[Point]) -> bool:
+    """A closed polyline of four axis-aligned edges that alternate between horizontal and vertical."""
+
+    if len(points) != 5 or points[0] != points[-1]:
+        return False
+    edges = list(zip(points, points[1:]))
+    horizontal = [a[1] == b[1] and a[0] != b[0] for a, b in edges]
+    vertical = [a[0] == b[0] and a[1] != b[1] for a, b in edges]
+    if not all(h or v for h, v in zip(horizontal, vertical)):
+        return False
+    return all(horizontal[index] != horizontal[index + 1] for index in range(3))
+
+
+def _object(object_type: str, pts: List[Point], fields: Sequence[str]) -> dict:
+    xs = [x for x, _ in pts]
+    ys = [y for _, y in pts]
+    values = {"x0": min(xs), "top": min(ys), "x1": max(xs), "bottom": max(ys), "pts": pts}
+    obj = {"object_type": object_type}
+    obj.update((name, values[name]) for name in fields if name in values)
+    return obj
@@ -2,34 +2,63 @@
 from __future__ import annotations
 
 import logging
-from typing import Iterable, List, Optional
-
-try:  # pragma: no cover
-    from shapely.geometry import Polygon
-except Exception:  # pragma: no cover
-    from app.utils.simple_polygon import SimplePolygon as Polygon  # type: ignore
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from app.core.models import RoomGeometry
+from app.core.wall_graph import Face, polygonize, wall_segments
+from app.utils.lazy import optional_import
+from app.utils.simple_polygon import SimplePolygon
+from app.utils.spatial_index import BBox, GridIndex
 
 LOGGER = logging.getLogger(__name__)
 
+# Structured dtype spec for rect tables; numpy and shapely are imported on first use.
+RECT_DTYPE = [("x0", "f8"), ("top", "f8"), ("x1", "f8"), ("bottom", "f8")]
+# "rects": every rect is a room; "walls": rooms are faces of the wall linework graph;
+# "auto": wall faces on pages drawn with lines/curves, rects on rect-only pages.
+ROOM_SOURCES = ("rects", "walls", "auto")
+
 
 class GeometryExtractor:
     """Converts PDF vector shapes into usable polygons."""
 
-    def __init__(self, min_room_area: float = 1.0) -> None:
+    def __init__(
+        self,
+        min_room_area: float = 1.0,
+        room_source: str = "rects",
+        wall_tolerance: float = 0.5,
+        min_room_width: float = 20.0,
+    ) -> None:
+        if room_source not in ROOM_SOURCES:
+            raise ValueError(f"Unknown room source: {room_source}")
         self.min_room_area = min_room_area
+        self.room_source = room_source
+        # Endpoints closer than this (in points) are snapped together when building the wall graph.
+        self.wall_tolerance = wall_tolerance
+        # Faces thinner than this (2 * area / perimeter, in points) are wall cavities, not rooms.
+        self.min_room_width = min_room_width
+
+    def cache_settings(self) -> dict:
+        settings: dict = {"min_room_area": self.min_room_area, "room_source": self.room_source}
+        if self.room_source != "rects":
+            settings.update(wall_tolerance=self.wall_tolerance, min_room_width=self.min_room_width)
+        return settings
 
     def from_vectors(self, vector_pages: Iterable[dict]) -> List[RoomGeometry]:
         rooms: List[RoomGeometry] = []
-        if Polygon is None:
-            LOGGER.warning("Shapely not installed; returning empty room set")
-            return rooms
-
+        np = optional_import("numpy")
+        Polygon = _polygon_class()
         for page in vector_pages:
             page_number = _get(page, "page_number", 0)
             shapes = _get(page, "shapes", {}) or {}
-            rects = shapes.get("rects", [])
+            if self.room_source == "walls" or (self.room_source == "auto" and _has_linework(shapes)):
+                rooms.extend(self.rooms_from_walls(page_number, shapes))
+                continue
+            rects = _page_rects(shapes)
+            if np is not None:
+                rooms.extend(self._rooms_from_rect_array(page_number, rects))
+                continue
             for idx, shape in enumerate(rects):
                 polygon = Polygon([
                     (shape["x0"], shape["top"]),
@@ -41,25 +70,146 @@ class GeometryExtractor:
                 if area_sqm < self.min_room_area:
                     continue
                 room_id = f"p{page_number}_rect{idx}"
-                rooms.append(RoomGeometry(room_id=room_id, polygon=polygon, area_sqm=area_sqm))
+                rooms.append(RoomGeometry(room_id=room_id, polygon=polygon, area_sqm=area_sqm, page_number=page_number))
         LOGGER.info("Extracted %s rooms from vector data", len(rooms))
         return rooms
 
+    def rooms_from_walls(self, page_number: int, shapes: dict) -> List[RoomGeometry]:
+        """Rooms as the bounded faces of the page's snapped and noded wall linework."""
+
+        rooms: List[RoomGeometry] = []
+        faces = polygonize(wall_segments(shapes), self.wall_tolerance)
+        for face in sorted(faces, key=lambda face: (face.bbox[1], face.bbox[0])):
+            area = face.area
+            if area / 10000.0 < self.min_room_area or 2 * area / face.perimeter < self.min_room_width:
+                continue
+            rooms.append(
+                RoomGeometry(
+                    room_id=f"p{page_number}_wall{len(rooms)}",
+                    polygon=_face_polygon(face),
+                    area_sqm=area / 10000.0,
+                    page_number=page_number,
+                )
+            )
+        LOGGER.debug("Page %s: %s wall faces, %s rooms", page_number, len(faces), len(rooms))
+        return rooms
+
+    def _rooms_from_rect_array(self, page_number: int, rects) -> List[RoomGeometry]:
+        """Filter a page's rects with array math and build polygons only for survivors."""
+
+        np = optional_import("numpy")
+        table = rects_to_array(rects)
+        if not len(table):
+            return []
+        x0, top, x1, bottom = table["x0"], table["top"], table["x1"], table["bottom"]
+        areas = np.abs((x1 - x0) * (bottom - top)) / 10000.0
+        keep = np.flatnonzero(areas >= self.min_room_area)
+        if not len(keep):
+            return []
+        shapely = _vectorized_shapely()
+        if shapely is not None:
+            polygons = shapely.box(x0[keep], top[keep], x1[keep], bottom[keep])
+        else:
+            Polygon = _polygon_class()
+            polygons = [
+                Polygon([(x0[i], top[i]), (x1[i], top[i]), (x1[i], bottom[i]), (x0[i], bottom[i])])
+                for i in keep
+            ]
+        return [
+            RoomGeometry(
+                room_id=f"p{page_number}_rect{idx}",
+                polygon=polygon,
+                area_sqm=float(area),
+                page_number=page_number,
+            )
+            for idx, polygon, area in zip(keep.tolist(), polygons, areas[keep].tolist())
+        ]
+
     def assign_labels(self, rooms: List[RoomGeometry], labels: Iterable[dict]) -> List[RoomGeometry]:
-        label_lookup = {item.get("text", ""): item for item in labels}
-        for room in rooms:
-            matched_label: Optional[str] = None
-            for text, data in label_lookup.items():
-                bbox = data.get("x0"), data.get("top"), data.get("x1"), data.get("bottom")
-                centroid = room.polygon.centroid
-                if bbox[0] <= centroid.x <= bbox[2] and bbox[1] <= centroid.y <= bbox[3]:
-                    matched_label = text
-                    break
+        """Label each room with the first text item whose bbox contains its centroid.
+
+        Labels carrying a ``page_number`` only match rooms on that page; labels
+        without one match rooms on any page. Each page gets its own grid index so
+        the cost is linear in rooms plus labels rather than their product.
+        """
+
+        per_page: Dict[Optional[int], List[Tuple[BBox, Tuple[int, str]]]] = defaultdict(list)
+        for order, item in enumerate(labels):
+            bbox = item.get("x0"), item.get("top"), item.get("x1"), item.get("bottom")
+            if any(coord is None for coord in bbox):
+                continue
+            per_page[item.get("page_number")].append((bbox, (order, item.get("text", ""))))
+        if not per_page:
+            return rooms
+
+        indexes = {page: GridIndex.from_items(items) for page, items in per_page.items()}
+        shared = indexes.get(None)
+        for room, (cx, cy) in zip(rooms, _centroids(rooms)):
+            candidates = []
+            for index in (indexes.get(room.page_number), shared):
+                if index is not None:
+                    candidates.extend(index.query_point(cx, cy))
+            if not candidates:
+                continue
+            _, matched_label = min(candidates)
             if matched_label:
                 room.label = matched_label
         return rooms
 
 
+def rects_to_array(rects) -> "np.ndarray":
+    """Load rect dicts (or an existing ``RECT_DTYPE`` array) into a structured array."""
+
+    np = optional_import("numpy")
+    if isinstance(rects, np.ndarray):
+        return rects
+    return np.fromiter(
+        ((r["x0"], r["top"], r["x1"], r["bottom"]) for r in rects),
+        dtype=RECT_DTYPE,
+        count=len(rects),
+    )
+
+
+def _page_rects(shapes: dict):
+    # Cached/sample data uses "rects"; raw pdfplumber ``page.objects`` uses "rect".
+    rects = shapes.get("rects")
+    if rects is None:
+        rects = shapes.get("rect", [])
+    return rects
+
+
+def _centroids(rooms: List[RoomGeometry]) -> List[Tuple[float, float]]:
+    polygons = [room.polygon for room in rooms]
+    shapely = _vectorized_shapely()
+    if shapely is not None and polygons and all(isinstance(p, shapely.Geometry) for p in polygons):
+        centroids = shapely.centroid(polygons)
+        return list(zip(shapely.get_x(centroids).tolist(), shapely.get_y(centroids).tolist()))
+    return [(c.x, c.y) for c in (polygon.centroid for polygon in polygons)]
+
+
+def _vectorized_shapely():
+    """shapely>=2, which exposes vectorized constructors/accessors at the top level."""
+
+    shapely = optional_import("shapely")
+    return shapely if shapely is not None and hasattr(shapely, "box") else None
+
+
+def _polygon_class():
+    geometry = optional_import("shapely.geometry")
+    return geometry.Polygon if geometry is not None else SimplePolygon
+
+
+def _has_linework(shapes: dict) -> bool:
+    return any(shapes.get(key) for key in ("line", "lines", "curve", "curves"))
+
+
+def _face_polygon(face: Face):
+    geometry = optional_import("shapely.geometry")
+    if geometry is not None:
+        return geometry.Polygon(face.shell, face.holes)
+    return SimplePolygon(face.shell)  # no hole support; area_sqm still accounts for holes
+
+
 def _get(obj, key: str, default=None):
     if isinstance(obj, dict):
         return obj.get(key, default)
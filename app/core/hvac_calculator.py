@@ -1,9 +1,11 @@
 """HVAC load calculations based on room attributes."""
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Union
 
 from app.core.models import HVACRecommendation, RoomGeometry
+from app.core.tables import RoomTable, category_codes
+from app.utils.lazy import optional_import
 
 CLIMATE_FACTOR = 35  # Cyprus typical BTU/m2
 ROOM_TYPE_FACTORS = {
@@ -15,10 +17,18 @@ ROOM_TYPE_FACTORS = {
     "storage": 0.4,
     "other": 0.8,
 }
+# Upper bounds (exclusive) of each unit size; anything larger is a multi-split system.
+UNIT_THRESHOLDS = (9000, 12000, 18000, 24000)
+UNITS = ("9k BTU", "12k BTU", "18k BTU", "24k BTU", "Multi-split")
 
 
 class HVACCalculator:
-    def recommendations(self, rooms: Iterable[RoomGeometry]) -> List[HVACRecommendation]:
+    def cache_settings(self) -> dict:
+        return {"climate_factor": CLIMATE_FACTOR, "room_type_factors": ROOM_TYPE_FACTORS}
+
+    def recommendations(self, rooms: Union[Iterable[RoomGeometry], RoomTable]) -> List[HVACRecommendation]:
+        if isinstance(rooms, RoomTable):
+            return self._table_recommendations(rooms)
         output: List[HVACRecommendation] = []
         for room in rooms:
             category = room.attributes.get("category", "other")
@@ -28,15 +38,27 @@ class HVACCalculator:
             output.append(HVACRecommendation(room.room_id, btus, unit))
         return output
 
+    @staticmethod
+    def _table_recommendations(rooms: RoomTable) -> List[HVACRecommendation]:
+        """Batched :meth:`recommendations`: identical floats, one array operation per step."""
+
+        np = optional_import("numpy")
+        categories, codes = category_codes(rooms.categories)
+        factors = np.array(
+            [ROOM_TYPE_FACTORS.get(category, ROOM_TYPE_FACTORS["other"]) for category in categories], dtype=np.float64
+        )
+        btus = rooms.areas * CLIMATE_FACTOR * factors[codes]
+        # side="right" puts a load exactly on a threshold in the next size up, like the "<" chain.
+        units = np.searchsorted(np.array(UNIT_THRESHOLDS, dtype=np.float64), btus, side="right")
+        return [
+            HVACRecommendation(room_id, value, UNITS[unit])
+            for room_id, value, unit in zip(rooms.room_ids.tolist(), btus.tolist(), units.tolist())
+        ]
+
     @staticmethod
     def _select_unit(btus: float) -> str:
-        if btus < 9000:
-            return "9k BTU"
-        if btus < 12000:
-            return "12k BTU"
-        if btus < 18000:
-            return "18k BTU"
-        if btus < 24000:
-            return "24k BTU"
-        return "Multi-split"
+        for threshold, unit in zip(UNIT_THRESHOLDS, UNITS):
+            if btus < threshold:
+                return unit
+        return UNITS[-1]
 
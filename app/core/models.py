@@ -1,23 +1,38 @@
 """Domain data models for MEP extraction pipeline."""
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Records created once per room/detection drop their per-instance __dict__ where
+# dataclasses support it (Python 3.10+); see app.core.tables for columnar storage.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 @dataclass
 class PageImage:
-    """Represents a rasterized PDF page ready for CV tasks."""
+    """Represents a rasterized PDF page ready for CV tasks.
+
+    A page is backed either by a PNG at ``image_path`` or by ``pixels``, an
+    HxWxC RGB uint8 array that may share memory with ``buffer_owner`` (e.g. a
+    PyMuPDF pixmap), which must stay referenced for the array to remain valid.
+    Pages loaded for tiled detection have neither: ``render_clip`` renders a
+    pixel rectangle ``(x0, y0, x1, y1)`` of the page as an RGB array on demand.
+    """
 
     page_number: int
-    image_path: Path
+    image_path: Optional[Path]
     width: int
     height: int
     dpi: int = 300
+    pixels: Optional[Any] = field(default=None, repr=False, compare=False)
+    buffer_owner: Optional[Any] = field(default=None, repr=False, compare=False)
+    render_clip: Optional[Callable[[Tuple[int, int, int, int]], Any]] = field(default=None, repr=False, compare=False)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RoomGeometry:
     """Polygon geometry and semantic info for a room."""
 
@@ -26,9 +41,10 @@ class RoomGeometry:
     area_sqm: float
     label: Optional[str] = None
     attributes: Dict[str, str] = field(default_factory=dict)
+    page_number: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SymbolDetection:
     """Represents a detected mechanical/electrical/plumbing symbol."""
 
@@ -48,7 +64,7 @@ class ExtractionResult:
     metadata: Dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class HVACRecommendation:
     """HVAC requirements per room."""
 
@@ -80,6 +96,15 @@ class UnderfloorHeatingQuantities:
     estimated_pipe_length_m: float
 
 
+@dataclass(**_SLOTS)
+class RoomLocation:
+    """Where a room sits on its page; lets revisions match rooms whose positional ids changed."""
+
+    room_id: str
+    page_number: int
+    bounds: Tuple[float, float, float, float]  # xmin, ymin, xmax, ymax in PDF points
+
+
 @dataclass
 class ProjectQuantities:
     """High level summary for reports/exports."""
@@ -87,6 +112,7 @@ class ProjectQuantities:
     hvac: List[HVACRecommendation]
     plumbing: PlumbingQuantities
     underfloor: UnderfloorHeatingQuantities
+    rooms: List[RoomLocation] = field(default_factory=list)
 
 
 @dataclass
@@ -2,34 +2,168 @@
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List
-
-try:  # pragma: no cover
-    from paddleocr import PaddleOCR
-except Exception:  # pragma: no cover
-    PaddleOCR = None  # type: ignore
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from app.core.models import PageImage
+from app.core.profiling import profile_stage
+from app.core.result_cache import ResultCache, cache_key
+from app.utils.file_utils import hash_bytes
+from app.utils.lazy import installed_version, is_installed, optional_import
+from app.utils.spatial_index import BBox
 
 LOGGER = logging.getLogger(__name__)
 
 
 class OCRReader:
-    def __init__(self, lang: str = "en") -> None:
+    """PaddleOCR wrapper returning text items in PDF points, like pdfplumber words.
+
+    :meth:`read_regions` recognises only given regions of a page (room
+    candidates) instead of the whole sheet. Each crop's result is cached by a
+    hash of its pixels and the PaddleOCR version, in memory and in ``cache``
+    when one is given, so repeated unit layouts and re-runs are recognised once
+    and an engine upgrade does not serve the old engine's results. The
+    in-memory copy keeps only the ``memo_size`` most recently used crops, as
+    readers live as long as the warmed API workers.
+    """
+
+    def __init__(
+        self, lang: str = "en", cache: Optional[ResultCache] = None, padding: int = 4, memo_size: int = 256
+    ) -> None:
         self.lang = lang
-        self._ocr = PaddleOCR(use_angle_cls=True, lang=lang) if PaddleOCR else None
+        self.cache = cache
+        # Pixels added around each region so labels touching the walls are not clipped.
+        self.padding = padding
+        # PaddleOCR is imported and built on first use or warmup().
+        self._ocr: Any = None
+        self._ocr_loaded = False
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, List[Tuple[str, float, BBox]]]" = OrderedDict()
+
+    def __getstate__(self) -> dict:
+        # Ship settings only; page workers build their own engine.
+        state = self.__dict__.copy()
+        state["_ocr"] = None
+        state["_ocr_loaded"] = False
+        state["_memo"] = OrderedDict()
+        return state
+
+    @property
+    def available(self) -> bool:
+        """Whether OCR can run, checked without importing PaddleOCR."""
+
+        return self._ocr is not None if self._ocr_loaded else is_installed("paddleocr")
+
+    @property
+    def ocr(self) -> Any:
+        if self._ocr is None and not self._ocr_loaded:
+            paddleocr = optional_import("paddleocr")
+            self._ocr = paddleocr.PaddleOCR(use_angle_cls=True, lang=self.lang) if paddleocr else None
+            self._ocr_loaded = True
+        return self._ocr
+
+    @property
+    def engine_version(self) -> Optional[str]:
+        return installed_version("paddleocr")
+
+    def cache_settings(self) -> dict:
+        return {
+            "lang": self.lang,
+            "padding": self.padding,
+            "available": self.available,
+            "engine": self.engine_version,
+        }
+
+    def warmup(self) -> bool:
+        """Build the OCR engine ahead of the first request; returns whether it is available."""
 
-    def read(self, images: List[PageImage]) -> Dict[int, List[str]]:
-        """Return words detected on each page."""
+        return self.ocr is not None
 
-        outputs: Dict[int, List[str]] = {}
+    def read(self, images: List[PageImage]) -> Dict[int, List[dict]]:
+        """Text items on each whole page, with bboxes in PDF points."""
+
+        outputs: Dict[int, List[dict]] = {}
         for page in images:
-            if not self._ocr:
-                LOGGER.warning("PaddleOCR unavailable; returning empty result")
-                outputs[page.page_number] = []
-                continue
-            result = self._ocr.ocr(str(page.image_path), cls=True)
-            outputs[page.page_number] = [item[1][0] for line in result for item in line]
+            outputs[page.page_number] = self.read_regions(page, [None])
         return outputs
 
+    def read_regions(self, page: PageImage, regions: Sequence[Optional[BBox]]) -> List[dict]:
+        """Text items found inside ``regions`` (``(x0, top, x1, bottom)`` in PDF points).
+
+        A ``None`` region stands for the whole page. Items carry ``text``,
+        ``confidence``, ``page_number`` and a bbox in PDF points, so they can be
+        passed to :meth:`GeometryExtractor.assign_labels` as they are.
+        """
+
+        if self.ocr is None:
+            LOGGER.warning("PaddleOCR unavailable; returning empty result")
+            return []
+        # Crops are sliced (or rendered) from the page one by one and converted, not the whole sheet.
+        width, height, crop = _page_crops(page)
+        scale = page.dpi / 72.0
+        items: List[dict] = []
+        with profile_stage("ocr") as stage:
+            for region in regions:
+                if region is None:
+                    px0, py0, px1, py1 = 0, 0, width, height
+                else:
+                    px0 = max(0, int(region[0] * scale) - self.padding)
+                    py0 = max(0, int(region[1] * scale) - self.padding)
+                    px1 = min(width, int(region[2] * scale + 1) + self.padding)
+                    py1 = min(height, int(region[3] * scale + 1) + self.padding)
+                if px1 - px0 < 8 or py1 - py0 < 8:
+                    continue
+                for text, confidence, (x0, y0, x1, y1) in self._recognise(crop(px0, py0, px1, py1)):
+                    items.append(
+                        {
+                            "text": text,
+                            "confidence": confidence,
+                            "x0": (px0 + x0) / scale,
+                            "top": (py0 + y0) / scale,
+                            "x1": (px0 + x1) / scale,
+                            "bottom": (py0 + y1) / scale,
+                            "page_number": page.page_number,
+                        }
+                    )
+                stage.add_items(1)
+        return items
+
+    def _recognise(self, crop: Any) -> List[Tuple[str, float, BBox]]:
+        """``(text, confidence, bbox in crop pixels)`` for one crop, cached by its content."""
+
+        crop_hash = hash_bytes(repr(crop.shape).encode() + crop.tobytes())
+        if crop_hash in self._memo:
+            self._memo.move_to_end(crop_hash)
+            return self._memo[crop_hash]
+        key = cache_key("ocr", crop_hash, self.lang, self.engine_version)
+        lines = self.cache.get("ocr", key) if self.cache is not None else None
+        if lines is None:
+            result = self.ocr.ocr(crop, cls=True) or []
+            lines = []
+            for page_lines in result:
+                for box, (text, confidence) in page_lines or []:
+                    xs = [float(x) for x, _ in box]
+                    ys = [float(y) for _, y in box]
+                    lines.append((text, float(confidence), (min(xs), min(ys), max(xs), max(ys))))
+            if self.cache is not None:
+                self.cache.put("ocr", key, lines)
+        self._memo[crop_hash] = lines
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return lines
+
+
+def _page_crops(page: PageImage) -> Tuple[int, int, Callable[[int, int, int, int], Any]]:
+    """Width, height and a function returning the BGR crop ``(x0, y0, x1, y1)`` of the page."""
+
+    from app.utils.image_utils import load_image, to_bgr
+
+    if page.render_clip is not None:
+        return page.width, page.height, lambda x0, y0, x1, y1: to_bgr(page.render_clip((x0, y0, x1, y1)))
+    if page.pixels is not None:
+        pixels, convert = page.pixels, to_bgr
+    else:
+        pixels, convert = load_image(Path(page.image_path)), lambda crop: crop
+    height, width = pixels.shape[:2]
+    return width, height, lambda x0, y0, x1, y1: convert(pixels[y0:y1, x0:x1])
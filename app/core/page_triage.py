@@ -0,0 +1,133 @@
+"""Cheap page-type triage and per-page render resolution.
+
+Drawing sets mix floor plans with cover sheets, schedules and legends that
+contain no fixtures. Pages are classified from their vector and text layer,
+which is parsed anyway, so only plan pages are rasterized for detection, and
+each of those is rendered at the lowest DPI that keeps the smallest symbol
+large enough for the detector.
+"""
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import List, Tuple
+
+PLAN = "plan"
+SCHEDULE = "schedule"
+TITLE = "title"
+PAGE_TYPES = (PLAN, SCHEDULE, TITLE)
+
+# Sheet names that only appear on cover/index sheets (title blocks say "DRAWING TITLE", not these).
+TITLE_KEYWORDS = ("COVER SHEET", "TITLE SHEET", "DRAWING LIST", "DRAWING INDEX", "SHEET INDEX", "LIST OF DRAWINGS")
+MM_PER_INCH = 25.4
+
+
+@dataclass
+class PageFeatures:
+    """The counts triage looks at; sizes are in PDF points."""
+
+    width: float
+    height: float
+    # (x0, top, text) per word.
+    words: List[Tuple[float, float, str]]
+    # Horizontal/vertical segments, counting each rect as four.
+    straight: int
+    # Oblique lines and curves: door swings, fixtures, angled walls.
+    other: int
+    images: int
+
+    @classmethod
+    def from_vectors(cls, vector_page, width: float, height: float) -> "PageFeatures":
+        """Features of a :class:`PDFPageVectorData` (pdfplumber ``page.objects`` and words)."""
+
+        shapes = vector_page.shapes or {}
+        straight = 4 * len(shapes.get("rect", shapes.get("rects", [])))
+        other = len(shapes.get("curve", shapes.get("curves", [])))
+        for line in shapes.get("line", shapes.get("lines", [])):
+            if _axis_aligned((line["x0"], line["top"]), (line["x1"], line["bottom"])):
+                straight += 1
+            else:
+                other += 1
+        words = [(float(item["x0"]), float(item["top"]), str(item["text"])) for item in vector_page.text_items]
+        images = len(shapes.get("image", shapes.get("images", [])))
+        return cls(width, height, words, straight, other, images)
+
+    @classmethod
+    def from_fitz(cls, page) -> "PageFeatures":
+        """Features of a PyMuPDF page, for passes that do not parse vectors with pdfplumber."""
+
+        straight = other = 0
+        for path in page.get_cdrawings():
+            for item in path["items"]:
+                if item[0] == "re":
+                    straight += 4
+                elif item[0] == "l" and _axis_aligned(item[1], item[2]):
+                    straight += 1
+                else:
+                    other += 1
+        words = [(x0, top, text) for x0, top, _, _, text, *_ in page.get_text("words")]
+        return cls(page.rect.width, page.rect.height, words, straight, other, len(page.get_images()))
+
+
+@dataclass
+class PageTriage:
+    """Classifies pages as plan, schedule or title and picks their render DPI.
+
+    Anything that is not clearly a schedule or a title sheet is a plan, so a
+    misjudged page costs a render rather than its symbols. Scans (pages with
+    images) and pages without text are always plans.
+    """
+
+    # The smallest fixture symbol as printed, and the size in pixels the detector needs it at.
+    min_symbol_mm: float = 3.0
+    min_symbol_px: int = 20
+    min_dpi: int = 72
+    # Renders of very large sheets are scaled down to stay under this many pixels.
+    max_megapixels: float = 60.0
+    # Title sheets carry little linework; schedules are mostly words in rows, with almost no curves.
+    title_max_segments: int = 200
+    schedule_min_rows: int = 5
+    schedule_min_tabular: float = 0.6
+    schedule_max_other: float = 0.05
+    row_tolerance: float = 2.0
+
+    def cache_settings(self) -> dict:
+        return asdict(self)
+
+    def classify(self, features: PageFeatures) -> str:
+        if not features.words or features.images:
+            return PLAN
+        drawn = features.straight + features.other
+        if drawn == 0:
+            return TITLE
+        text = " ".join(word for _, _, word in features.words).upper()
+        if drawn <= self.title_max_segments and any(keyword in text for keyword in TITLE_KEYWORDS):
+            return TITLE
+        rows = Counter(round(top / self.row_tolerance) for _, top, _ in features.words)
+        table_rows = [count for count in rows.values() if count >= 3]
+        tabular = sum(table_rows) / len(features.words)
+        if (
+            len(table_rows) >= self.schedule_min_rows
+            and tabular >= self.schedule_min_tabular
+            and features.other <= self.schedule_max_other * drawn
+        ):
+            return SCHEDULE
+        return PLAN
+
+    def render_dpi(self, width: float, height: float, max_dpi: int) -> int:
+        """DPI for a ``width`` x ``height`` point sheet, never above ``max_dpi``.
+
+        The smallest symbol sets the resolution; the pixel budget caps it on
+        oversized sheets even if that makes the smallest symbols undersized.
+        """
+
+        dpi = max(self.min_dpi, math.ceil(self.min_symbol_px * MM_PER_INCH / self.min_symbol_mm))
+        area_sq_in = (width / 72.0) * (height / 72.0)
+        if area_sq_in > 0:
+            dpi = min(dpi, int(math.sqrt(self.max_megapixels * 1e6 / area_sq_in)))
+        return max(1, min(max_dpi, dpi))
+
+
+def _axis_aligned(start, end, tolerance: float = 0.5) -> bool:
+    return abs(start[0] - end[0]) <= tolerance or abs(start[1] - end[1]) <= tolerance
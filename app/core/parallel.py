@@ -0,0 +1,309 @@
+"""Per-page execution of the pipeline stages: streaming and page-parallel modes."""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.geometry_extractor import GeometryExtractor
+from app.core.models import PageImage, RoomGeometry, SymbolDetection
+from app.core.ocr_reader import OCRReader
+from app.core.pdf_loader import IngestedPage, PDFLoader, PDFPageVectorData
+from app.core.profiling import StageProfiler, StageTiming, current_profiler, profile_stage
+from app.core.room_classifier import RoomClassifier
+from app.core.symbol_detector import SymbolDetector
+from app.core.vector_symbols import VectorSymbolMatcher
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class PageStages:
+    """The per-page components, shipped to workers with every task.
+
+    They pickle as plain settings (the detector reloads its weights once per
+    worker process), so workers always run with the caller's current settings.
+    """
+
+    pdf_loader: PDFLoader
+    geometry_extractor: GeometryExtractor
+    room_classifier: RoomClassifier
+    symbol_detector: SymbolDetector
+    vector_matcher: VectorSymbolMatcher
+    ocr_reader: Optional[OCRReader] = None
+
+
+@dataclass
+class PageRangeResult:
+    """Compact output of one worker: rooms and/or symbols for its pages."""
+
+    rooms: Optional[List[RoomGeometry]] = None
+    symbols: Optional[List[SymbolDetection]] = None
+    # Parsed pages, filled only by process_in_batches(keep_vectors=True) for the vectors cache.
+    vector_pages: Optional[List[PDFPageVectorData]] = None
+    # Stage timings measured in the worker process, merged into the caller's profile.
+    timings: Optional[List[StageTiming]] = None
+
+
+def extract_rooms(
+    stages: PageStages,
+    vector_pages: List[PDFPageVectorData],
+    pdf_path: Optional[Path] = None,
+    images: Iterable[PageImage] = (),
+) -> List[RoomGeometry]:
+    """Rooms with labels and categories; with ``pdf_path``, textless pages are labelled by OCR."""
+
+    with profile_stage("geometry") as stage:
+        rooms = stages.geometry_extractor.from_vectors(vector_pages)
+        stage.add_items(len(rooms))
+    with profile_stage("labels") as stage:
+        labels = [{**text, "page_number": page.page_number} for page in vector_pages for text in page.text_items]
+        rooms = stages.geometry_extractor.assign_labels(rooms, labels)
+        stage.add_items(len(labels))
+    if pdf_path is not None:
+        ocr_room_labels(stages, pdf_path, vector_pages, rooms, images)
+    with profile_stage("classify") as stage:
+        rooms = list(stages.room_classifier.normalize(rooms))
+        stage.add_items(len(rooms))
+    return rooms
+
+
+def ocr_room_labels(
+    stages: PageStages,
+    pdf_path: Path,
+    vector_pages: List[PDFPageVectorData],
+    rooms: List[RoomGeometry],
+    images: Iterable[PageImage] = (),
+) -> None:
+    """Label rooms on pages without any text layer (scans, text exported as outlines).
+
+    Only the room regions are OCR'd. Rasters already rendered for detection
+    are reused through ``images``; other pages are rendered one at a time.
+    """
+
+    reader = stages.ocr_reader
+    if reader is None or not reader.available:
+        return
+    textless = {page.page_number for page in vector_pages if not page.text_items}
+    per_page: Dict[int, List[RoomGeometry]] = defaultdict(list)
+    for room in rooms:
+        if room.page_number in textless:
+            per_page[room.page_number].append(room)
+    if not per_page:
+        return
+    LOGGER.info("OCR of room regions on %s pages without text", len(per_page))
+    rendered = {image.page_number: image for image in images if image.page_number in per_page}
+    missing = [number - 1 for number in sorted(per_page) if number not in rendered]
+    pages = [rendered[number] for number in sorted(rendered)]
+    streamed = stages.pdf_loader.stream(pdf_path, extract_vectors=False, pages=missing) if missing else ()
+    for image in _chain_images(pages, streamed):
+        page_rooms = per_page[image.page_number]
+        items = reader.read_regions(image, [room.polygon.bounds for room in page_rooms])
+        stages.geometry_extractor.assign_labels(page_rooms, items)
+
+
+def _chain_images(images: List[PageImage], streamed: Iterable) -> Iterator[PageImage]:
+    yield from images
+    for page in streamed:
+        if page.image is not None:
+            yield page.image
+
+
+def match_vector_symbols(
+    stages: PageStages, vector_pages: Iterable[PDFPageVectorData]
+) -> Tuple[List[SymbolDetection], List[int]]:
+    """Symbols on the pages the vector matcher covers, and 0-based indices of the other pages."""
+
+    symbols: List[SymbolDetection] = []
+    remaining: List[int] = []
+    for page in vector_pages:
+        with profile_stage("vector_symbols") as stage:
+            match = stages.vector_matcher.match_page(page)
+            stage.add_items(1)
+        if match.covered:
+            symbols.extend(match.detections)
+        else:
+            remaining.append(page.page_number - 1)
+    return symbols, remaining
+
+
+def sort_by_page(symbols: List[SymbolDetection]) -> List[SymbolDetection]:
+    # Stable, so detections keep their within-page order.
+    return sorted(symbols, key=lambda det: det.page_number)
+
+
+def process_page_range(
+    stages: PageStages,
+    pdf_path: Path,
+    pages: Optional[Sequence[int]] = None,
+    with_rooms: bool = True,
+    with_symbols: bool = True,
+    streaming: bool = False,
+) -> PageRangeResult:
+    """Open the PDF, then parse/rasterize/extract ``pages`` (0-based indices; all if None).
+
+    Pages go through geometry, labelling and detection in groups of the
+    detector's batch size (one page with ``streaming``), and each group is
+    released before the next one is read, so only rooms and symbols accumulate
+    and peak memory does not grow with the page count. With a symbol library loaded, symbols are matched on the vectors first and
+    only pages the matcher does not cover are rasterized and run through YOLO.
+    """
+
+    result = PageRangeResult(rooms=[] if with_rooms else None, symbols=[] if with_symbols else None)
+    if with_symbols and stages.vector_matcher.enabled:
+        # Vector pass first; only the pages the matcher does not cover get rasterized.
+        vector_pages = _vector_pages(stages, pdf_path, pages, streaming)
+        if with_rooms and not streaming:
+            result.rooms = extract_rooms(stages, vector_pages, pdf_path)
+        elif with_rooms:
+            vector_pages = _tee_rooms(stages, pdf_path, vector_pages, result.rooms)
+        result.symbols, pages = match_vector_symbols(stages, vector_pages)
+        LOGGER.info("%s symbols matched on vectors; %s pages left for raster detection", len(result.symbols), len(pages))
+        if pages:
+            result.symbols.extend(detect_raster_symbols(stages, pdf_path, pages, streaming))
+        result.symbols = sort_by_page(result.symbols)
+        return result
+
+    return process_in_batches(
+        stages, pdf_path, pages, with_rooms, with_symbols, batch_size=1 if streaming else None
+    )
+
+
+def process_in_batches(
+    stages: PageStages,
+    pdf_path: Path,
+    pages: Optional[Sequence[int]] = None,
+    with_rooms: bool = True,
+    with_symbols: bool = True,
+    batch_size: Optional[int] = None,
+    vector_pages: Optional[List[PDFPageVectorData]] = None,
+    keep_vectors: bool = False,
+) -> PageRangeResult:
+    """Rooms and symbols of ``pages``, ``batch_size`` pages (the detector's batch size by default) at a time.
+
+    Each group is parsed and rendered, detected and OCR'd, and released before
+    the next one is read, so the rasters of at most one group are alive however
+    many pages are rasterized. Rooms come from ``vector_pages`` (e.g. cached)
+    when given instead of re-parsing; ``keep_vectors`` returns the parsed pages.
+    """
+
+    result = PageRangeResult(
+        rooms=[] if with_rooms else None,
+        symbols=[] if with_symbols else None,
+        vector_pages=[] if keep_vectors else None,
+    )
+    cached = {page.page_number: page for page in vector_pages or ()}
+    parse = (with_rooms and not cached) or keep_vectors
+    stream = stages.pdf_loader.stream(pdf_path, rasterize=with_symbols, extract_vectors=parse, pages=pages)
+    for batch in _batches(stream, batch_size or stages.symbol_detector.batch_size):
+        images = [page.image for page in batch if page.image is not None]
+        if keep_vectors:
+            result.vector_pages.extend(page.vector for page in batch)
+        if with_rooms:
+            vectors = [page.vector if parse else cached[page.page_number] for page in batch]
+            result.rooms.extend(extract_rooms(stages, vectors, pdf_path, images))
+        if with_symbols and images:
+            result.symbols.extend(stages.symbol_detector.detect(images))
+    return result
+
+
+def _batches(pages: Iterable[IngestedPage], size: int) -> Iterator[List[IngestedPage]]:
+    batch: List[IngestedPage] = []
+    for page in pages:
+        batch.append(page)
+        if len(batch) >= size:
+            yield batch
+            # The caller is done with this group; drop its rasters before the next page is rendered.
+            batch.clear()
+            del page
+    if batch:
+        yield batch
+
+
+def detect_raster_symbols(
+    stages: PageStages, pdf_path: Path, pages: Optional[Sequence[int]], streaming: bool = False
+) -> List[SymbolDetection]:
+    return process_in_batches(
+        stages, pdf_path, pages, with_rooms=False, batch_size=1 if streaming else None
+    ).symbols
+
+
+def _vector_pages(
+    stages: PageStages, pdf_path: Path, pages: Optional[Sequence[int]], streaming: bool
+) -> Iterable[PDFPageVectorData]:
+    if not streaming:
+        return stages.pdf_loader.ingest(pdf_path, rasterize=False, pages=pages).vector_pages
+    # Streaming: pages are extracted as the matcher consumes them.
+    return (page.vector for page in stages.pdf_loader.stream(pdf_path, rasterize=False, pages=pages))
+
+
+def _tee_rooms(
+    stages: PageStages, pdf_path: Path, vector_pages: Iterable[PDFPageVectorData], rooms: List[RoomGeometry]
+) -> Iterator[PDFPageVectorData]:
+    for page in vector_pages:
+        rooms.extend(extract_rooms(stages, [page], pdf_path))
+        yield page
+
+
+def _profiled_page_range(*args) -> PageRangeResult:
+    """:func:`process_page_range` in a worker process, returning its stage timings too."""
+
+    profiler = StageProfiler()
+    with profiler.activate():
+        result = process_page_range(*args)
+    result.timings = profiler.timings()
+    return result
+
+
+def split_pages(page_count: int, parts: int) -> List[range]:
+    """Split ``range(page_count)`` into at most ``parts`` contiguous, near-equal ranges."""
+
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for index in range(parts):
+        stop = start + size + (1 if index < extra else 0)
+        if stop > start:
+            ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+
+def process_pages_parallel(
+    executor: ProcessPoolExecutor,
+    workers: int,
+    stages: PageStages,
+    pdf_path: Path,
+    with_rooms: bool = True,
+    with_symbols: bool = True,
+    streaming: bool = False,
+    pages: Optional[Sequence[int]] = None,
+) -> PageRangeResult:
+    """Fan page ranges out to ``executor`` and merge results back in page order.
+
+    ``pages`` (sorted 0-based indices) restricts the run to those pages.
+    """
+
+    if pages is None:
+        pages = range(stages.pdf_loader.page_count(pdf_path))
+    chunks = [list(pages[part.start:part.stop]) for part in split_pages(len(pages), workers)]
+    LOGGER.info("Processing %s in %s page ranges", pdf_path, len(chunks))
+    futures = [
+        executor.submit(_profiled_page_range, stages, pdf_path, chunk, with_rooms, with_symbols, streaming)
+        for chunk in chunks
+    ]
+    merged = PageRangeResult(rooms=[] if with_rooms else None, symbols=[] if with_symbols else None)
+    profiler = current_profiler()
+    for future in futures:
+        part = future.result()
+        if profiler is not None and part.timings:
+            profiler.merge(part.timings)
+        if with_rooms:
+            merged.rooms.extend(part.rooms)
+        if with_symbols:
+            merged.symbols.extend(part.symbols)
+    return merged
@@ -1,24 +1,23 @@
 """Utilities for reading PDF floor plans and creating analysis-ready artifacts."""
 from __future__ import annotations
 
+import io
 import json
 import logging
-from dataclasses import dataclass
+import os
+import struct
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional
-
-try:  # pragma: no cover - optional dependency
-    import fitz  # type: ignore
-except Exception:  # pragma: no cover - degrade gracefully
-    fitz = None  # type: ignore
-
-try:  # pragma: no cover
-    import pdfplumber  # type: ignore
-except Exception:  # pragma: no cover
-    pdfplumber = None  # type: ignore
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
 
+from app.core.extraction_profile import ExtractionProfile, fitz_vectors, plumber_vectors, resolve_profile
 from app.core.models import ExtractionResult, PageImage
-from app.utils.file_utils import ensure_dir, hash_file
+from app.core.page_triage import PLAN, PageFeatures, PageTriage
+from app.core.profiling import profile_stage
+from app.core.raster_cache import DEFAULT_MAX_BYTES, RasterCache
+from app.core.vector_store import VectorStore
+from app.utils.file_utils import ensure_dir, hash_bytes, hash_file
+from app.utils.lazy import optional_import
 
 LOGGER = logging.getLogger(__name__)
 
@@ -32,58 +31,339 @@ class PDFPageVectorData:
     text_items: List[dict]
 
 
+@dataclass
+class IngestedPage:
+    """Vector data and (optionally) the raster of a single page."""
+
+    vector: PDFPageVectorData
+    image: Optional[PageImage] = None
+    # "plan", "schedule" or "title" when the loader triages pages; only plans are rasterized.
+    page_type: Optional[str] = None
+
+    @property
+    def page_number(self) -> int:
+        return self.vector.page_number
+
+
+@dataclass
+class IngestedDocument:
+    """Everything the pipeline needs from a PDF, produced in one pass."""
+
+    file_path: Path
+    file_hash: str
+    pages: List[IngestedPage] = field(default_factory=list)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    @property
+    def vector_pages(self) -> List[PDFPageVectorData]:
+        return [page.vector for page in self.pages]
+
+    @property
+    def images(self) -> List[PageImage]:
+        return [page.image for page in self.pages if page.image is not None]
+
+    @property
+    def text_items(self) -> List[dict]:
+        return [item for page in self.pages for item in page.vector.text_items]
+
+    def to_result(self, raster_cache: Optional[Path] = None) -> ExtractionResult:
+        result = ExtractionResult(file_path=self.file_path, metadata={"page_count": str(self.page_count)})
+        result.metadata["file_hash"] = self.file_hash
+        if raster_cache is not None:
+            result.metadata["raster_cache"] = str(raster_cache)
+        return result
+
+
 class PDFLoader:
     """Loads PDF documents using PyMuPDF/pdfplumber and prepares assets."""
 
-    def __init__(self, raster_dpi: int = 300, cache_dir: Optional[Path] = None) -> None:
+    def __init__(
+        self,
+        raster_dpi: int = 300,
+        cache_dir: Optional[Path] = None,
+        in_memory: bool = True,
+        debug_png: bool = False,
+        triage: Optional[PageTriage] = None,
+        raster_cache: Optional[RasterCache] = None,
+        cache_renders: bool = False,
+        extraction: Union[str, ExtractionProfile] = "full",
+        tiled: bool = False,
+    ) -> None:
+        # "full" keeps pdfplumber's page.objects whole; "lean" keeps only the shapes and fields
+        # the pipeline reads, parsed with PyMuPDF when it is installed.
+        self.extraction = resolve_profile(extraction)
+        # With triage, raster_dpi is the upper bound of the per-page render DPI.
         self.raster_dpi = raster_dpi
+        self.triage = triage
+        # In-memory rasters hand pixmap samples straight to detection/OCR; PNGs are
+        # then only written when debug_png is set (or numpy is missing).
+        self.in_memory = in_memory
+        self.debug_png = debug_png
         self.cache_dir = cache_dir or Path(".cache/pages")
         ensure_dir(self.cache_dir)
+        # Renders are keyed by file hash, page and DPI and always looked up here first. PNGs
+        # written anyway (debug_png, no numpy) are stored in it; cache_renders stores every render.
+        max_bytes = int(os.getenv("MEP_RASTER_CACHE_MB", "0")) * 2**20 or DEFAULT_MAX_BYTES
+        self.raster_cache = raster_cache or RasterCache(self.cache_dir, max_bytes=max_bytes)
+        self.cache_renders = cache_renders
+        # For tiled detection: pages are not rendered whole; each tile or OCR crop is rendered
+        # from the PDF on its own (PageImage.render_clip), bypassing the raster cache.
+        self.tiled = tiled
+
+    def cache_settings(self) -> dict:
+        return {"raster_dpi": self.raster_dpi, "triage": self.triage.cache_settings() if self.triage else None}
+
+    def vector_settings(self) -> dict:
+        """Settings that change the parsed vector data (part of the vectors and rooms cache keys)."""
+
+        return self.extraction.cache_settings()
 
     def load(self, pdf_path: Path) -> ExtractionResult:
         LOGGER.info("Loading PDF %s", pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(pdf_path)
 
-        pages = list(self._iterate_pages(pdf_path))
-        result = ExtractionResult(file_path=pdf_path, metadata={"page_count": str(len(pages))})
-        result.metadata["file_hash"] = hash_file(pdf_path)
-        result.metadata["raster_cache"] = str(self.cache_dir)
-        return result
+        document = self.ingest(pdf_path, rasterize=False)
+        return document.to_result(raster_cache=self.cache_dir)
+
+    def page_count(self, pdf_path: Path) -> int:
+        """Count pages without parsing their content."""
+
+        fitz, pdfplumber = _backends()
+        if fitz is not None:
+            with fitz.open(pdf_path) as doc:
+                return len(doc)
+        if pdfplumber is not None:
+            with pdfplumber.open(pdf_path) as pdf:
+                return len(pdf.pages)
+        return 0
+
+    def page_fingerprints(self, pdf_path: Path) -> List[str]:
+        """One content hash per page, cheap enough to compute before any parsing.
+
+        A page's vector objects and text are drawn by its content stream and the
+        form XObjects, images and fonts it references, so the fingerprint
+        hashes those streams (plus the page box and rotation) with PyMuPDF
+        instead of parsing them. Without PyMuPDF the parsed pdfplumber objects
+        are hashed. Pages keep their fingerprint when other sheets of the set
+        change, even though the file hash does not.
+        """
+
+        fitz, pdfplumber = _backends()
+        with profile_stage("fingerprint") as stage:
+            if fitz is not None:
+                with fitz.open(pdf_path) as doc:
+                    fingerprints = [_fitz_page_fingerprint(doc, page) for page in doc]
+            elif pdfplumber is not None:
+                with pdfplumber.open(pdf_path) as pdf:
+                    fingerprints = [
+                        hash_bytes(json.dumps([page.objects, page.bbox], sort_keys=True, default=str).encode())
+                        for page in pdf.pages
+                    ]
+            else:
+                fingerprints = []
+            stage.add_items(len(fingerprints))
+        return fingerprints
+
+    def ingest(
+        self,
+        pdf_path: Path,
+        rasterize: bool = True,
+        extract_vectors: bool = True,
+        pages: Optional[Sequence[int]] = None,
+    ) -> IngestedDocument:
+        """Read the PDF once and extract hash, vectors, text and rasters page by page.
+
+        The file is read into memory a single time; the SHA-256 is computed from
+        those bytes and both pdfplumber and PyMuPDF open the same buffer, so every
+        page is parsed and rendered within one loop over the document. Either half
+        can be switched off when its output is already cached, and ``pages``
+        (0-based indices) restricts the pass to a subset of the document.
+        """
+
+        LOGGER.info("Ingesting PDF %s", pdf_path)
+        with profile_stage("load") as stage:
+            data = self._read(pdf_path)
+            document = IngestedDocument(file_path=pdf_path, file_hash=hash_bytes(data))
+            stage.add_items(1)
+        document.pages.extend(self._iter_pages(document.file_hash, data, rasterize, extract_vectors, pages))
+        LOGGER.info("Ingested %s pages from %s", document.page_count, pdf_path)
+        return document
+
+    def stream(
+        self,
+        pdf_path: Path,
+        rasterize: bool = True,
+        extract_vectors: bool = True,
+        pages: Optional[Sequence[int]] = None,
+    ) -> Iterator[IngestedPage]:
+        """Like :meth:`ingest`, but yield pages one at a time without retaining them.
+
+        pdfplumber's per-page object cache is flushed as soon as a page has been
+        extracted, so memory is bounded by the page the consumer currently holds.
+        """
+
+        LOGGER.info("Streaming PDF %s", pdf_path)
+        with profile_stage("load") as stage:
+            data = self._read(pdf_path)
+            stage.add_items(1)
+        yield from self._iter_pages(hash_bytes(data), data, rasterize, extract_vectors, pages)
+
+    @staticmethod
+    def _read(pdf_path: Path) -> bytes:
+        if not pdf_path.exists():
+            raise FileNotFoundError(pdf_path)
+        return pdf_path.read_bytes()
+
+    def _iter_pages(
+        self,
+        file_hash: str,
+        data: bytes,
+        rasterize: bool,
+        extract_vectors: bool,
+        pages: Optional[Sequence[int]],
+    ) -> Iterator[IngestedPage]:
+        fitz, pdfplumber = _backends()
+        profile = self.extraction
+        read_with_fitz = bool(extract_vectors and fitz is not None and profile.prefer_pymupdf and profile.object_types)
+        if extract_vectors and not read_with_fitz and pdfplumber is None:
+            LOGGER.warning("pdfplumber is not installed; vector extraction disabled")
+        if rasterize and fitz is None:
+            LOGGER.warning("PyMuPDF is not installed; rasterization skipped")
+
+        plumber_doc = None
+        if extract_vectors and not read_with_fitz and pdfplumber is not None:
+            plumber_doc = pdfplumber.open(io.BytesIO(data))
+        fitz_doc = None
+        if (rasterize or read_with_fitz) and fitz is not None:
+            fitz_doc = fitz.open(stream=data, filetype="pdf")
+        try:
+            if plumber_doc is not None:
+                page_count = len(plumber_doc.pages)
+            elif fitz_doc is not None:
+                page_count = len(fitz_doc)
+            else:
+                page_count = 0
+            for page_index in pages if pages is not None else range(page_count):
+                if read_with_fitz:
+                    with profile_stage("vector_parse") as stage:
+                        shapes, words = fitz_vectors(fitz_doc[page_index], profile)
+                        vector = PDFPageVectorData(page_number=page_index + 1, shapes=shapes, text_items=words)
+                        stage.add_items(1)
+                elif plumber_doc is not None:
+                    with profile_stage("vector_parse") as stage:
+                        plumber_page = plumber_doc.pages[page_index]
+                        vector = self._extract_page(plumber_page, profile)
+                        plumber_page.close()  # drop pdfplumber's cached layout; we keep only what we extracted
+                        stage.add_items(1)
+                else:
+                    vector = PDFPageVectorData(page_number=page_index + 1, shapes={}, text_items=[])
+                image = page_type = None
+                dpi = self.raster_dpi
+                if rasterize and fitz_doc is not None and self.triage is not None:
+                    with profile_stage("triage") as stage:
+                        fitz_page = fitz_doc[page_index]
+                        if read_with_fitz or plumber_doc is not None:
+                            features = PageFeatures.from_vectors(vector, fitz_page.rect.width, fitz_page.rect.height)
+                        else:
+                            features = PageFeatures.from_fitz(fitz_page)
+                        page_type = self.triage.classify(features)
+                        dpi = self.triage.render_dpi(features.width, features.height, self.raster_dpi)
+                        stage.add_items(1)
+                    if page_type != PLAN:
+                        LOGGER.info("Page %s looks like a %s sheet; not rasterized", page_index + 1, page_type)
+                if rasterize and fitz_doc is not None and page_type in (None, PLAN):
+                    with profile_stage("rasterize") as stage:
+                        image = self._render_page(fitz_doc[page_index], file_hash, page_index, dpi, data)
+                        stage.add_items(1)
+                yield IngestedPage(vector=vector, image=image, page_type=page_type)
+                vector = image = None  # don't pin the previous page while the next one is built
+        finally:
+            if plumber_doc is not None:
+                plumber_doc.close()
+            if fitz_doc is not None:
+                fitz_doc.close()
 
     def _iterate_pages(self, pdf_path: Path) -> Iterable[PDFPageVectorData]:
+        pdfplumber = optional_import("pdfplumber")
         if pdfplumber is None:
             LOGGER.warning("pdfplumber is not installed; vector extraction disabled")
             return []
 
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
-                text = page.extract_words() if hasattr(page, "extract_words") else []
-                vector_content = page.objects
-                yield PDFPageVectorData(
-                    page_number=page.page_number,
-                    shapes=vector_content,
-                    text_items=text,
-                )
+                yield self._extract_page(page, self.extraction)
+
+    @staticmethod
+    def _extract_page(page, profile: ExtractionProfile) -> PDFPageVectorData:
+        vector_content, text = plumber_vectors(page, profile)
+        return PDFPageVectorData(
+            page_number=page.page_number,
+            shapes=vector_content,
+            text_items=text,
+        )
 
     def rasterize(self, pdf_path: Path) -> List[PageImage]:
-        """Rasterize pages to PNG for CV tasks, caching results."""
+        """Rasterize every page for CV tasks, in memory or as cached PNGs, at ``raster_dpi``."""
 
+        fitz = optional_import("fitz")
         if fitz is None:
             LOGGER.warning("PyMuPDF is not installed; rasterization skipped")
             return []
 
-        doc = fitz.open(pdf_path)
+        file_hash = hash_file(pdf_path)
         outputs: List[PageImage] = []
-        for page_index in range(len(doc)):
-            page = doc[page_index]
-            pix = page.get_pixmap(dpi=self.raster_dpi)
-            out_path = self.cache_dir / f"{pdf_path.stem}_page{page_index+1}.png"
-            pix.save(out_path)
-            outputs.append(PageImage(page_index + 1, out_path, pix.width, pix.height, self.raster_dpi))
-            LOGGER.debug("Rasterized page %s -> %s", page_index + 1, out_path)
+        with fitz.open(pdf_path) as doc:
+            for page_index in range(len(doc)):
+                outputs.append(self._render_page(doc[page_index], file_hash, page_index))
         return outputs
 
+    def _render_page(
+        self, page, file_hash: str, page_index: int, dpi: Optional[int] = None, data: Optional[bytes] = None
+    ) -> PageImage:
+        dpi = dpi or self.raster_dpi
+        page_number = page_index + 1
+        # numpy backs the in-memory buffers; without it pages fall back to PNG files.
+        image_utils = optional_import("app.utils.image_utils") if self.in_memory else None
+        if self.tiled and data is not None and image_utils is not None:
+            fitz = optional_import("fitz")
+            zoom = dpi / 72
+            size = (page.rect * fitz.Matrix(zoom, zoom)).irect
+            return PageImage(
+                page_number, None, size.width, size.height, dpi, render_clip=_ClipRenderer(data, page_index, dpi)
+            )
+        cached = self.raster_cache.get(file_hash, page_number, dpi)
+        if cached is not None:
+            image = _cached_image(cached, page_number, dpi, image_utils)
+            if image is not None:
+                return image
+        pix = page.get_pixmap(dpi=dpi)
+        out_path: Optional[Path] = None
+        if image_utils is None or self.debug_png or self.cache_renders:
+            out_path = self.raster_cache.put(file_hash, page_number, dpi, lambda path: pix.save(path, output="png"))
+            LOGGER.debug("Rasterized page %s -> %s", page_number, out_path)
+        if image_utils is None:
+            return PageImage(page_number, out_path, pix.width, pix.height, dpi)
+        return PageImage(
+            page_number,
+            out_path,
+            pix.width,
+            pix.height,
+            dpi,
+            pixels=image_utils.pixmap_to_array(pix),
+            buffer_owner=pix,
+        )
+
+    def export_vector_store(self, vector_data: Iterable[PDFPageVectorData], out_dir: Path) -> Path:
+        """Persist rects, lines, curves and words in the memory-mappable :class:`VectorStore` format."""
+
+        VectorStore.write(vector_data, out_dir)
+        LOGGER.info("Vector store saved to %s", out_dir)
+        return out_dir
+
     def export_vector_cache(self, vector_data: Iterable[PDFPageVectorData], out_path: Path) -> Path:
         """Persist raw vector extraction for debugging/training datasets."""
 
@@ -94,6 +374,67 @@ class PDFLoader:
         return out_path
 
 
+class _ClipRenderer:
+    """Renders pixel rectangles of one page on demand, from its own handle on the PDF bytes.
+
+    The document is opened on first use, so a tile can still be rendered after
+    the loader has moved on to other pages or closed its own handle.
+    """
+
+    def __init__(self, data: bytes, page_index: int, dpi: int) -> None:
+        self.data = data
+        self.page_index = page_index
+        self.dpi = dpi
+        self._doc = None
+
+    def __call__(self, rect):
+        fitz = optional_import("fitz")
+        from app.utils.image_utils import pixmap_to_array
+
+        if self._doc is None:
+            self._doc = fitz.open(stream=self.data, filetype="pdf")
+        zoom = self.dpi / 72
+        x0, y0, x1, y1 = rect
+        pix = self._doc[self.page_index].get_pixmap(dpi=self.dpi, clip=fitz.Rect(x0, y0, x1, y1) / zoom)
+        return pixmap_to_array(pix).copy()  # the tile outlives its pixmap
+
+
 def dataclass_to_dict(page: PDFPageVectorData) -> dict:
     return {"page_number": page.page_number, "shapes": page.shapes, "text_items": page.text_items}
 
+
+def _cached_image(path: Path, page_number: int, dpi: int, image_utils) -> Optional[PageImage]:
+    """A cached render as a page image; ``None`` if it was evicted before it could be read."""
+
+    try:
+        if image_utils is None:
+            with path.open("rb") as handle:
+                width, height = struct.unpack(">II", handle.read(24)[16:24])  # PNG IHDR
+            return PageImage(page_number, path, width, height, dpi)
+        pix = optional_import("fitz").Pixmap(str(path))
+    except (OSError, RuntimeError, struct.error):
+        return None
+    return PageImage(
+        page_number, path, pix.width, pix.height, dpi, pixels=image_utils.pixmap_to_array(pix), buffer_owner=pix
+    )
+
+
+def _fitz_page_fingerprint(doc, page) -> str:
+    parts = [repr((tuple(page.mediabox), page.rotation)).encode(), page.read_contents()]
+    # get_xobjects/get_images/get_fonts list resources in first-use order, so the
+    # hash is stable; nested form XObjects appear in get_xobjects as well.
+    xrefs = [item[0] for item in page.get_xobjects()] + [item[0] for item in page.get_images(full=True)]
+    for xref in xrefs:
+        if xref > 0:
+            parts.append(doc.xref_object(xref, compressed=True).encode())
+            parts.append(doc.xref_stream_raw(xref) or b"")
+    for font in page.get_fonts(full=True):
+        if font[0] > 0:
+            parts.append(doc.xref_object(font[0], compressed=True).encode())
+    return hash_bytes(b"\0".join(parts))
+
+
+def _backends():
+    """PyMuPDF and pdfplumber modules, imported on first use (``None`` if missing)."""
+
+    return optional_import("fitz"), optional_import("pdfplumber")
@@ -1,64 +1,561 @@
 """High level orchestration for the MEP extraction pipeline."""
 from __future__ import annotations
 
+import json
 import logging
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from app.core.area_calculator import AreaCalculator
 from app.core.geometry_extractor import GeometryExtractor
 from app.core.hvac_calculator import HVACCalculator
-from app.core.models import ProjectQuantities
-from app.core.pdf_loader import PDFLoader
+from app.core.models import ProjectQuantities, RoomGeometry, RoomLocation, SymbolDetection
+from app.core.ocr_reader import OCRReader
+from app.core.page_triage import PageTriage
+from app.core.parallel import (
+    PageRangeResult,
+    PageStages,
+    detect_raster_symbols,
+    extract_rooms,
+    match_vector_symbols,
+    process_in_batches,
+    process_page_range,
+    process_pages_parallel,
+    sort_by_page,
+)
+from app.core.pdf_loader import PDFLoader, PDFPageVectorData
 from app.core.plumbing_calculator import PlumbingCalculator
+from app.core.profiling import StageProfiler, code_profile, profile_stage
+from app.core.result_cache import ResultCache, cache_key
 from app.core.room_classifier import RoomClassifier
 from app.core.symbol_detector import SymbolDetector
 from app.core.underfloor_calculator import UnderfloorCalculator
+from app.core.vector_store import VectorStore
+from app.core.vector_symbols import SymbolLibrary, VectorSymbolMatcher
 from app.output.export_csv import CSVExporter
+from app.output.export_diff import QuantityDiffExporter
 from app.output.export_json import JSONExporter
 from app.output.report_generator import PDFReportGenerator
+from app.utils.file_utils import hash_file
+from app.utils.lazy import optional_import
 
 LOGGER = logging.getLogger(__name__)
 
+STAGES = ("load", "geometry", "raster", "detect", "calc", "export")
+ProgressCallback = Callable[[str, str], None]
+# Optional libraries the stages import on first use; warmup() pulls them in up front.
+WARMUP_MODULES = ("fitz", "pdfplumber", "numpy", "shapely", "app.utils.image_utils", "fpdf")
+
+
+def _ignore_progress(stage: str, state: str) -> None:
+    return None
+
 
 class MEPExtractionPipeline:
-    def __init__(self) -> None:
-        self.pdf_loader = PDFLoader()
-        self.geometry_extractor = GeometryExtractor()
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        use_cache: bool = True,
+        workers: int = 1,
+        streaming: bool = False,
+        symbol_library: Optional[Path] = None,
+        room_source: str = "rects",
+        profile_dir: Optional[Path] = None,
+        profiler: str = "cprofile",
+        ocr: bool = True,
+        triage: bool = True,
+        cache_renders: bool = False,
+        extraction: str = "full",
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 128,
+    ) -> None:
+        # Triage skips rasterizing schedule and title sheets and lowers the DPI of plan pages.
+        # cache_renders keeps every page render in the size-bounded raster cache for later runs.
+        # extraction="lean" parses only the shapes and words the stages read (with PyMuPDF if installed).
+        # tile_size detects on tiles of that many pixels, each rendered on its own instead of the whole sheet.
+        self.pdf_loader = PDFLoader(
+            triage=PageTriage() if triage else None,
+            cache_renders=cache_renders,
+            extraction=extraction,
+            tiled=bool(tile_size),
+        )
+        self.geometry_extractor = GeometryExtractor(room_source=room_source)
         self.room_classifier = RoomClassifier()
         self.hvac_calculator = HVACCalculator()
         self.plumbing_calculator = PlumbingCalculator()
         self.underfloor_calculator = UnderfloorCalculator()
-        self.symbol_detector = SymbolDetector()
+        self.symbol_detector = SymbolDetector(
+            coordinate_dpi=self.pdf_loader.raster_dpi, tile_size=tile_size, tile_overlap=tile_overlap
+        )
+        # With a learned library, symbols are matched on vectors and covered pages skip YOLO.
+        library = SymbolLibrary.load(symbol_library) if symbol_library else None
+        self.vector_matcher = VectorSymbolMatcher(library, scale=self.pdf_loader.raster_dpi / 72)
         self.area_calculator = AreaCalculator()
         self.csv_exporter = CSVExporter()
         self.json_exporter = JSONExporter()
+        self.diff_exporter = QuantityDiffExporter()
         self.pdf_report = PDFReportGenerator()
+        self.result_cache = ResultCache(cache_dir or Path(".cache/results")) if use_cache else None
+        # Labels rooms on pages without a text layer by OCR of the room regions (if PaddleOCR is installed).
+        self.ocr_reader = OCRReader(cache=self.result_cache) if ocr else None
+        # workers > 1 parses, rasterizes and extracts page ranges in a process pool.
+        self.workers = max(1, workers)
+        # streaming moves one page at a time through every per-page stage.
+        self.streaming = streaming
+        self._page_pool: Optional[ProcessPoolExecutor] = None
+        # profile_dir additionally dumps a cProfile/pyinstrument profile of every run there.
+        env_profile_dir = os.getenv("MEP_PROFILE_DIR")
+        self.profile_dir = profile_dir or (Path(env_profile_dir) if env_profile_dir else None)
+        self.profiler = os.getenv("MEP_PROFILER", profiler)
+        self.last_profile: Optional[StageProfiler] = None
+        # 1-based pages re-extracted by the last run ([] if all came from the cache, None without a cache).
+        self.last_changed_pages: Optional[List[int]] = None
+
+    def close(self) -> None:
+        """Shut down the page worker pool, if one was started."""
+
+        if self._page_pool is not None:
+            self._page_pool.shutdown(wait=True, cancel_futures=True)
+            self._page_pool = None
+
+    def warmup(self) -> None:
+        """Import the PDF/geometry/report libraries and load the detector before the first run."""
+
+        for name in WARMUP_MODULES:
+            optional_import(name)
+        self.symbol_detector.warmup()
+        if self.ocr_reader is not None and self.ocr_reader.available:
+            self.ocr_reader.warmup()
+
+    def _page_stages(self) -> PageStages:
+        return PageStages(
+            self.pdf_loader,
+            self.geometry_extractor,
+            self.room_classifier,
+            self.symbol_detector,
+            self.vector_matcher,
+            self.ocr_reader,
+        )
+
+    def stage_keys(self, file_hash: str) -> Dict[str, str]:
+        """Cache keys per stage; each one covers only the settings that stage depends on."""
+
+        vectors = cache_key("vectors", file_hash, self.pdf_loader.vector_settings())
+        rooms = cache_key(
+            "rooms",
+            vectors,
+            self.geometry_extractor.cache_settings(),
+            self.room_classifier.cache_settings(),
+            self._ocr_settings(),
+        )
+        symbols = cache_key(
+            "symbols",
+            file_hash,
+            self.pdf_loader.cache_settings(),
+            self.pdf_loader.vector_settings(),
+            self.symbol_detector.cache_settings(),
+            self.vector_matcher.cache_settings(),
+        )
+        quantities = cache_key(
+            "quantities",
+            2,  # quantities carry room locations
+            rooms,
+            symbols,
+            self.hvac_calculator.cache_settings(),
+            self.plumbing_calculator.cache_settings(),
+            self.underfloor_calculator.cache_settings(),
+        )
+        return {"vectors": vectors, "rooms": rooms, "symbols": symbols, "quantities": quantities}
+
+    def page_keys(self, fingerprints: Sequence[str]) -> List[Dict[str, str]]:
+        """Per-page cache keys for rooms and symbols, from :meth:`PDFLoader.page_fingerprints`.
+
+        Room ids and detections carry their page number, so it is part of the key.
+        """
+
+        rooms = (
+            self.pdf_loader.vector_settings(),
+            self.geometry_extractor.cache_settings(),
+            self.room_classifier.cache_settings(),
+            self._ocr_settings(),
+        )
+        symbols = (
+            self.pdf_loader.cache_settings(),
+            self.pdf_loader.vector_settings(),
+            self.symbol_detector.cache_settings(),
+            self.vector_matcher.cache_settings(),
+        )
+        return [
+            {
+                "rooms": cache_key("page_rooms", fingerprint, number, *rooms),
+                "symbols": cache_key("page_symbols", fingerprint, number, *symbols),
+            }
+            for number, fingerprint in enumerate(fingerprints, start=1)
+        ]
+
+    def _ocr_settings(self) -> Optional[dict]:
+        return self.ocr_reader.cache_settings() if self.ocr_reader is not None else None
+
+    def run(self, pdf_path: Path, export_dir: Path, progress: Optional[ProgressCallback] = None) -> Dict[str, Path]:
+        """Run every stage and export the results.
+
+        ``progress`` is called as ``progress(stage, state)`` for each entry of
+        :data:`STAGES`, with state ``"running"``, ``"done"`` or ``"cached"``.
+        Per-stage timings are kept in :attr:`last_profile` and written to
+        ``profile.json`` next to the other outputs. When the result cache
+        holds an earlier revision of the drawing (see :meth:`_previous_revision`),
+        the quantity changes are written to ``diff.json``.
+        """
 
-    def run(self, pdf_path: Path, export_dir: Path) -> Dict[str, Path]:
         LOGGER.info("Starting pipeline for %s", pdf_path)
-        self.pdf_loader.load(pdf_path)
-        vector_data = list(self.pdf_loader._iterate_pages(pdf_path))  # type: ignore
-        rooms = self.geometry_extractor.from_vectors(vector_data)
-        labels = [text for page in vector_data for text in getattr(page, "text_items", [])]
-        rooms = self.geometry_extractor.assign_labels(rooms, labels)
-        rooms = list(self.room_classifier.normalize(rooms))
-        raster_pages = self.pdf_loader.rasterize(pdf_path)
-        symbols = self.symbol_detector.detect(raster_pages)
-
-        hvac = self.hvac_calculator.recommendations(rooms)
-        plumbing = self.plumbing_calculator.summarize(rooms, symbols)
-        underfloor = self.underfloor_calculator.summarize(rooms)
-        project_quantities = ProjectQuantities(hvac=hvac, plumbing=plumbing, underfloor=underfloor)
-
-        export_dir.mkdir(parents=True, exist_ok=True)
-        json_path = export_dir / "output.json"
-        csv_path = export_dir / "output.csv"
-        pdf_summary_path = export_dir / "summary.pdf"
-
-        self.json_exporter.export(project_quantities, json_path)
-        self.csv_exporter.export(project_quantities, csv_path)
-        self.pdf_report.generate(project_quantities, pdf_summary_path)
-
-        return {"json": json_path, "csv": csv_path, "pdf": pdf_summary_path}
+        report = progress or _ignore_progress
+        profiler = StageProfiler()
+        dump_path = None
+        if self.profile_dir is not None:
+            dump_path = Path(self.profile_dir) / f"{Path(pdf_path).stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+        with profiler.activate(), code_profile(dump_path, self.profiler):
+            file_hash = hash_file(pdf_path) if self.result_cache is not None else None
+            keys = self.stage_keys(file_hash) if file_hash is not None else {}
+            project_quantities, fingerprints = self._quantities(pdf_path, keys, report)
+            previous = self._previous_revision(pdf_path, file_hash, keys, fingerprints) if file_hash else None
+
+            report("export", "running")
+            export_dir.mkdir(parents=True, exist_ok=True)
+            json_path = export_dir / "output.json"
+            csv_path = export_dir / "output.csv"
+            pdf_summary_path = export_dir / "summary.pdf"
+            diff_path = export_dir / "diff.json"
+
+            with profile_stage("export.json"):
+                self.json_exporter.export(project_quantities, json_path)
+            if previous is not None:
+                with profile_stage("export.diff"):
+                    previous_quantities, changed_pages = previous
+                    before = self.json_exporter.payload(previous_quantities)
+                    current = self.json_exporter.payload(project_quantities)
+                    self.diff_exporter.export(before, current, diff_path, changed_pages)
+            with profile_stage("export.csv"):
+                self.csv_exporter.export(project_quantities, csv_path)
+            with profile_stage("export.pdf"):
+                self.pdf_report.generate(project_quantities, pdf_summary_path)
+            report("export", "done")
+
+        self.last_profile = profiler
+        profile_path = export_dir / "profile.json"
+        profile_path.write_text(json.dumps(profiler.to_dict(), indent=2))
+        outputs = {"json": json_path, "csv": csv_path, "pdf": pdf_summary_path, "profile": profile_path}
+        if previous is not None:
+            outputs["diff"] = diff_path
+        return outputs
+
+    def _quantities(
+        self, pdf_path: Path, keys: Dict[str, str], report: ProgressCallback
+    ) -> Tuple[ProjectQuantities, Optional[List[str]]]:
+        """The drawing's quantities, and its page fingerprints if they had to be computed."""
+
+        quantities = self._cached("quantities", keys)
+        self.last_changed_pages = None
+        if quantities is not None:
+            LOGGER.info("Reusing cached quantities for %s", pdf_path)
+            self.last_changed_pages = []
+            for stage in STAGES[:-1]:
+                report(stage, "cached")
+            return quantities, None
+
+        rooms = self._cached("rooms", keys)
+        symbols = self._cached("symbols", keys)
+        vector_pages = self._cached_vectors(keys) if rooms is None else None
+        need_vectors = rooms is None and vector_pages is None
+        need_raster = symbols is None
+        for stage, needed in (("load", need_vectors), ("raster", need_raster)):
+            report(stage, "running" if needed else "cached")
+
+        page_keys: List[Dict[str, str]] = []
+        fingerprints: Optional[List[str]] = None
+        rooms_extracted = False
+        if self.result_cache is not None and (need_vectors or need_raster):
+            fingerprints = self.pdf_loader.page_fingerprints(pdf_path)
+            page_keys = self.page_keys(fingerprints)
+        reused = self._reuse_pages(pdf_path, page_keys, need_vectors, need_raster)
+        per_page = self.workers > 1 or self.streaming
+        if reused is not None:
+            # Another revision of this drawing shares pages with this one: only the
+            # changed pages were re-extracted, the rest came from the page cache.
+            page_rooms, page_symbols = reused
+            if need_vectors:
+                rooms = page_rooms
+                rooms_extracted = True
+                self._store("rooms", keys, rooms)
+                report("load", "done")
+                report("geometry", "done")
+            if need_raster:
+                symbols = page_symbols
+                self._store("symbols", keys, symbols)
+                report("raster", "done")
+                report("detect", "done")
+        elif per_page and (need_vectors or need_raster):
+            # Page-wise processing returns rooms rather than raw vectors, so the
+            # vectors stage is not cached in parallel or streaming mode.
+            for stage, needed in (("geometry", need_vectors), ("detect", need_raster)):
+                if needed:
+                    report(stage, "running")
+            result = self._process_pages(pdf_path, with_rooms=need_vectors, with_symbols=need_raster)
+            if need_vectors:
+                rooms = result.rooms
+                rooms_extracted = True
+                self._store("rooms", keys, rooms)
+                report("load", "done")
+                report("geometry", "done")
+            if need_raster:
+                symbols = result.symbols
+                self._store("symbols", keys, symbols)
+                report("raster", "done")
+                report("detect", "done")
+        elif need_raster and not self.vector_matcher.enabled:
+            # Pages are parsed, rendered, detected and OCR'd one detector batch at a
+            # time and their rasters released, so memory does not grow with page count.
+            for stage in ("geometry", "detect") if rooms is None else ("detect",):
+                report(stage, "running")
+            result = process_in_batches(
+                self._page_stages(),
+                pdf_path,
+                with_rooms=rooms is None,
+                vector_pages=vector_pages,
+                keep_vectors=need_vectors,
+            )
+            if need_vectors:
+                vector_pages = result.vector_pages
+                self._store_vectors(keys, vector_pages)
+                report("load", "done")
+            if rooms is None:
+                rooms = result.rooms
+                rooms_extracted = True
+                self._store("rooms", keys, rooms)
+                report("geometry", "done")
+            symbols = result.symbols
+            self._store("symbols", keys, symbols)
+            report("raster", "done")
+            report("detect", "done")
+        elif need_vectors or need_raster:
+            # Vectors only, or vector symbol matching first: only the pages the
+            # matcher does not cover are rasterized, in batches.
+            if vector_pages is None:
+                vector_pages = self.pdf_loader.ingest(pdf_path, rasterize=False).vector_pages
+            if need_vectors:
+                self._store_vectors(keys, vector_pages)
+                report("load", "done")
+            if need_raster:
+                report("detect", "running")
+                symbols = self._match_then_detect(pdf_path, vector_pages)
+                report("raster", "done")
+                self._store("symbols", keys, symbols)
+                report("detect", "done")
+        if not need_raster:
+            report("detect", "cached")
+
+        if rooms is None:
+            report("geometry", "running")
+            rooms = self._extract_rooms(pdf_path, vector_pages)
+            self._store("rooms", keys, rooms)
+            report("geometry", "done")
+        elif not rooms_extracted:
+            report("geometry", "cached")
+        if page_keys and reused is None:
+            self._store_pages(page_keys, rooms if need_vectors else None, symbols if need_raster else None)
+            self.last_changed_pages = list(range(1, len(page_keys) + 1))
+
+        report("calc", "running")
+        quantities = self._calculate(rooms, symbols)
+        self._store("quantities", keys, quantities)
+        report("calc", "done")
+        return quantities, fingerprints
+
+    def _previous_revision(
+        self, pdf_path: Path, file_hash: str, keys: Dict[str, str], fingerprints: Optional[List[str]]
+    ) -> Optional[Tuple[ProjectQuantities, List[int]]]:
+        """Quantities of the revision this drawing follows and the pages that differ from it.
+
+        The previous revision is the cached drawing sharing the most page
+        fingerprints with this one, or, when no page is shared, the last drawing
+        run with the same file name. It is looked up the first time a file is
+        run and kept, so re-running a revision compares it with the same one.
+        Returns ``None`` for a first revision or when its quantities are no
+        longer cached.
+        """
+
+        cache = self.result_cache
+        record = cache.get("revisions", file_hash)
+        if record is None:
+            pages = fingerprints if fingerprints is not None else self.pdf_loader.page_fingerprints(pdf_path)
+            shared = Counter(cache.get("page_revisions", fingerprint) for fingerprint in pages)
+            shared.pop(None, None)
+            shared.pop(file_hash, None)
+            name_key = cache_key("document", pdf_path.name)
+            previous = shared.most_common(1)[0][0] if shared else cache.get("document_revisions", name_key)
+            record = {"pages": pages, "previous": previous if previous != file_hash else None}
+            for fingerprint in pages:
+                cache.put("page_revisions", fingerprint, file_hash)
+            cache.put("document_revisions", name_key, file_hash)
+        record["quantities"] = keys["quantities"]
+        cache.put("revisions", file_hash, record)
+
+        before = cache.get("revisions", record["previous"]) if record["previous"] else None
+        quantities = cache.get("quantities", before["quantities"]) if before is not None else None
+        if quantities is None:
+            return None
+        LOGGER.info("Comparing %s with the previous revision %s", pdf_path, record["previous"][:12])
+        unchanged = set(before["pages"])
+        changed = [number for number, fingerprint in enumerate(record["pages"], start=1) if fingerprint not in unchanged]
+        return quantities, changed
+
+    def _cached(self, stage: str, keys: Dict[str, str]) -> Optional[Any]:
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(stage, keys[stage])
+
+    def _store(self, stage: str, keys: Dict[str, str], value: Any) -> None:
+        if self.result_cache is not None:
+            self.result_cache.put(stage, keys[stage], value)
+
+    def _cached_vectors(self, keys: Dict[str, str]) -> Optional[list]:
+        """Parsed pages from the cache, memory-mapped from a :class:`VectorStore` when numpy is available."""
+
+        if self.result_cache is None or optional_import("numpy") is None:
+            return self._cached("vectors", keys)
+        root = self._vector_store_path(keys)
+        if not VectorStore.exists(root):
+            return None
+        try:
+            return VectorStore.open(root).pages
+        except (OSError, ValueError):
+            LOGGER.warning("Ignoring unreadable vector store %s", root)
+            return None
+
+    def _store_vectors(self, keys: Dict[str, str], vector_pages: List[PDFPageVectorData]) -> None:
+        if self.result_cache is None or optional_import("numpy") is None:
+            self._store("vectors", keys, vector_pages)
+            return
+        VectorStore.write(vector_pages, self._vector_store_path(keys))
+
+    def _vector_store_path(self, keys: Dict[str, str]) -> Path:
+        key = keys["vectors"]
+        return self.result_cache.root / "vector_store" / key[:2] / key
+
+    def _reuse_pages(
+        self, pdf_path: Path, page_keys: List[Dict[str, str]], need_rooms: bool, need_symbols: bool
+    ) -> Optional[Tuple[Optional[List[RoomGeometry]], Optional[List[SymbolDetection]]]]:
+        """Merge cached per-page results with fresh ones for the pages that changed.
+
+        Returns ``None`` when no page is cached (a new drawing or new settings),
+        leaving the whole-document path to do the work.
+        """
+
+        if not page_keys:
+            return None
+        rooms = [self._cached_page("page_rooms", keys["rooms"]) if need_rooms else [] for keys in page_keys]
+        symbols = [self._cached_page("page_symbols", keys["symbols"]) if need_symbols else [] for keys in page_keys]
+        missing = [index for index in range(len(page_keys)) if rooms[index] is None or symbols[index] is None]
+        if len(missing) == len(page_keys):
+            return None
+        self.last_changed_pages = [index + 1 for index in missing]
+        LOGGER.info("Re-extracting %s of %s pages of %s", len(missing), len(page_keys), pdf_path)
+        if missing:
+            with_rooms = any(rooms[index] is None for index in missing)
+            with_symbols = any(symbols[index] is None for index in missing)
+            fresh = self._process_pages(pdf_path, with_rooms, with_symbols, pages=missing)
+            fresh_rooms = _by_page(fresh.rooms or [], missing) if with_rooms else {}
+            fresh_symbols = _by_page(fresh.symbols or [], missing) if with_symbols else {}
+            for index in missing:
+                if rooms[index] is None:
+                    rooms[index] = fresh_rooms[index]
+                    self._store_page("page_rooms", page_keys[index]["rooms"], rooms[index])
+                if symbols[index] is None:
+                    symbols[index] = fresh_symbols[index]
+                    self._store_page("page_symbols", page_keys[index]["symbols"], symbols[index])
+        merged_rooms = [room for page in rooms for room in page] if need_rooms else None
+        merged_symbols = [det for page in symbols for det in page] if need_symbols else None
+        return merged_rooms, merged_symbols
+
+    def _store_pages(
+        self,
+        page_keys: List[Dict[str, str]],
+        rooms: Optional[List[RoomGeometry]],
+        symbols: Optional[List[SymbolDetection]],
+    ) -> None:
+        indices = list(range(len(page_keys)))
+        if rooms is not None:
+            for index, page_rooms in _by_page(rooms, indices).items():
+                self._store_page("page_rooms", page_keys[index]["rooms"], page_rooms)
+        if symbols is not None:
+            for index, page_symbols in _by_page(symbols, indices).items():
+                self._store_page("page_symbols", page_keys[index]["symbols"], page_symbols)
+
+    def _cached_page(self, stage: str, key: str) -> Optional[list]:
+        return self.result_cache.get(stage, key) if self.result_cache is not None else None
+
+    def _store_page(self, stage: str, key: str, value: list) -> None:
+        if self.result_cache is not None:
+            self.result_cache.put(stage, key, value)
+
+    def _extract_rooms(self, pdf_path: Path, vector_pages: List[PDFPageVectorData]) -> List[RoomGeometry]:
+        return extract_rooms(self._page_stages(), vector_pages, pdf_path)
+
+    def _match_then_detect(self, pdf_path: Path, vector_pages: List[PDFPageVectorData]) -> List[SymbolDetection]:
+        stages = self._page_stages()
+        symbols, remaining = match_vector_symbols(stages, vector_pages)
+        LOGGER.info("Vector symbols cover %s of %s pages", len(vector_pages) - len(remaining), len(vector_pages))
+        if remaining:
+            symbols.extend(detect_raster_symbols(stages, pdf_path, remaining))
+        return sort_by_page(symbols)
+
+    def _process_pages(
+        self, pdf_path: Path, with_rooms: bool, with_symbols: bool, pages: Optional[Sequence[int]] = None
+    ) -> PageRangeResult:
+        if self.workers == 1:
+            return process_page_range(
+                self._page_stages(),
+                pdf_path,
+                pages=pages,
+                with_rooms=with_rooms,
+                with_symbols=with_symbols,
+                streaming=self.streaming,
+            )
+        if self._page_pool is None:
+            self._page_pool = ProcessPoolExecutor(max_workers=self.workers)
+        return process_pages_parallel(
+            self._page_pool,
+            self.workers,
+            self._page_stages(),
+            pdf_path,
+            with_rooms=with_rooms,
+            with_symbols=with_symbols,
+            streaming=self.streaming,
+            pages=pages,
+        )
+
+    def _calculate(self, rooms: List[RoomGeometry], symbols: List[SymbolDetection]) -> ProjectQuantities:
+        with profile_stage("calc.hvac") as stage:
+            hvac = self.hvac_calculator.recommendations(rooms)
+            stage.add_items(len(rooms))
+        with profile_stage("calc.plumbing") as stage:
+            plumbing = self.plumbing_calculator.summarize(rooms, symbols)
+            stage.add_items(len(rooms) + len(symbols))
+        with profile_stage("calc.underfloor") as stage:
+            underfloor = self.underfloor_calculator.summarize(rooms)
+            stage.add_items(len(rooms))
+        locations = [RoomLocation(room.room_id, room.page_number, tuple(room.polygon.bounds)) for room in rooms]
+        return ProjectQuantities(hvac=hvac, plumbing=plumbing, underfloor=underfloor, rooms=locations)
+
+
+def _by_page(items: list, indices: Sequence[int]) -> Dict[int, list]:
+    """Group rooms or detections by 0-based page index, with an entry for every index."""
+
+    grouped: Dict[int, list] = defaultdict(list)
+    for item in items:
+        grouped[item.page_number - 1].append(item)
+    return {index: grouped.get(index, []) for index in indices}
 
@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Iterable
+from typing import Iterable, Union
 
 from app.core.models import PlumbingQuantities, RoomGeometry, SymbolDetection
+from app.core.tables import RoomTable, SymbolTable, category_codes
+from app.utils.lazy import optional_import
 
 SYMBOL_TO_POINT = {
     "wc": {"sewage": 1, "cold": 1, "hot": 0},
@@ -20,18 +22,32 @@ PIPE_LENGTH_PER_POINT = 4.0  # meters average run
 
 
 class PlumbingCalculator:
-    def summarize(self, rooms: Iterable[RoomGeometry], symbols: Iterable[SymbolDetection]) -> PlumbingQuantities:
+    def cache_settings(self) -> dict:
+        return {"symbol_to_point": SYMBOL_TO_POINT, "pipe_length_per_point": PIPE_LENGTH_PER_POINT}
+
+    def summarize(
+        self,
+        rooms: Union[Iterable[RoomGeometry], RoomTable],
+        symbols: Union[Iterable[SymbolDetection], SymbolTable],
+    ) -> PlumbingQuantities:
+        if isinstance(symbols, SymbolTable):
+            # Rules apply once per distinct label, scaled by how often it was detected.
+            labels, codes = category_codes(symbols.labels)
+            counts = optional_import("numpy").bincount(codes, minlength=len(labels)).tolist()
+        else:
+            labels, counts = [symbol.label for symbol in symbols], None
         counters = Counter()
         floor_drains = 0
-        for symbol in symbols:
-            rule = SYMBOL_TO_POINT.get(symbol.label.lower())
+        for index, label in enumerate(labels):
+            rule = SYMBOL_TO_POINT.get(label.lower())
             if not rule:
                 continue
+            count = counts[index] if counts is not None else 1
             for key, value in rule.items():
                 if key == "floor_drain":
-                    floor_drains += value
+                    floor_drains += value * count
                 else:
-                    counters[key] += value
+                    counters[key] += value * count
         total_points = counters["hot"] + counters["cold"] + counters["sewage"]
         estimated_length = total_points * PIPE_LENGTH_PER_POINT
         return PlumbingQuantities(
@@ -0,0 +1,201 @@
+"""Per-stage timing instrumentation for pipeline runs.
+
+Components wrap their work in :func:`profile_stage`; the samples go to the
+:class:`StageProfiler` activated for the current run (a context variable, so
+concurrent runs in threads stay separate) and cost nothing when none is.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.utils.lazy import optional_import
+
+try:  # pragma: no cover - not available on Windows
+    import resource
+except Exception:  # pragma: no cover
+    resource = None  # type: ignore
+
+LOGGER = logging.getLogger(__name__)
+
+_active: contextvars.ContextVar[Optional["StageProfiler"]] = contextvars.ContextVar("mep_profiler", default=None)
+
+
+@dataclass
+class StageTiming:
+    """Totals for one stage: wall and CPU seconds, growth of peak RSS, items handled and calls."""
+
+    stage: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta_kb: int = 0
+    items: int = 0
+    calls: int = 0
+
+    def merge(self, other: "StageTiming") -> None:
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+        self.peak_rss_delta_kb += other.peak_rss_delta_kb
+        self.items += other.items
+        self.calls += other.calls
+
+
+class StageSample:
+    """Handle yielded by :func:`profile_stage`; call :meth:`add_items` with the amount of work done."""
+
+    __slots__ = ("items",)
+
+    def __init__(self) -> None:
+        self.items = 0
+
+    def add_items(self, count: int) -> None:
+        self.items += count
+
+
+class StageProfiler:
+    """Collects :class:`StageTiming` totals in first-seen stage order.
+
+    CPU time is this process' time; stages run in page worker processes are
+    merged in via :meth:`merge` with their own CPU time, so in parallel mode
+    totals exceed the run's wall clock.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageTiming] = {}
+
+    @contextmanager
+    def activate(self) -> Iterator["StageProfiler"]:
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageSample]:
+        sample = StageSample()
+        rss_before = _peak_rss_kb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield sample
+        finally:
+            timing = self.stages.setdefault(name, StageTiming(name))
+            timing.wall_seconds += time.perf_counter() - wall
+            timing.cpu_seconds += time.process_time() - cpu
+            timing.peak_rss_delta_kb += _peak_rss_kb() - rss_before
+            timing.items += sample.items
+            timing.calls += 1
+
+    def merge(self, timings: List[StageTiming]) -> None:
+        for timing in timings:
+            self.stages.setdefault(timing.stage, StageTiming(timing.stage)).merge(timing)
+
+    def timings(self) -> List[StageTiming]:
+        return list(self.stages.values())
+
+    def to_dict(self) -> dict:
+        return {"stages": [asdict(timing) for timing in self.timings()]}
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<20} {'wall s':>9} {'cpu s':>9} {'peak rss +MB':>13} {'items':>8} {'calls':>6}"]
+        for t in self.timings():
+            lines.append(
+                f"{t.stage:<20} {t.wall_seconds:>9.3f} {t.cpu_seconds:>9.3f} "
+                f"{t.peak_rss_delta_kb / 1024:>13.1f} {t.items:>8} {t.calls:>6}"
+            )
+        return "\n".join(lines)
+
+
+def current_profiler() -> Optional[StageProfiler]:
+    return _active.get()
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[StageSample]:
+    """Time the enclosed block as ``name`` in the active profiler, if any."""
+
+    profiler = _active.get()
+    if profiler is None:
+        yield StageSample()
+        return
+    with profiler.stage(name) as sample:
+        yield sample
+
+
+def _peak_rss_kb() -> int:
+    if resource is None:  # pragma: no cover
+        return 0
+    # ru_maxrss is in KiB on Linux (bytes on macOS; the deltas are then scaled accordingly).
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+@contextmanager
+def code_profile(out_path: Optional[Path], tool: str = "cprofile") -> Iterator[None]:
+    """Dump a cProfile (``.prof``) or pyinstrument (``.html``) profile of the block to ``out_path``."""
+
+    if out_path is None:
+        yield
+        return
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pyinstrument = optional_import("pyinstrument") if tool == "pyinstrument" else None
+    if tool == "pyinstrument" and pyinstrument is None:
+        LOGGER.warning("pyinstrument is not installed; falling back to cProfile")
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            out_path.with_suffix(".html").write_text(profiler.output_html())
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(out_path.with_suffix(".prof")))
+
+
+class StageMetrics:
+    """Process-wide stage totals across runs, rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.stages: Dict[str, StageTiming] = {}
+
+    def observe(self, profile: dict) -> None:
+        with self._lock:
+            self.runs += 1
+            for entry in profile.get("stages", []):
+                timing = StageTiming(**entry)
+                self.stages.setdefault(timing.stage, StageTiming(timing.stage)).merge(timing)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP mep_pipeline_runs_total Pipeline runs observed by this process.",
+                "# TYPE mep_pipeline_runs_total counter",
+                f"mep_pipeline_runs_total {self.runs}",
+            ]
+            for metric, attribute, help_text in (
+                ("mep_stage_wall_seconds_total", "wall_seconds", "Wall-clock seconds spent per stage."),
+                ("mep_stage_cpu_seconds_total", "cpu_seconds", "CPU seconds spent per stage."),
+                ("mep_stage_items_total", "items", "Items (pages, rooms, symbols...) handled per stage."),
+                ("mep_stage_calls_total", "calls", "Times each stage ran."),
+            ):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for timing in self.stages.values():
+                    lines.append(f'{metric}{{stage="{timing.stage}"}} {getattr(timing, attribute)}')
+        return "\n".join(lines) + "\n"
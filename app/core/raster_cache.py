@@ -0,0 +1,123 @@
+"""Size-bounded on-disk cache of rendered pages, shared between worker processes."""
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from app.utils.file_utils import ensure_dir
+from app.utils.lazy import optional_import
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+class RasterCache:
+    """PNG renders under ``<root>/<file_hash[:2]>/<file_hash>_p<page>_<dpi>dpi.png``.
+
+    Entries are keyed by the PDF's content hash, so different uploads that share
+    a file name never collide. Writes go to a temp file that is renamed into
+    place, so readers never see partial PNGs. A hit refreshes the entry's mtime.
+
+    Writes keep a running estimate of the cache size instead of rescanning the
+    directory each time. Once the estimate exceeds ``max_bytes``, or this
+    process has written ``scan_every`` bytes since the last scan (other workers
+    write too), the least recently used entries are evicted until the cache fits.
+    Eviction holds an exclusive lock on ``<root>/.lock`` (where ``fcntl``
+    exists) so concurrent workers do not evict twice, and never removes the
+    entry just written.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES, scan_every: Optional[int] = None) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.scan_every = scan_every if scan_every is not None else max(1, max_bytes // 10)
+        self._size: Optional[int] = None  # estimated total, known after the first scan
+        self._written = 0
+        ensure_dir(self.root)
+
+    def path(self, file_hash: str, page_number: int, dpi: int) -> Path:
+        return self.root / file_hash[:2] / f"{file_hash}_p{page_number}_{dpi}dpi.png"
+
+    def get(self, file_hash: str, page_number: int, dpi: int) -> Optional[Path]:
+        path = self.path(file_hash, page_number, dpi)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        LOGGER.debug("Raster cache hit for page %s of %s at %s dpi", page_number, file_hash[:12], dpi)
+        return path
+
+    def put(self, file_hash: str, page_number: int, dpi: int, write: Callable[[Path], None]) -> Path:
+        """Store a render written by ``write(path)`` (e.g. ``pixmap.save``) and return its path."""
+
+        path = self.path(file_hash, page_number, dpi)
+        ensure_dir(path.parent)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".png.tmp")
+        os.close(fd)
+        try:
+            write(Path(tmp_name))
+            os.replace(tmp_name, path)
+        except Exception:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        written = path.stat().st_size
+        self._written += written
+        if self._size is not None:
+            self._size += written
+        if self._size is None or self._size > self.max_bytes or self._written >= self.scan_every:
+            self.evict(keep=path)
+        return path
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """Delete least recently used renders (except ``keep``) until the cache fits ``max_bytes``.
+
+        Returns the bytes freed.
+        """
+
+        with self._lock():
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # evicted by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, entry in sorted(entries, key=lambda item: item[0]):
+                if total - freed <= self.max_bytes:
+                    break
+                if keep is not None and Path(entry.path) == keep:
+                    continue
+                Path(entry.path).unlink(missing_ok=True)
+                freed += size
+        self._size, self._written = total - freed, 0
+        if freed:
+            LOGGER.info("Evicted %.1f MB of cached page renders from %s", freed / 2**20, self.root)
+        return freed
+
+    def _entries(self) -> Iterator[os.DirEntry]:
+        for shard in os.scandir(self.root):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.name.endswith(".png"))
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        fcntl = optional_import("fcntl")
+        if fcntl is None:
+            yield
+            return
+        with open(self.root / ".lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,64 @@
+"""Content-addressed on-disk cache for pipeline stage outputs."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from app.utils.file_utils import ensure_dir
+
+LOGGER = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """Derive a stable key from file hashes, upstream keys and settings."""
+
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Stores pickled stage results under ``<root>/<stage>/<key[:2]>/<key>.pkl``.
+
+    Keys are content addresses (see :func:`cache_key`), so entries never need
+    invalidation: a changed input or setting simply produces a different key.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        ensure_dir(self.root)
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / stage / key[:2] / f"{key}.pkl"
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        path = self._path(stage, key)
+        if not path.exists():
+            return None
+        try:
+            with path.open("rb") as handle:
+                value = pickle.load(handle)
+        except Exception:  # corrupt or incompatible entry; recompute
+            LOGGER.warning("Discarding unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            return None
+        LOGGER.debug("Cache hit for %s/%s", stage, key)
+        return value
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        path = self._path(stage, key)
+        ensure_dir(path.parent)
+        # Write to a temp file and rename so concurrent readers never see partial pickles.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, path)
+        except Exception:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
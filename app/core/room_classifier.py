@@ -17,6 +17,9 @@ class RoomClassifier:
         "store": "storage",
     }
 
+    def cache_settings(self) -> dict:
+        return {"keywords": self.KEYWORD_TO_CLASS}
+
     def normalize(self, rooms: Iterable[RoomGeometry]) -> Iterable[RoomGeometry]:
         for room in rooms:
             label = (room.label or "").lower()
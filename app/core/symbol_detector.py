@@ -3,41 +3,256 @@ from __future__ import annotations
 
 import json
 import logging
+import time
+from dataclasses import asdict, dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List, Optional
-
-try:  # pragma: no cover
-    from ultralytics import YOLO
-except Exception:  # pragma: no cover
-    YOLO = None  # type: ignore
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from app.core.models import PageImage, SymbolDetection
+from app.core.profiling import profile_stage
+from app.core.tables import SymbolTable
+from app.utils.file_utils import hash_file
+from app.utils.lazy import is_installed, optional_import
 
 LOGGER = logging.getLogger(__name__)
 
+# Models loaded in this process for unpickled detectors, keyed by weights path, so
+# page workers load each model once and reuse it across tasks.
+_MODEL_CACHE: Dict[str, Any] = {}
+
+
+def _load_model(model_path: Optional[Path], shared: bool = False) -> Any:
+    if not (model_path and model_path.exists()):
+        return None
+    ultralytics = optional_import("ultralytics")
+    if ultralytics is None:
+        return None
+    key = str(model_path)
+    if not shared:
+        return ultralytics.YOLO(key)
+    if key not in _MODEL_CACHE:
+        _MODEL_CACHE[key] = ultralytics.YOLO(key)
+    return _MODEL_CACHE[key]
+
+
+@dataclass
+class DetectionStats:
+    """Throughput of the most recent :meth:`SymbolDetector.detect` call."""
+
+    pages: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
 
 class SymbolDetector:
-    def __init__(self, model_path: Optional[Path] = None, class_names: Optional[List[str]] = None) -> None:
+    def __init__(
+        self,
+        model_path: Optional[Path] = None,
+        class_names: Optional[List[str]] = None,
+        batch_size: int = 8,
+        imgsz: Optional[int] = None,
+        half: bool = False,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 128,
+        nms_iou: float = 0.5,
+        coordinate_dpi: Optional[int] = None,
+    ) -> None:
         self.model_path = model_path
         self.class_names = class_names or []
-        self._model = YOLO(str(model_path)) if (YOLO and model_path and model_path.exists()) else None
+        self.batch_size = max(1, batch_size)
+        # Fixed inference size; None keeps the model's training size.
+        self.imgsz = imgsz
+        # FP16 only takes effect on CUDA devices; ultralytics falls back to FP32 on CPU.
+        self.half = half
+        # Sliding-window mode for large sheets: tiles of tile_size px, merged with cross-tile NMS.
+        # Keep tile_overlap above the largest symbol size so each symbol fits whole in some tile.
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.nms_iou = nms_iou
+        # Boxes from pages rendered at another DPI are rescaled to this DPI's pixel grid,
+        # so detections share one coordinate system when pages are rendered at different DPIs.
+        self.coordinate_dpi = coordinate_dpi
+        self.last_stats = DetectionStats()
+        # The weights (and ultralytics/torch) load on first detection or warmup().
+        self._model: Any = None
+        self._model_loaded = False
+        self._shared_model = False
+        self._weights_hash: Optional[str] = None
+
+    def __getstate__(self) -> dict:
+        # Ship settings only; the receiving process loads (or reuses) the weights itself.
+        state = self.__dict__.copy()
+        state["_model"] = None
+        state["_model_loaded"] = False
+        state["_shared_model"] = True
+        return state
+
+    @property
+    def model(self) -> Any:
+        """The YOLO model, loaded on first access; ``None`` if it is unavailable."""
+
+        if self._model is None and not self._model_loaded:
+            self._model = _load_model(self.model_path, shared=self._shared_model)
+            self._model_loaded = True
+        return self._model
+
+    def warmup(self) -> bool:
+        """Load the weights and run one tiny inference so the first request pays nothing.
+
+        Returns whether a model is available.
+        """
+
+        model = self.model
+        if model is None:
+            return False
+        np = optional_import("numpy")
+        if np is not None:
+            model.predict([np.zeros((64, 64, 3), dtype=np.uint8)], verbose=False, **self._predict_options())
+        return True
+
+    def cache_settings(self) -> dict:
+        if self._weights_hash is None and self.model_path and self.model_path.exists():
+            self._weights_hash = hash_file(self.model_path)
+        return {
+            "weights": self._weights_hash,
+            "model_loaded": self._model_available(),
+            "class_names": self.class_names,
+            "imgsz": self.imgsz,
+            "half": self.half,
+            "tile_size": self.tile_size,
+            "tile_overlap": self.tile_overlap if self.tile_size else None,
+            "nms_iou": self.nms_iou if self.tile_size else None,
+            "coordinate_dpi": self.coordinate_dpi,
+        }
+
+    def _model_available(self) -> bool:
+        # Answered without importing ultralytics unless the model is already loaded.
+        if self._model is not None or self._model_loaded:
+            return self._model is not None
+        return bool(self.model_path and self.model_path.exists() and is_installed("ultralytics"))
 
     def detect(self, images: Iterable[PageImage]) -> List[SymbolDetection]:
+        scales: Dict[int, float] = {}
+
+        def sources() -> Iterator[Tuple[int, Any]]:
+            for image in images:
+                if self.coordinate_dpi and image.dpi != self.coordinate_dpi:
+                    scales[image.page_number] = self.coordinate_dpi / image.dpi
+                yield image.page_number, _image_source(image, tiled=bool(self.tile_size))
+
+        detections = self.detect_arrays(sources())
+        if not scales:
+            return detections
+        return [_rescaled(det, scales[det.page_number]) if det.page_number in scales else det for det in detections]
+
+    def detect_arrays(self, pages: Iterable[Tuple[int, "Any"]]) -> List[SymbolDetection]:
+        """Detect on in-memory ``(page_number, HxWx3 BGR array)`` pairs without touching disk.
+
+        In tiled mode a source may also be a :class:`PageImage` with ``render_clip``,
+        whose tiles are then rendered one at a time.
+        """
+
+        with profile_stage("detect") as stage:
+            if self.tile_size:
+                detections = self._detect_tiled(pages)
+            else:
+                detections = self._detect_sources(pages)
+            stage.add_items(self.last_stats.pages)
+        return detections
+
+    def _detect_sources(self, sources: Iterable[Tuple[int, Any]]) -> List[SymbolDetection]:
+        return self._run_batches((page_number, source, (0, 0)) for page_number, source in sources)
+
+    def _detect_tiled(self, pages: Iterable[Tuple[int, Any]]) -> List[SymbolDetection]:
+        """Infer overlapping tiles in batches and merge them back into page coordinates.
+
+        Pages loaded with ``PDFLoader(tiled=True)`` are never rasterized whole:
+        each tile is rendered from the PDF when its batch is inferred, so at most
+        one batch of tiles is in memory whatever the sheet size. Arrays and PNGs
+        are tiled as views into the loaded page.
+        """
+
+        np = optional_import("numpy")
+        if np is None:
+            raise RuntimeError("Tiled detection requires numpy")
+        from app.utils.image_utils import non_max_suppression
+
+        raw = self._run_batches(self._tiles(pages), count_tiles=True)
+        merged: List[SymbolDetection] = []
+        page_order: List[int] = []
+        by_page: dict = {}
+        for det in raw:
+            if det.page_number not in by_page:
+                page_order.append(det.page_number)
+                by_page[det.page_number] = []
+            by_page[det.page_number].append(det)
+        for page_number in page_order:
+            page_dets = by_page[page_number]
+            boxes = np.asarray([det.bbox for det in page_dets], dtype=np.float64)
+            scores = np.asarray([det.confidence for det in page_dets], dtype=np.float64)
+            labels = sorted({det.label for det in page_dets})
+            classes = np.asarray([labels.index(det.label) for det in page_dets])
+            keep = non_max_suppression(boxes, scores, classes, self.nms_iou)
+            merged.extend(page_dets[i] for i in keep.tolist())
+        LOGGER.info("Merged %s tile detections into %s after cross-tile NMS", len(raw), len(merged))
+        return merged
+
+    def _tiles(self, pages: Iterable[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, Tuple[int, int]]]:
+        from app.utils.image_utils import iter_tiles
+
+        for page_number, source in pages:
+            width, height, crop = _tile_source(source)
+            self.last_stats.pages += 1
+            for x0, y0, x1, y1 in iter_tiles(width, height, self.tile_size, self.tile_overlap):
+                # Cropped (or rendered) as _run_batches pulls it: one inference batch of tiles is alive.
+                yield page_number, crop(x0, y0, x1, y1), (x0, y0)
+
+    def _run_batches(
+        self, items: Iterable[Tuple[int, Any, Tuple[int, int]]], count_tiles: bool = False
+    ) -> List[SymbolDetection]:
         detections: List[SymbolDetection] = []
-        for image in images:
-            if not self._model:
-                LOGGER.warning("YOLO model unavailable; skipping detection")
-                continue
-            results = self._model(str(image.image_path))
-            for res in results:
+        self.last_stats = stats = DetectionStats()
+        model = self.model
+        if not model:
+            LOGGER.warning("YOLO model unavailable; skipping detection")
+            return detections
+
+        started = time.perf_counter()
+        for batch in _batched(items, self.batch_size):
+            results = model.predict([source for _, source, _ in batch], verbose=False, **self._predict_options())
+            for (page_number, _, (dx, dy)), res in zip(batch, results):
                 boxes = res.boxes.xyxy.tolist()
                 scores = res.boxes.conf.tolist()
                 classes = res.boxes.cls.tolist()
                 for bbox, score, cls_idx in zip(boxes, scores, classes):
                     label = self._resolve_label(int(cls_idx))
-                    detections.append(SymbolDetection(label, float(score), tuple(bbox), image.page_number))
+                    page_bbox = (bbox[0] + dx, bbox[1] + dy, bbox[2] + dx, bbox[3] + dy)
+                    detections.append(SymbolDetection(label, float(score), page_bbox, page_number))
+            if not count_tiles:
+                stats.pages += len(batch)
+            stats.batches += 1
+        stats.seconds = time.perf_counter() - started
+        LOGGER.info(
+            "Detected %s symbols on %s pages in %.2fs (%.2f pages/s, batch size %s)",
+            len(detections),
+            stats.pages,
+            stats.seconds,
+            stats.pages_per_second,
+            self.batch_size,
+        )
         return detections
 
+    def _predict_options(self) -> dict:
+        options: dict = {"half": self.half}
+        if self.imgsz:
+            options["imgsz"] = self.imgsz
+        return options
+
     def _resolve_label(self, class_index: int) -> str:
         if not self.class_names:
             return f"class_{class_index}"
@@ -46,7 +261,52 @@ class SymbolDetector:
         return self.class_names[-1]
 
     @staticmethod
-    def save_detections(detections: List[SymbolDetection], out_path: Path) -> None:
-        payload = [det.__dict__ for det in detections]
+    def save_detections(detections: Union[List[SymbolDetection], SymbolTable], out_path: Path) -> None:
+        payload = detections.to_dicts() if isinstance(detections, SymbolTable) else [asdict(det) for det in detections]
         out_path.write_text(json.dumps(payload, indent=2))
 
+
+def _image_source(image: PageImage, tiled: bool = False) -> Any:
+    """In-memory pixels (as BGR) when the page carries them, otherwise its PNG path.
+
+    Pages rendered on demand are passed on as they are for tiling, or rendered
+    whole for untiled detection.
+    """
+
+    if image.render_clip is not None and tiled:
+        return image
+    if image.render_clip is not None or image.pixels is not None:
+        from app.utils.image_utils import to_bgr
+
+        if image.pixels is None:
+            return to_bgr(image.render_clip((0, 0, image.width, image.height)))
+        return to_bgr(image.pixels)
+    return str(image.image_path)
+
+
+def _tile_source(source: Any) -> Tuple[int, int, Callable[[int, int, int, int], Any]]:
+    """Width, height and a BGR crop function of a page to tile."""
+
+    import numpy as np
+
+    from app.utils.image_utils import load_image, to_bgr
+
+    if isinstance(source, PageImage):
+        return source.width, source.height, lambda x0, y0, x1, y1: to_bgr(source.render_clip((x0, y0, x1, y1)))
+    image = source if isinstance(source, np.ndarray) else load_image(Path(source))
+    height, width = image.shape[:2]
+    return width, height, lambda x0, y0, x1, y1: image[y0:y1, x0:x1]
+
+
+def _rescaled(det: SymbolDetection, scale: float) -> SymbolDetection:
+    bbox = tuple(coord * scale for coord in det.bbox)
+    return SymbolDetection(det.label, det.confidence, bbox, det.page_number)
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[Sequence[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
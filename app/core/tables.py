@@ -0,0 +1,163 @@
+"""Columnar containers for large room and symbol sets.
+
+One NumPy array per field instead of one object per room or detection:
+multi-building projects produce millions of them, and the calculators and
+detection export accept these tables directly. Polygons are not kept; rooms
+carry their bounding box. numpy is imported on first use.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from app.core.models import RoomGeometry, SymbolDetection
+from app.utils.lazy import optional_import
+
+# Fixed-width unicode columns are sized to their longest value by numpy.
+_EMPTY_STR = "<U1"
+
+
+def _numpy():
+    np = optional_import("numpy")
+    if np is None:
+        raise RuntimeError("numpy is required for room and symbol tables")
+    return np
+
+
+def _strings(values: Sequence[str]) -> "Any":
+    np = _numpy()
+    return np.array(values, dtype=str) if len(values) else np.empty(0, dtype=_EMPTY_STR)
+
+
+def category_codes(column: "Any") -> "Tuple[List[str], Any]":
+    """Distinct values of a string column and each row's index into them.
+
+    Lets per-category rules run once per distinct value and be gathered back
+    with ``values[codes]`` instead of once per row.
+    """
+
+    np = _numpy()
+    uniques, codes = np.unique(column, return_inverse=True)
+    return uniques.tolist(), codes.reshape(-1)
+
+
+def sequential_sum(values: "Any") -> float:
+    """Left-to-right float sum, matching a Python ``total += value`` loop bit for bit.
+
+    ``ndarray.sum`` uses pairwise summation, which can differ in the last place.
+    """
+
+    return float(_numpy().add.accumulate(values)[-1]) if len(values) else 0.0
+
+
+def _bboxes(values: Sequence[Sequence[float]]) -> "Any":
+    np = _numpy()
+    return np.array(values, dtype=np.float64).reshape(len(values), 4)
+
+
+@dataclass
+class RoomTable:
+    """Rooms as parallel arrays; ``labels`` is ``""`` for unlabelled rooms.
+
+    ``bboxes`` rows are ``(x0, top, x1, bottom)`` in PDF points.
+    """
+
+    room_ids: "Any"
+    labels: "Any"
+    categories: "Any"
+    areas: "Any"
+    bboxes: "Any"
+    page_numbers: "Any"
+
+    def __len__(self) -> int:
+        return len(self.room_ids)
+
+    @classmethod
+    def from_rooms(cls, rooms: Iterable[RoomGeometry]) -> "RoomTable":
+        rooms = list(rooms)
+        np = _numpy()
+        return cls(
+            room_ids=_strings([room.room_id for room in rooms]),
+            labels=_strings([room.label or "" for room in rooms]),
+            categories=_strings([room.attributes.get("category", "other") for room in rooms]),
+            areas=np.array([room.area_sqm for room in rooms], dtype=np.float64),
+            bboxes=_bboxes([room.polygon.bounds for room in rooms]),
+            page_numbers=np.array([room.page_number for room in rooms], dtype=np.int32),
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["RoomTable"]) -> "RoomTable":
+        np = _numpy()
+        if not tables:
+            return cls.from_rooms([])
+        return cls(
+            room_ids=np.concatenate([table.room_ids for table in tables]),
+            labels=np.concatenate([table.labels for table in tables]),
+            categories=np.concatenate([table.categories for table in tables]),
+            areas=np.concatenate([table.areas for table in tables]),
+            bboxes=np.concatenate([table.bboxes for table in tables]),
+            page_numbers=np.concatenate([table.page_numbers for table in tables]),
+        )
+
+    def rows(self) -> Iterator[tuple]:
+        """``(room_id, label, category, area_sqm, page_number)`` per room, as Python scalars."""
+
+        return zip(
+            self.room_ids.tolist(),
+            self.labels.tolist(),
+            self.categories.tolist(),
+            self.areas.tolist(),
+            self.page_numbers.tolist(),
+        )
+
+
+@dataclass
+class SymbolTable:
+    """Detections as parallel arrays; ``bboxes`` rows are ``(xmin, ymin, xmax, ymax)``."""
+
+    labels: "Any"
+    confidences: "Any"
+    bboxes: "Any"
+    page_numbers: "Any"
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def from_detections(cls, detections: Iterable[SymbolDetection]) -> "SymbolTable":
+        detections = list(detections)
+        np = _numpy()
+        return cls(
+            labels=_strings([det.label for det in detections]),
+            confidences=np.array([det.confidence for det in detections], dtype=np.float64),
+            bboxes=_bboxes([det.bbox for det in detections]),
+            page_numbers=np.array([det.page_number for det in detections], dtype=np.int32),
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["SymbolTable"]) -> "SymbolTable":
+        np = _numpy()
+        if not tables:
+            return cls.from_detections([])
+        return cls(
+            labels=np.concatenate([table.labels for table in tables]),
+            confidences=np.concatenate([table.confidences for table in tables]),
+            bboxes=np.concatenate([table.bboxes for table in tables]),
+            page_numbers=np.concatenate([table.page_numbers for table in tables]),
+        )
+
+    def detections(self) -> List[SymbolDetection]:
+        return [
+            SymbolDetection(label, confidence, tuple(bbox), page_number)
+            for label, confidence, bbox, page_number in zip(
+                self.labels.tolist(), self.confidences.tolist(), self.bboxes.tolist(), self.page_numbers.tolist()
+            )
+        ]
+
+    def to_dicts(self) -> List[dict]:
+        return [
+            {"label": label, "confidence": confidence, "bbox": bbox, "page_number": page_number}
+            for label, confidence, bbox, page_number in zip(
+                self.labels.tolist(), self.confidences.tolist(), self.bboxes.tolist(), self.page_numbers.tolist()
+            )
+        ]
@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 from math import ceil
-from typing import Iterable
+from typing import Iterable, Union
 
 from app.core.area_calculator import AreaCalculator
 from app.core.models import RoomGeometry, UnderfloorHeatingQuantities
+from app.core.tables import RoomTable
 
 PIPE_DENSITY_PER_SQM = 6.0  # meters of pipe per sqm
 MAX_AREA_PER_CIRCUIT = 20.0
@@ -15,7 +16,14 @@ class UnderfloorCalculator:
     def __init__(self) -> None:
         self.area_calculator = AreaCalculator()
 
-    def summarize(self, rooms: Iterable[RoomGeometry]) -> UnderfloorHeatingQuantities:
+    def cache_settings(self) -> dict:
+        return {
+            "pipe_density_per_sqm": PIPE_DENSITY_PER_SQM,
+            "max_area_per_circuit": MAX_AREA_PER_CIRCUIT,
+            "restricted_keywords": sorted(self.area_calculator.RESTRICTED_KEYWORDS),
+        }
+
+    def summarize(self, rooms: Union[Iterable[RoomGeometry], RoomTable]) -> UnderfloorHeatingQuantities:
         summary = self.area_calculator.summarize(rooms)
         heated = summary.useful_area
         restricted = summary.restricted_area
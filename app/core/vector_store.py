@@ -0,0 +1,206 @@
+"""Columnar, memory-mappable cache of parsed page vectors.
+
+pdfplumber's object tree is large and slow to pickle or reload. A vector
+store keeps only what room extraction reads, as a few ``.npy`` columns for
+the whole document plus a JSON manifest of each page's row ranges:
+
+* ``rects.npy``: ``(x0, top, x1, bottom)`` rows (:data:`RECT_DTYPE`);
+* ``lines_points.npy`` / ``curves_points.npy``: the points of every path as
+  ``(N, 2)`` float64, with ``*_offsets.npy`` marking where each path starts;
+* ``words.npy``: word bboxes and text.
+
+:meth:`VectorStore.open` maps the columns read-only, so pages are views into
+the files and nothing is read until geometry extraction touches it.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from app.core.geometry_extractor import RECT_DTYPE
+from app.utils.file_utils import ensure_dir
+from app.utils.lazy import optional_import
+
+VERSION = 1
+MANIFEST = "manifest.json"
+PATH_KINDS = (("lines", ("line", "lines")), ("curves", ("curve", "curves")))
+WORD_FIELDS = ("x0", "top", "x1", "bottom")
+
+
+def _numpy():
+    np = optional_import("numpy")
+    if np is None:
+        raise RuntimeError("numpy is required for the vector store")
+    return np
+
+
+class PathArray:
+    """A page's lines or curves: one ``(N, 2)`` point array and each path's ``[start, stop)`` rows.
+
+    Iterating yields pdfplumber-like ``{"pts": ..., "object_type": ...}`` dicts
+    whose points are views; :meth:`segments` reads the arrays directly.
+    """
+
+    def __init__(self, points: Any, offsets: Any, object_type: str) -> None:
+        self.points = points
+        self.offsets = offsets
+        self.object_type = object_type
+
+    def __len__(self) -> int:
+        return max(0, len(self.offsets) - 1)
+
+    def __iter__(self) -> Iterator[dict]:
+        bounds = self.offsets.tolist()
+        for start, stop in zip(bounds, bounds[1:]):
+            yield {"pts": self.points[start:stop], "object_type": self.object_type}
+
+    def segments(self) -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """Consecutive point pairs within each path, skipping zero-length ones."""
+
+        np = _numpy()
+        points = np.asarray(self.points, dtype=np.float64)
+        if len(points) < 2:
+            return []
+        keep = np.ones(len(points) - 1, dtype=bool)
+        # The pair joining the last point of one path to the first of the next is not a segment.
+        keep[np.asarray(self.offsets[1:-1]) - 1] = False
+        starts, ends = points[:-1][keep], points[1:][keep]
+        keep = (starts != ends).any(axis=1)
+        return list(zip(map(tuple, starts[keep].tolist()), map(tuple, ends[keep].tolist())))
+
+
+class MappedVectorPage:
+    """One page of a :class:`VectorStore`, usable wherever a ``PDFPageVectorData`` is.
+
+    ``shapes`` holds ``"rects"`` (a :data:`RECT_DTYPE` array), ``"lines"`` and
+    ``"curves"`` (:class:`PathArray`); ``text_items`` builds word dicts on access.
+    """
+
+    def __init__(self, page_number: int, shapes: Dict[str, Any], words: Any) -> None:
+        self.page_number = page_number
+        self.shapes = shapes
+        self.words = words
+
+    @property
+    def text_items(self) -> List[dict]:
+        names = (*WORD_FIELDS, "text")
+        return [dict(zip(names, row)) for row in self.words.tolist()]
+
+
+class VectorStore:
+    """A document's pages mapped from ``root``; see the module docstring for the layout."""
+
+    def __init__(self, root: Path, pages: List[MappedVectorPage]) -> None:
+        self.root = root
+        self.pages = pages
+
+    @staticmethod
+    def exists(root: Path) -> bool:
+        return (root / MANIFEST).exists()
+
+    @classmethod
+    def open(cls, root: Path) -> "VectorStore":
+        """Map a store written by :meth:`write` read-only."""
+
+        np = _numpy()
+        manifest = json.loads((root / MANIFEST).read_text())
+        if manifest.get("version") != VERSION:
+            raise ValueError(f"Unsupported vector store version in {root}")
+
+        def column(name: str):
+            return np.load(root / f"{name}.npy", mmap_mode="r")
+
+        rects, words = column("rects"), column("words")
+        paths = {kind: (column(f"{kind}_points"), column(f"{kind}_offsets")) for kind, _ in PATH_KINDS}
+        pages = []
+        for entry in manifest["pages"]:
+            shapes: Dict[str, Any] = {"rects": rects[slice(*entry["rects"])]}
+            for kind, (points, offsets) in paths.items():
+                first, last = entry[kind]
+                bounds = offsets[first:last + 1]
+                base = int(bounds[0])
+                shapes[kind] = PathArray(points[base:int(bounds[-1])], bounds - base, kind[:-1])
+            pages.append(MappedVectorPage(entry["page_number"], shapes, words[slice(*entry["words"])]))
+        return cls(root, pages)
+
+    @classmethod
+    def write(cls, vector_pages: Iterable[Any], root: Path) -> Path:
+        """Write pages (``PDFPageVectorData``, sample dicts or mapped pages) to ``root``.
+
+        The store is built in a temporary directory next to ``root`` and moved
+        into place, so a concurrent :meth:`open` sees either no store or a
+        complete one.
+        """
+
+        np = _numpy()
+        rects: List[Tuple[float, float, float, float]] = []
+        words: List[Tuple[float, float, float, float, str]] = []
+        points: Dict[str, List[Sequence[float]]] = {kind: [] for kind, _ in PATH_KINDS}
+        offsets: Dict[str, List[int]] = {kind: [0] for kind, _ in PATH_KINDS}
+        pages = []
+        for page in vector_pages:
+            shapes = _get(page, "shapes", {}) or {}
+            entry: Dict[str, Any] = {"page_number": _get(page, "page_number", 0)}
+            start = len(rects)
+            rects.extend(_rect_rows(_first(shapes, ("rect", "rects"))))
+            entry["rects"] = [start, len(rects)]
+            for kind, keys in PATH_KINDS:
+                start = len(offsets[kind]) - 1
+                for obj in _first(shapes, keys):
+                    pts = obj.get("pts")
+                    if pts is None or not len(pts):
+                        x0, top, x1, bottom = obj["x0"], obj["top"], obj["x1"], obj["bottom"]
+                        pts = [(x0, top), (x1, top), (x1, bottom), (x0, bottom)]
+                    points[kind].extend((float(x), float(y)) for x, y in pts)
+                    offsets[kind].append(len(points[kind]))
+                entry[kind] = [start, len(offsets[kind]) - 1]
+            start = len(words)
+            for item in _get(page, "text_items", []) or []:
+                if all(item.get(name) is not None for name in WORD_FIELDS):
+                    words.append((*(float(item[name]) for name in WORD_FIELDS), str(item.get("text", ""))))
+            entry["words"] = [start, len(words)]
+            pages.append(entry)
+
+        text_width = max((len(word[-1]) for word in words), default=1) or 1
+        word_dtype = [(name, "f8") for name in WORD_FIELDS] + [("text", f"<U{text_width}")]
+        tmp = Path(tempfile.mkdtemp(dir=ensure_dir(root.parent), prefix=f".{root.name}."))
+        try:
+            np.save(tmp / "rects.npy", np.array(rects, dtype=RECT_DTYPE))
+            np.save(tmp / "words.npy", np.array(words, dtype=word_dtype))
+            for kind, _ in PATH_KINDS:
+                np.save(tmp / f"{kind}_points.npy", np.array(points[kind], dtype=np.float64).reshape(-1, 2))
+                np.save(tmp / f"{kind}_offsets.npy", np.array(offsets[kind], dtype=np.int64))
+            (tmp / MANIFEST).write_text(json.dumps({"version": VERSION, "pages": pages}))
+            if root.exists():
+                shutil.rmtree(root)
+            os.replace(tmp, root)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not cls.exists(root):  # lost a race against another writer of the same store
+                raise
+        return root
+
+
+def _rect_rows(rects: Any) -> Iterable[Tuple[float, float, float, float]]:
+    if hasattr(rects, "dtype"):
+        return rects.tolist()
+    return ((float(r["x0"]), float(r["top"]), float(r["x1"]), float(r["bottom"])) for r in rects)
+
+
+def _first(shapes: Dict[str, Any], keys: Sequence[str]) -> Any:
+    # pdfplumber ``page.objects`` uses the singular keys, cached/sample data the plural ones.
+    for key in keys:
+        value = shapes.get(key)
+        if value is not None:
+            return value
+    return []
+
+
+def _get(obj: Any, key: str, default: Any = None) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
@@ -0,0 +1,302 @@
+"""Symbol recognition on vector linework, for CAD-exported plans.
+
+Fixtures in CAD exports are drawn as repeated blocks of small lines and
+curves. Those primitives are grouped into clusters, each cluster is reduced to
+a rotation- and scale-invariant fingerprint, and fingerprints are looked up in
+a :class:`SymbolLibrary` learned from labelled or YOLO-detected examples.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from math import floor, hypot
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.models import SymbolDetection
+from app.utils.spatial_index import BBox
+
+LOGGER = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, Point]
+
+# pdfplumber ``page.objects`` keys (and the plural spelling used by cached/sample data).
+PRIMITIVE_KEYS = ("line", "lines", "curve", "curves", "rect", "rects")
+# Labels starting with this prefix mark known non-symbols (door swings, tags...):
+# they count towards page coverage but produce no detection.
+IGNORE_PREFIX = "_"
+
+
+@dataclass
+class SymbolLibrary:
+    """Fingerprint -> label votes, stored as JSON."""
+
+    votes: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.votes)
+
+    @classmethod
+    def load(cls, path: Path) -> "SymbolLibrary":
+        payload = json.loads(path.read_text())
+        return cls(votes=payload.get("symbols", {}))
+
+    def save(self, path: Path) -> Path:
+        path.write_text(json.dumps({"version": 1, "symbols": self.votes}, indent=2, sort_keys=True))
+        return path
+
+    def add(self, fingerprint: str, label: str) -> None:
+        labels = self.votes.setdefault(fingerprint, {})
+        labels[label] = labels.get(label, 0) + 1
+
+    def lookup(self, fingerprint: str) -> Optional[str]:
+        labels = self.votes.get(fingerprint)
+        if not labels:
+            return None
+        # Majority vote; ties resolve to the alphabetically first label so lookups are stable.
+        return min(labels.items(), key=lambda item: (-item[1], item[0]))[0]
+
+    def digest(self) -> str:
+        return hashlib.sha256(json.dumps(self.votes, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class VectorCluster:
+    bbox: BBox
+    segments: List[Segment]
+    fingerprint: str
+
+
+@dataclass
+class PageMatch:
+    """Vector matches on one page and whether they cover it well enough to skip raster detection."""
+
+    page_number: int
+    detections: List[SymbolDetection]
+    clusters: int
+    matched: int
+    covered: bool
+
+    @property
+    def coverage(self) -> float:
+        return self.matched / self.clusters if self.clusters else 0.0
+
+
+class VectorSymbolMatcher:
+    """Finds library symbols among the small vector clusters of a page.
+
+    ``scale`` converts PDF points to the output coordinates, e.g. ``dpi / 72``
+    so detections line up with YOLO boxes on pages rasterized at ``dpi``.
+    A page counts as covered when it has at least one cluster and at least
+    ``min_coverage`` of its clusters are known to the library.
+    """
+
+    def __init__(
+        self,
+        library: Optional[SymbolLibrary] = None,
+        scale: float = 1.0,
+        max_symbol_size: float = 36.0,
+        join_tolerance: float = 0.5,
+        min_segments: int = 3,
+        min_coverage: float = 0.9,
+        quantum: float = 0.05,
+    ) -> None:
+        self.library = library if library is not None else SymbolLibrary()
+        self.scale = scale
+        # Symbols larger than this (in points) are treated as linework, not fixtures.
+        self.max_symbol_size = max_symbol_size
+        self.join_tolerance = join_tolerance
+        self.min_segments = min_segments
+        self.min_coverage = min_coverage
+        self.quantum = quantum
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.library) > 0
+
+    def cache_settings(self) -> dict:
+        return {
+            "library": self.library.digest() if self.enabled else None,
+            "scale": self.scale,
+            "max_symbol_size": self.max_symbol_size,
+            "join_tolerance": self.join_tolerance,
+            "min_segments": self.min_segments,
+            "min_coverage": self.min_coverage,
+            "quantum": self.quantum,
+        }
+
+    def clusters(self, vector_page) -> List[VectorCluster]:
+        primitives = [
+            segments
+            for segments in (_segments(obj) for obj in _primitives(_get(vector_page, "shapes", {}) or {}))
+            if segments and _extent(_bbox(segments)) <= self.max_symbol_size
+        ]
+        clusters: List[VectorCluster] = []
+        for group in _group(primitives, self.max_symbol_size, self.join_tolerance):
+            segments = [segment for index in group for segment in primitives[index]]
+            bbox = _bbox(segments)
+            if len(segments) < self.min_segments or _extent(bbox) > self.max_symbol_size:
+                continue
+            fingerprint = cluster_fingerprint(segments, self.quantum)
+            if fingerprint is not None:
+                clusters.append(VectorCluster(bbox, segments, fingerprint))
+        clusters.sort(key=lambda cluster: (cluster.bbox[1], cluster.bbox[0]))
+        return clusters
+
+    def match_page(self, vector_page) -> PageMatch:
+        page_number = _get(vector_page, "page_number", 0)
+        clusters = self.clusters(vector_page)
+        detections: List[SymbolDetection] = []
+        matched = 0
+        for cluster in clusters:
+            label = self.library.lookup(cluster.fingerprint)
+            if label is None:
+                continue
+            matched += 1
+            if not label.startswith(IGNORE_PREFIX):
+                bbox = tuple(coord * self.scale for coord in cluster.bbox)
+                detections.append(SymbolDetection(label, 1.0, bbox, page_number))
+        covered = bool(clusters) and matched / len(clusters) >= self.min_coverage
+        LOGGER.debug("Page %s: %s/%s vector clusters matched", page_number, matched, len(clusters))
+        return PageMatch(page_number, detections, len(clusters), matched, covered)
+
+    def learn(self, vector_page, boxes: Iterable[Tuple[str, BBox]]) -> int:
+        """Add the cluster centred in each labelled box (output coordinates) to the library."""
+
+        boxes = list(boxes)
+        learned = 0
+        for cluster in self.clusters(vector_page):
+            cx = (cluster.bbox[0] + cluster.bbox[2]) / 2 * self.scale
+            cy = (cluster.bbox[1] + cluster.bbox[3]) / 2 * self.scale
+            for label, (x0, top, x1, bottom) in boxes:
+                if x0 <= cx <= x1 and top <= cy <= bottom:
+                    self.library.add(cluster.fingerprint, label)
+                    learned += 1
+                    break
+        return learned
+
+
+def cluster_fingerprint(segments: Sequence[Segment], quantum: float = 0.05) -> Optional[str]:
+    """Hash of a cluster's shape that is invariant to translation, rotation and scale.
+
+    Each segment is described by its midpoint's distance from the cluster's
+    length-weighted centroid and its length, both divided by the cluster
+    radius and quantized; the sorted descriptors are hashed.
+    """
+
+    lengths = [hypot(b[0] - a[0], b[1] - a[1]) for a, b in segments]
+    total = sum(lengths)
+    if total == 0:
+        return None
+    cx = sum((a[0] + b[0]) / 2 * length for (a, b), length in zip(segments, lengths)) / total
+    cy = sum((a[1] + b[1]) / 2 * length for (a, b), length in zip(segments, lengths)) / total
+    radius = max(hypot(x - cx, y - cy) for segment in segments for x, y in segment)
+    if radius == 0:
+        return None
+    descriptors = sorted(
+        (
+            round(hypot((a[0] + b[0]) / 2 - cx, (a[1] + b[1]) / 2 - cy) / radius / quantum),
+            round(length / radius / quantum),
+        )
+        for (a, b), length in zip(segments, lengths)
+        if length > 0
+    )
+    return hashlib.sha1(json.dumps(descriptors).encode()).hexdigest()[:16]
+
+
+def _primitives(shapes: dict) -> Iterable[dict]:
+    for key in PRIMITIVE_KEYS:
+        objects = shapes.get(key, None)
+        if objects is None:
+            continue
+        if hasattr(objects, "dtype"):  # rect array of a mapped vector store page
+            for x0, top, x1, bottom in objects.tolist():
+                yield {"x0": x0, "top": top, "x1": x1, "bottom": bottom, "object_type": "rect"}
+        else:
+            yield from objects
+
+
+def _segments(obj: dict) -> List[Segment]:
+    pts = obj.get("pts")
+    if pts is None or not len(pts):
+        x0, top, x1, bottom = obj["x0"], obj["top"], obj["x1"], obj["bottom"]
+        pts = [(x0, top), (x1, top), (x1, bottom), (x0, bottom), (x0, top)]
+    points = [(float(x), float(y)) for x, y in pts]
+    if obj.get("object_type") == "rect" and points[0] != points[-1]:
+        points.append(points[0])
+    return [(a, b) for a, b in zip(points, points[1:]) if a != b]
+
+
+def _bbox(segments: Sequence[Segment]) -> BBox:
+    xs = [x for segment in segments for x, _ in segment]
+    ys = [y for segment in segments for _, y in segment]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _extent(bbox: BBox) -> float:
+    return max(bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+
+def _group(primitives: List[List[Segment]], cell_size: float, tolerance: float) -> List[List[int]]:
+    """Group primitives whose bboxes touch, then keep merging groups whose bboxes overlap.
+
+    The second part pulls details that float inside a fixture's outline (a
+    basin's tap, a WC's seat) into the same cluster as the outline.
+    """
+
+    groups = [[index] for index in range(len(primitives))]
+    boxes = [_bbox(segments) for segments in primitives]
+    while True:
+        merged = _touching(boxes, cell_size, tolerance)
+        if len(merged) == len(groups):
+            return groups
+        groups = [[index for member in group for index in groups[member]] for group in merged]
+        boxes = [_union([boxes[member] for member in group]) for group in merged]
+
+
+def _touching(boxes: List[BBox], cell_size: float, tolerance: float) -> List[List[int]]:
+    """Connected components of boxes that touch within ``tolerance`` (grid hash + union-find)."""
+
+    parent = list(range(len(boxes)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for index, (x0, top, x1, bottom) in enumerate(boxes):
+        x0, top, x1, bottom = x0 - tolerance, top - tolerance, x1 + tolerance, bottom + tolerance
+        for gx in range(floor(x0 / cell_size), floor(x1 / cell_size) + 1):
+            for gy in range(floor(top / cell_size), floor(bottom / cell_size) + 1):
+                cell = grid[(gx, gy)]
+                for other in cell:
+                    ox0, otop, ox1, obottom = boxes[other]
+                    if ox0 <= x1 and x0 <= ox1 and otop <= bottom and top <= obottom:
+                        parent[find(index)] = find(other)
+                cell.append(index)
+
+    components: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(boxes)):
+        components[find(index)].append(index)
+    return list(components.values())
+
+
+def _union(boxes: Sequence[BBox]) -> BBox:
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def _get(obj, key: str, default=None):
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
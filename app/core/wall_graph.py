@@ -0,0 +1,322 @@
+"""Room reconstruction from wall linework through a planar graph.
+
+Wall segments (pdfplumber lines, curves and rect edges) are snapped together
+within a tolerance through a spatial hash, split wherever they cross, touch
+or overlap, and turned into a planar graph. Walking the graph's half-edges in
+angular order yields its faces; bounded faces that are large and wide enough
+become room polygons, with nested linework (columns, shafts) kept as holes.
+Candidate pairs come from a uniform grid, so wall-like input is processed in
+roughly O(n log n).
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from math import atan2, floor, hypot
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.utils.spatial_index import BBox, GridIndex
+
+LOGGER = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, Point]
+
+WALL_KEYS = ("line", "lines", "curve", "curves", "rect", "rects")
+
+
+@dataclass
+class Face:
+    """A bounded face of the wall graph: outer ring plus hole rings, in PDF points."""
+
+    shell: List[Point]
+    holes: List[List[Point]] = field(default_factory=list)
+
+    @property
+    def area(self) -> float:
+        return abs(_signed_area(self.shell)) - sum(abs(_signed_area(hole)) for hole in self.holes)
+
+    @property
+    def perimeter(self) -> float:
+        return sum(_ring_length(ring) for ring in [self.shell, *self.holes])
+
+    @property
+    def bbox(self) -> BBox:
+        return _ring_bbox(self.shell)
+
+
+def wall_segments(shapes: dict) -> List[Segment]:
+    """Straight segments of every line, curve and rect on a page (curves follow their on-curve points)."""
+
+    segments: List[Segment] = []
+    for key in WALL_KEYS:
+        objects = shapes.get(key, None)
+        if objects is None:
+            continue
+        if hasattr(objects, "segments"):  # lines/curves of a mapped vector store page
+            segments.extend(objects.segments())
+            continue
+        if hasattr(objects, "dtype"):  # rect array of a mapped vector store page
+            for x0, top, x1, bottom in objects.tolist():
+                ring = [(x0, top), (x1, top), (x1, bottom), (x0, bottom), (x0, top)]
+                segments.extend((a, b) for a, b in zip(ring, ring[1:]) if a != b)
+            continue
+        for obj in objects:
+            pts = obj.get("pts")
+            if pts is None or not len(pts):
+                x0, top, x1, bottom = obj["x0"], obj["top"], obj["x1"], obj["bottom"]
+                pts = [(x0, top), (x1, top), (x1, bottom), (x0, bottom)]
+            points = [(float(x), float(y)) for x, y in pts]
+            if key.startswith("rect") and points[0] != points[-1]:
+                points.append(points[0])
+            segments.extend((a, b) for a, b in zip(points, points[1:]) if a != b)
+    return segments
+
+
+class WallGraph:
+    """Planar graph of snapped and noded wall segments."""
+
+    def __init__(self, tolerance: float = 0.5) -> None:
+        self.tolerance = tolerance
+        self.vertices: List[Point] = []
+        self.edges: Set[Tuple[int, int]] = set()
+        self._snap_grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment], tolerance: float = 0.5) -> "WallGraph":
+        graph = cls(tolerance)
+        graph.add_segments(list(segments))
+        return graph
+
+    def snap(self, point: Point) -> int:
+        """Index of the vertex within ``tolerance`` of ``point``, creating one if there is none."""
+
+        x, y = point
+        size = self.tolerance or 1e-9
+        gx, gy = floor(x / size), floor(y / size)
+        best, best_distance = -1, self.tolerance
+        for cx in (gx - 1, gx, gx + 1):
+            for cy in (gy - 1, gy, gy + 1):
+                for index in self._snap_grid.get((cx, cy), ()):
+                    vx, vy = self.vertices[index]
+                    distance = hypot(vx - x, vy - y)
+                    if distance <= best_distance:
+                        best, best_distance = index, distance
+        if best >= 0:
+            return best
+        self.vertices.append((x, y))
+        self._snap_grid[(gx, gy)].append(len(self.vertices) - 1)
+        return len(self.vertices) - 1
+
+    def add_segments(self, segments: Sequence[Segment]) -> None:
+        snapped = []
+        for a, b in segments:
+            u, v = self.snap(a), self.snap(b)
+            if u != v:
+                snapped.append((u, v))
+        snapped = list(dict.fromkeys((min(u, v), max(u, v)) for u, v in snapped))
+        splits = self._split_points(snapped)
+        for index, (u, v) in enumerate(snapped):
+            ux, uy = self.vertices[u]
+            dx, dy = self.vertices[v][0] - ux, self.vertices[v][1] - uy
+            length_sq = dx * dx + dy * dy
+            chain = sorted(
+                {u, v, *splits.get(index, ())},
+                key=lambda w: ((self.vertices[w][0] - ux) * dx + (self.vertices[w][1] - uy) * dy) / length_sq,
+            )
+            for a, b in zip(chain, chain[1:]):
+                if a != b:
+                    self.edges.add((min(a, b), max(a, b)))
+
+    def _split_points(self, segments: List[Tuple[int, int]]) -> Dict[int, Set[int]]:
+        """Vertices to insert into each segment: crossings, T-junctions and collinear overlaps."""
+
+        splits: Dict[int, Set[int]] = defaultdict(set)
+        if not segments:
+            return splits
+        tol = self.tolerance
+        lengths = [hypot(*_delta(self.vertices[u], self.vertices[v])) for u, v in segments]
+        cell = max(median(lengths), tol * 4, 1e-6)
+        boxes = []
+        for u, v in segments:
+            (x0, y0), (x1, y1) = self.vertices[u], self.vertices[v]
+            boxes.append((min(x0, x1) - tol, min(y0, y1) - tol, max(x0, x1) + tol, max(y0, y1) + tol))
+        grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        seen: Set[Tuple[int, int]] = set()
+        for index, box in enumerate(boxes):
+            x0, y0, x1, y1 = box
+            for gx in range(floor(x0 / cell), floor(x1 / cell) + 1):
+                for gy in range(floor(y0 / cell), floor(y1 / cell) + 1):
+                    bucket = grid[(gx, gy)]
+                    for other in bucket:
+                        ox0, oy0, ox1, oy1 = boxes[other]
+                        if ox0 > x1 or x0 > ox1 or oy0 > y1 or y0 > oy1 or (other, index) in seen:
+                            continue
+                        seen.add((other, index))
+                        self._intersect(other, index, segments, boxes, splits)
+                    bucket.append(index)
+        return splits
+
+    def _intersect(
+        self, i: int, j: int, segments: List[Tuple[int, int]], boxes: List[BBox], splits: Dict[int, Set[int]]
+    ) -> None:
+        (a, b), (c, d) = segments[i], segments[j]
+        if len({a, b, c, d}) < 4 and not _collinear(self.vertices, a, b, c, d, self.tolerance):
+            return  # segments meeting at a shared vertex
+        for vertex, target in ((c, i), (d, i), (a, j), (b, j)):
+            x, y = self.vertices[vertex]
+            x0, y0, x1, y1 = boxes[target]
+            if x0 <= x <= x1 and y0 <= y <= y1 and vertex not in segments[target]:
+                if self._on_segment(vertex, segments[target]):
+                    splits[target].add(vertex)
+        point = _crossing(self.vertices[a], self.vertices[b], self.vertices[c], self.vertices[d])
+        if point is not None:
+            vertex = self.snap(point)
+            for target in (i, j):
+                if vertex not in segments[target]:
+                    splits[target].add(vertex)
+
+    def _on_segment(self, vertex: int, segment: Tuple[int, int]) -> bool:
+        (px, py), (ax, ay), (bx, by) = self.vertices[vertex], self.vertices[segment[0]], self.vertices[segment[1]]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+        if t <= 0 or t >= 1:
+            return False
+        return hypot(ax + t * dx - px, ay + t * dy - py) <= self.tolerance
+
+    def prune(self) -> None:
+        """Drop dangling edges (door leaves, dimension ticks) that cannot bound a face."""
+
+        adjacency = self._adjacency()
+        stack = [vertex for vertex, neighbours in adjacency.items() if len(neighbours) < 2]
+        while stack:
+            vertex = stack.pop()
+            for neighbour in list(adjacency.get(vertex, ())):
+                adjacency[neighbour].discard(vertex)
+                self.edges.discard((min(vertex, neighbour), max(vertex, neighbour)))
+                if len(adjacency[neighbour]) == 1:
+                    stack.append(neighbour)
+            adjacency.pop(vertex, None)
+
+    def faces(self) -> List[Face]:
+        """Bounded faces, with every nested component attached as a hole of the face containing it."""
+
+        self.prune()
+        adjacency = self._adjacency()
+        order: Dict[int, List[int]] = {}
+        position: Dict[Tuple[int, int], int] = {}
+        for vertex, neighbours in adjacency.items():
+            vx, vy = self.vertices[vertex]
+            ordered = sorted(neighbours, key=lambda n: atan2(self.vertices[n][1] - vy, self.vertices[n][0] - vx))
+            order[vertex] = ordered
+            for index, neighbour in enumerate(ordered):
+                position[(vertex, neighbour)] = index
+
+        bounded: List[List[Point]] = []
+        outer: List[List[Point]] = []
+        visited: Set[Tuple[int, int]] = set()
+        for u, v in sorted(self.edges):
+            for start in ((u, v), (v, u)):
+                if start in visited:
+                    continue
+                ring: List[Point] = []
+                edge = start
+                while edge not in visited:
+                    visited.add(edge)
+                    tail, head = edge
+                    ring.append(self.vertices[tail])
+                    around = order[head]
+                    edge = (head, around[(position[(head, tail)] - 1) % len(around)])
+                # Walking with the face on the left: bounded faces come out positive.
+                (bounded if _signed_area(ring) > 0 else outer).append(ring)
+
+        faces = [Face(ring) for ring in bounded]
+        if faces and outer:
+            index = GridIndex.from_items([(face.bbox, number) for number, face in enumerate(faces)])
+            for ring in outer:
+                host = _smallest_container(ring, faces, index)
+                if host is not None:
+                    host.holes.append(ring)
+        return faces
+
+    def _adjacency(self) -> Dict[int, Set[int]]:
+        adjacency: Dict[int, Set[int]] = defaultdict(set)
+        for u, v in self.edges:
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+        return adjacency
+
+
+def polygonize(segments: Iterable[Segment], tolerance: float = 0.5) -> List[Face]:
+    return WallGraph.from_segments(segments, tolerance).faces()
+
+
+def _smallest_container(ring: List[Point], faces: List[Face], index: GridIndex) -> Optional[Face]:
+    x, y = ring[0]
+    area = abs(_signed_area(ring))
+    best: Optional[Face] = None
+    for number in index.query_point(x, y):
+        face = faces[number]
+        shell_area = abs(_signed_area(face.shell))
+        # A component's outer ring also equals the shell of its own outermost face; skip those.
+        if shell_area <= area or not _contains(face.shell, x, y):
+            continue
+        if best is None or shell_area < abs(_signed_area(best.shell)):
+            best = face
+    return best
+
+
+def _contains(ring: List[Point], x: float, y: float) -> bool:
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+
+def _crossing(a: Point, b: Point, c: Point, d: Point) -> Optional[Point]:
+    """Proper crossing point of segments ab and cd (strictly inside both), if any."""
+
+    rx, ry = b[0] - a[0], b[1] - a[1]
+    sx, sy = d[0] - c[0], d[1] - c[1]
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None
+    qx, qy = c[0] - a[0], c[1] - a[1]
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    if 0 < t < 1 and 0 < u < 1:
+        return a[0] + t * rx, a[1] + t * ry
+    return None
+
+
+def _collinear(vertices: List[Point], a: int, b: int, c: int, d: int, tolerance: float) -> bool:
+    (ax, ay), (bx, by) = vertices[a], vertices[b]
+    length = hypot(bx - ax, by - ay)
+    return all(
+        abs((bx - ax) * (vertices[p][1] - ay) - (by - ay) * (vertices[p][0] - ax)) / length <= tolerance for p in (c, d)
+    )
+
+
+def _delta(a: Point, b: Point) -> Tuple[float, float]:
+    return b[0] - a[0], b[1] - a[1]
+
+
+def _signed_area(ring: Sequence[Point]) -> float:
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(ring, list(ring[1:]) + list(ring[:1])):
+        area += x0 * y1 - x1 * y0
+    return area / 2.0
+
+
+def _ring_length(ring: Sequence[Point]) -> float:
+    return sum(hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(ring, list(ring[1:]) + list(ring[:1])))
+
+
+def _ring_bbox(ring: Sequence[Point]) -> BBox:
+    xs = [x for x, _ in ring]
+    ys = [y for _, y in ring]
+    return min(xs), min(ys), max(xs), max(ys)
@@ -0,0 +1,133 @@
+"""Quantity changes between two revisions of a drawing."""
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Float noise below this is not reported as a change.
+TOLERANCE = 1e-6
+# Rooms on the same page whose bounds overlap at least this much (intersection over union) are the same room.
+MIN_OVERLAP = 0.5
+
+
+class QuantityDiffExporter:
+    """Compares two ``output.json`` payloads (see :class:`JSONExporter`).
+
+    Room ids are positional (``p<page>_rect<n>``), so inserting one room
+    renumbers the rooms after it. HVAC rows are therefore matched by location:
+    rooms with the same rounded bounds on a page first, then the pairs whose
+    bounds overlap most (at least :data:`MIN_OVERLAP`). Payloads written before
+    rooms carried locations fall back to matching room ids, which
+    ``"matched_by"`` records.
+    """
+
+    def diff(self, previous: dict, current: dict, changed_pages: Optional[Iterable[int]] = None) -> dict:
+        before = {rec["room_id"]: rec for rec in previous.get("hvac", [])}
+        after = {rec["room_id"]: rec for rec in current.get("hvac", [])}
+        if previous.get("rooms") and current.get("rooms"):
+            matched_by = "location"
+            pairs = _match_locations(previous["rooms"], current["rooms"])
+        else:
+            matched_by = "room_id"
+            pairs = [(room_id, room_id) for room_id in after if room_id in before]
+        pairs = [(old, new) for old, new in pairs if old in before and new in after]
+        changed: List[dict] = []
+        for old_id, new_id in pairs:
+            old, new = before[old_id], after[new_id]
+            changes = _changes({**old, "room_id": new_id}, new)
+            if changes:
+                entry = {"room_id": new_id, "before": old, "after": new}
+                if old_id != new_id:
+                    entry["previous_room_id"] = old_id
+                changed.append(entry)
+        matched_before = {old for old, _ in pairs}
+        matched_after = {new for _, new in pairs}
+        return {
+            "changed_pages": sorted(changed_pages) if changed_pages is not None else None,
+            "matched_by": matched_by,
+            "hvac": {
+                "added": [rec for room_id, rec in after.items() if room_id not in matched_after],
+                "removed": [rec for room_id, rec in before.items() if room_id not in matched_before],
+                "changed": changed,
+            },
+            "plumbing": _changes(previous.get("plumbing", {}), current.get("plumbing", {})),
+            "underfloor": _changes(previous.get("underfloor", {}), current.get("underfloor", {})),
+        }
+
+    def export(
+        self, previous: dict, current: dict, output_path: Path, changed_pages: Optional[Iterable[int]] = None
+    ) -> Path:
+        output_path.write_text(json.dumps(self.diff(previous, current, changed_pages), indent=2))
+        return output_path
+
+
+def _match_locations(before: List[dict], after: List[dict]) -> List[Tuple[str, str]]:
+    """``(previous room_id, current room_id)`` pairs of the same rooms in two revisions."""
+
+    pairs: List[Tuple[str, str]] = []
+    exact: Dict[tuple, List[str]] = defaultdict(list)
+    for room in before:
+        exact[_location_key(room)].append(room["room_id"])
+    left_after: Dict[int, List[dict]] = defaultdict(list)
+    for room in after:
+        candidates = exact.get(_location_key(room))
+        if candidates:
+            pairs.append((candidates.pop(0), room["room_id"]))
+        else:
+            left_after[room["page_number"]].append(room)
+    # The rest were moved, resized or added/removed: pair them by overlap, best first.
+    matched = {old for old, _ in pairs}
+    left_before: Dict[int, List[dict]] = defaultdict(list)
+    for room in before:
+        if room["room_id"] not in matched:
+            left_before[room["page_number"]].append(room)
+    for page, rooms in left_after.items():
+        scored = sorted(
+            (
+                (_overlap(old["bounds"], new["bounds"]), old["room_id"], new["room_id"])
+                for old in left_before.get(page, ())
+                for new in rooms
+            ),
+            reverse=True,
+        )
+        used_before, used_after = set(), set()
+        for overlap, old_id, new_id in scored:
+            if overlap < MIN_OVERLAP:
+                break
+            if old_id not in used_before and new_id not in used_after:
+                pairs.append((old_id, new_id))
+                used_before.add(old_id)
+                used_after.add(new_id)
+    return pairs
+
+
+def _location_key(room: dict) -> tuple:
+    return (room["page_number"], *(round(value, 1) for value in room["bounds"]))
+
+
+def _overlap(a: Sequence[float], b: Sequence[float]) -> float:
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    inter = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _changes(before: dict, after: dict) -> Dict[str, dict]:
+    """``{field: {"before", "after"[, "delta"]}}`` for every field whose value differs."""
+
+    changes: Dict[str, dict] = {}
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        numeric = isinstance(old, (int, float)) and isinstance(new, (int, float))
+        if numeric and abs(new - old) <= TOLERANCE or not numeric and old == new:
+            continue
+        change = {"before": old, "after": new}
+        if numeric:
+            change["delta"] = new - old
+        changes[key] = change
+    return changes
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
@@ -9,12 +10,15 @@ from app.core.models import ProjectQuantities
 
 
 class JSONExporter:
-    def export(self, quantities: ProjectQuantities, output_path: Path) -> Path:
-        payload = {
-            "hvac": [q.__dict__ for q in quantities.hvac],
-            "plumbing": quantities.plumbing.__dict__,
-            "underfloor": quantities.underfloor.__dict__,
+    def payload(self, quantities: ProjectQuantities) -> dict:
+        return {
+            "hvac": [asdict(q) for q in quantities.hvac],
+            "plumbing": asdict(quantities.plumbing),
+            "underfloor": asdict(quantities.underfloor),
+            "rooms": [asdict(location) for location in quantities.rooms],
         }
-        output_path.write_text(json.dumps(payload, indent=2))
+
+    def export(self, quantities: ProjectQuantities, output_path: Path) -> Path:
+        output_path.write_text(json.dumps(self.payload(quantities), indent=2))
         return output_path
 
@@ -0,0 +1,69 @@
+"""Consolidate per-drawing outputs into project level JSON/CSV."""
+from __future__ import annotations
+
+import csv
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Mapping
+
+PLUMBING_FIELDS = ("hot_water_points", "cold_water_points", "sewage_points", "floor_drains", "estimated_pipe_length_m")
+UNDERFLOOR_FIELDS = ("total_area_sqm", "heated_area_sqm", "restricted_area_sqm", "circuits", "estimated_pipe_length_m")
+
+
+class ProjectExporter:
+    """Sums the ``output.json`` payloads of every drawing in a project."""
+
+    def totals(self, per_file: Mapping[str, dict]) -> dict:
+        plumbing = {name: 0 for name in PLUMBING_FIELDS}
+        underfloor = {name: 0 for name in UNDERFLOOR_FIELDS}
+        units: Counter = Counter()
+        total_btus = 0.0
+        for payload in per_file.values():
+            for name in PLUMBING_FIELDS:
+                plumbing[name] += payload["plumbing"][name]
+            for name in UNDERFLOOR_FIELDS:
+                underfloor[name] += payload["underfloor"][name]
+            for rec in payload["hvac"]:
+                total_btus += rec["required_btus"]
+                units[rec["recommended_unit"]] += 1
+        total_area = underfloor["total_area_sqm"]
+        underfloor["coverage_ratio"] = 0 if total_area == 0 else underfloor["heated_area_sqm"] / total_area
+        return {
+            "hvac": {"total_btus": total_btus, "units": dict(sorted(units.items()))},
+            "plumbing": plumbing,
+            "underfloor": underfloor,
+        }
+
+    def export_json(self, per_file: Mapping[str, dict], output_path: Path) -> Path:
+        payload = {"files": dict(per_file), "totals": self.totals(per_file)}
+        output_path.write_text(json.dumps(payload, indent=2))
+        return output_path
+
+    def export_csv(self, per_file: Mapping[str, dict], output_path: Path) -> Path:
+        with output_path.open("w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["Drawing", "Section", "Description", "Quantity", "Unit"])
+            for name, payload in per_file.items():
+                btus = sum(rec["required_btus"] for rec in payload["hvac"])
+                writer.writerow([name, "HVAC", "Required capacity", f"{btus:.0f}", "BTU"])
+                self._write_sections(writer, name, payload["plumbing"], payload["underfloor"])
+            totals = self.totals(per_file)
+            writer.writerow(["TOTAL", "HVAC", "Required capacity", f"{totals['hvac']['total_btus']:.0f}", "BTU"])
+            for unit, count in totals["hvac"]["units"].items():
+                writer.writerow(["TOTAL", "HVAC", unit, count, "ea"])
+            self._write_sections(writer, "TOTAL", totals["plumbing"], totals["underfloor"])
+        return output_path
+
+    @staticmethod
+    def _write_sections(writer, name: str, plumbing: dict, underfloor: dict) -> None:
+        writer.writerow([name, "Plumbing", "Hot water points", plumbing["hot_water_points"], "points"])
+        writer.writerow([name, "Plumbing", "Cold water points", plumbing["cold_water_points"], "points"])
+        writer.writerow([name, "Plumbing", "Sewage points", plumbing["sewage_points"], "points"])
+        writer.writerow([name, "Plumbing", "Floor drains", plumbing["floor_drains"], "ea"])
+        writer.writerow([name, "Plumbing", "Estimated pipe length", f"{plumbing['estimated_pipe_length_m']:.1f}", "m"])
+        writer.writerow([name, "Underfloor", "Total area", f"{underfloor['total_area_sqm']:.2f}", "sqm"])
+        writer.writerow([name, "Underfloor", "Heated area", f"{underfloor['heated_area_sqm']:.2f}", "sqm"])
+        writer.writerow([name, "Underfloor", "Restricted area", f"{underfloor['restricted_area_sqm']:.2f}", "sqm"])
+        writer.writerow([name, "Underfloor", "Circuits", underfloor["circuits"], "ea"])
+        writer.writerow([name, "Underfloor", "Estimated pipe length", f"{underfloor['estimated_pipe_length_m']:.1f}", "m"])
@@ -4,20 +4,17 @@ from __future__ import annotations
 from pathlib import Path
 
 from app.core.models import ProjectQuantities
-
-try:  # pragma: no cover
-    from fpdf import FPDF
-except Exception:  # pragma: no cover
-    FPDF = None  # type: ignore
+from app.utils.lazy import optional_import
 
 
 class PDFReportGenerator:
     def generate(self, quantities: ProjectQuantities, output_path: Path) -> Path:
-        if FPDF is None:
+        fpdf = optional_import("fpdf")
+        if fpdf is None:
             # Fallback: write markdown-like text even if extension is pdf
             output_path.write_text(self._text_summary(quantities))
             return output_path
-        pdf = FPDF()
+        pdf = fpdf.FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
         pdf.cell(200, 10, txt="MEP Quantities Summary", ln=True, align="C")
@@ -17,3 +17,7 @@ def hash_file(path: Path) -> str:
             sha.update(chunk)
     return sha.hexdigest()
 
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
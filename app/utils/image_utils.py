@@ -2,17 +2,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, Tuple
 
 import numpy as np
 
-try:  # pragma: no cover
-    import cv2
-except Exception:  # pragma: no cover
-    cv2 = None  # type: ignore
+from app.utils.lazy import optional_import
 
 
 def resize_image(image_path: Path, target_size: Tuple[int, int]) -> Path:
+    cv2 = optional_import("cv2")
     if cv2 is None:
         raise RuntimeError("OpenCV not installed")
     image = cv2.imread(str(image_path))
@@ -21,3 +19,83 @@ def resize_image(image_path: Path, target_size: Tuple[int, int]) -> Path:
     cv2.imwrite(str(out_path), resized)
     return out_path
 
+
+def pixmap_to_array(pix) -> np.ndarray:
+    """Wrap a PyMuPDF pixmap's samples as an HxWxN array without copying.
+
+    The array points into the pixmap's memory; keep ``pix`` alive as long as
+    the array is in use.
+    """
+
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+
+def to_bgr(pixels: np.ndarray) -> np.ndarray:
+    """Convert RGB(A)/gray page pixels to the contiguous BGR layout OpenCV-based models expect."""
+
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    if pixels.shape[2] == 1:
+        return np.ascontiguousarray(np.repeat(pixels, 3, axis=2))
+    return np.ascontiguousarray(pixels[:, :, 2::-1])
+
+
+def load_image(image_path: Path) -> np.ndarray:
+    """Read an image as an HxWx3 BGR array (the layout YOLO expects for arrays)."""
+
+    cv2 = optional_import("cv2")
+    if cv2 is None:
+        raise RuntimeError("OpenCV not installed")
+    image = cv2.imread(str(image_path))
+    if image is None:
+        raise FileNotFoundError(image_path)
+    return image
+
+
+def iter_tiles(width: int, height: int, tile_size: int, overlap: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield ``(x0, y0, x1, y1)`` windows covering the image with the given overlap.
+
+    The last window in each direction is shifted back to end on the image edge,
+    so every tile is full size whenever the image is at least one tile large.
+    """
+
+    if overlap >= tile_size:
+        raise ValueError("overlap must be smaller than tile_size")
+    stride = tile_size - overlap
+    xs = _tile_starts(width, tile_size, stride)
+    ys = _tile_starts(height, tile_size, stride)
+    for y0 in ys:
+        for x0 in xs:
+            yield x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height)
+
+
+def _tile_starts(length: int, tile_size: int, stride: int) -> list:
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+    return starts
+
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Class-aware greedy NMS; returns indices of the boxes to keep, best first."""
+
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    # Offset each class into its own coordinate range so one pass handles all classes.
+    shift = (boxes.max() + 1.0) * classes.astype(np.float64)
+    shifted = boxes + shift[:, None]
+    x0, y0, x1, y1 = shifted.T
+    areas = (x1 - x0) * (y1 - y0)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(x1[best], x1[rest]) - np.maximum(x0[best], x0[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y1[best], y1[rest]) - np.maximum(y0[best], y0[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,48 @@
+"""Deferred imports for the optional heavy dependencies."""
+from __future__ import annotations
+
+import importlib
+import importlib.metadata
+import importlib.util
+import logging
+import sys
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# Third-party modules that must not be imported just by importing the pipeline.
+HEAVY_MODULES = ("numpy", "shapely", "fitz", "pdfplumber", "fpdf", "ultralytics", "torch", "paddleocr", "cv2")
+
+
+@lru_cache(maxsize=None)
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Import ``name`` on first use; ``None`` (remembered) if it is missing or broken."""
+
+    try:
+        return importlib.import_module(name)
+    except Exception as exc:  # pragma: no cover - depends on the environment
+        LOGGER.debug("Optional dependency %s unavailable: %s", name, exc)
+        return None
+
+
+def is_installed(name: str) -> bool:
+    """Whether ``name`` can be found, without importing it."""
+
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):  # pragma: no cover
+        return False
+
+
+@lru_cache(maxsize=None)
+def installed_version(distribution: str) -> Optional[str]:
+    """Version of an installed distribution from its metadata, without importing it."""
+
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return None
@@ -28,6 +28,12 @@ class SimplePolygon:
             area -= pts[j].x * pts[i].y
         return abs(area) / 2.0
 
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        xs = [pt.x for pt in self._points]
+        ys = [pt.y for pt in self._points]
+        return min(xs), min(ys), max(xs), max(ys)
+
     @property
     def centroid(self) -> SimplePoint:
         signed_area = 0.0
@@ -0,0 +1,51 @@
+"""Uniform grid index for fast bbox lookups without external dependencies."""
+from __future__ import annotations
+
+from collections import defaultdict
+from math import floor
+from statistics import median
+from typing import Dict, Generic, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+BBox = Tuple[float, float, float, float]  # xmin, ymin, xmax, ymax
+
+
+class GridIndex(Generic[T]):
+    """Buckets bboxes into square cells so point queries only touch nearby items."""
+
+    def __init__(self, cell_size: float) -> None:
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[BBox, T]]] = defaultdict(list)
+
+    @classmethod
+    def from_items(cls, items: Sequence[Tuple[BBox, T]]) -> "GridIndex[T]":
+        """Build an index with a cell size matched to the typical item extent."""
+
+        extents = [max(b[2] - b[0], b[3] - b[1]) for b, _ in items]
+        cell_size = median(extents) if extents else 1.0
+        index: GridIndex[T] = cls(max(cell_size, 1.0))
+        for bbox, value in items:
+            index.insert(bbox, value)
+        return index
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def insert(self, bbox: BBox, value: T) -> None:
+        cx0, cy0 = self._cell(bbox[0], bbox[1])
+        cx1, cy1 = self._cell(bbox[2], bbox[3])
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells[(cx, cy)].append((bbox, value))
+
+    def query_point(self, x: float, y: float) -> List[T]:
+        """Return values whose bbox contains ``(x, y)`` (edges inclusive), in insertion order."""
+
+        return [
+            value
+            for bbox, value in self._cells.get(self._cell(x, y), ())
+            if bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+        ]
+
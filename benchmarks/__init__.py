@@ -0,0 +1 @@
+"""Performance benchmarks on synthetic plans; run with ``python -m benchmarks``."""
@@ -0,0 +1,178 @@
+"""Time the geometry, classification, calculator and export stages on a synthetic plan.
+
+    python -m benchmarks --pages 4 --rooms 2000 --output bench.json
+    python -m benchmarks --pages 4 --rooms 2000 --compare bench.json
+    python -m benchmarks --vectors cache/plan-vectors   # geometry from a saved vector store
+
+Results are JSON so runs on different commits can be compared with ``--compare``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.core.geometry_extractor import ROOM_SOURCES, GeometryExtractor
+from app.core.hvac_calculator import HVACCalculator
+from app.core.models import ProjectQuantities
+from app.core.pdf_loader import PDFPageVectorData
+from app.core.plumbing_calculator import PlumbingCalculator
+from app.core.room_classifier import RoomClassifier
+from app.core.tables import RoomTable, SymbolTable
+from app.core.underfloor_calculator import UnderfloorCalculator
+from app.core.vector_store import VectorStore
+from app.output.export_csv import CSVExporter
+from app.output.export_json import JSONExporter
+from app.output.report_generator import PDFReportGenerator
+from benchmarks.synthetic import PlanSpec, generate_pages, generate_symbols
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"best": min(samples), "median": statistics.median(samples)}
+
+
+def run_benchmark(
+    spec: PlanSpec,
+    repeat: int = 3,
+    room_source: str = "rects",
+    with_pdf: bool = True,
+    vectors: Optional[Path] = None,
+) -> dict:
+    """Time each stage ``repeat`` times on one generated plan and return the JSON-ready results.
+
+    With ``vectors``, the geometry stages run on that :class:`VectorStore`
+    (e.g. exported from a real drawing), which is created from the generated
+    plan first if it does not exist; symbols still come from ``spec``.
+    """
+
+    generated = generate_pages(spec)
+    symbols = generate_symbols(spec, generated)
+    pages = [PDFPageVectorData(**page) for page in generated]
+    if vectors is not None:
+        if not VectorStore.exists(vectors):
+            VectorStore.write(pages, vectors)
+        pages = VectorStore.open(vectors).pages
+    labels = [{**text, "page_number": page.page_number} for page in pages for text in page.text_items]
+    extractor = GeometryExtractor(room_source=room_source)
+    classifier = RoomClassifier()
+    rooms = extractor.from_vectors(pages)
+    extractor.assign_labels(rooms, labels)
+    classifier.normalize(rooms)
+    hvac, plumbing, underfloor = HVACCalculator(), PlumbingCalculator(), UnderfloorCalculator()
+    quantities = ProjectQuantities(
+        hvac=hvac.recommendations(rooms),
+        plumbing=plumbing.summarize(rooms, symbols),
+        underfloor=underfloor.summarize(rooms),
+    )
+
+    stages: Dict[str, Callable[[], object]] = {
+        "from_vectors": lambda: extractor.from_vectors(pages),
+        "assign_labels": lambda: extractor.assign_labels(rooms, labels),
+        "normalize": lambda: list(classifier.normalize(rooms)),
+        "calc.hvac": lambda: hvac.recommendations(rooms),
+        "calc.plumbing": lambda: plumbing.summarize(rooms, symbols),
+        "calc.underfloor": lambda: underfloor.summarize(rooms),
+        "tables.build": lambda: (RoomTable.from_rooms(rooms), SymbolTable.from_detections(symbols)),
+    }
+    room_table, symbol_table = RoomTable.from_rooms(rooms), SymbolTable.from_detections(symbols)
+    stages["calc.hvac.table"] = lambda: hvac.recommendations(room_table)
+    stages["calc.plumbing.table"] = lambda: plumbing.summarize(room_table, symbol_table)
+    stages["calc.underfloor.table"] = lambda: underfloor.summarize(room_table)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        store = vectors or VectorStore.write(pages, out / "vectors")
+        stages["vector_store.write"] = lambda: VectorStore.write(pages, out / "rewritten")
+        stages["vector_store.rooms"] = lambda: extractor.from_vectors(VectorStore.open(store).pages)
+        stages["export.json"] = lambda: JSONExporter().export(quantities, out / "output.json")
+        stages["export.csv"] = lambda: CSVExporter().export(quantities, out / "output.csv")
+        if with_pdf:
+            stages["export.pdf"] = lambda: PDFReportGenerator().generate(quantities, out / "summary.pdf")
+        timings = {name: _time(fn, repeat) for name, fn in stages.items()}
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "spec": asdict(spec),
+        "room_source": room_source,
+        "vectors": str(vectors) if vectors else None,
+        "repeat": repeat,
+        "counts": {"rooms": len(rooms), "labels": len(labels), "symbols": len(symbols)},
+        "stages": timings,
+    }
+
+
+def compare(previous: dict, current: dict) -> List[str]:
+    """One line per stage with both best times and the ratio (>1 means the current run is slower)."""
+
+    lines = []
+    for key in ("spec", "room_source", "vectors"):
+        if previous.get(key) != current.get(key):
+            lines.append(f"warning: {key} differs ({previous.get(key)} vs {current.get(key)})")
+    lines.append(f"{'stage':<22} {'before s':>10} {'after s':>10} {'ratio':>7}")
+    for name, timing in current["stages"].items():
+        before = previous.get("stages", {}).get(name)
+        if before is None:
+            lines.append(f"{name:<22} {'-':>10} {timing['best']:>10.4f} {'-':>7}")
+            continue
+        ratio = timing["best"] / before["best"] if before["best"] else float("inf")
+        lines.append(f"{name:<22} {before['best']:>10.4f} {timing['best']:>10.4f} {ratio:>7.2f}")
+    return lines
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the geometry and quantity stages on a synthetic plan")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--rooms", type=int, default=500, help="Rooms per page")
+    parser.add_argument("--texts", type=int, default=750, help="Text items per page (rooms are labelled first)")
+    parser.add_argument("--lines", type=int, default=5000, help="Wall-like lines per page")
+    parser.add_argument("--symbols", type=int, default=200, help="Fixture detections per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--room-source", choices=ROOM_SOURCES, default="rects")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip the PDF report stage")
+    parser.add_argument(
+        "--vectors", type=Path, default=None, help="Vector store to run geometry on (created from the plan if missing)"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write the results JSON here")
+    parser.add_argument("--compare", type=Path, default=None, help="Results JSON of an earlier run")
+    args = parser.parse_args(argv)
+
+    spec = PlanSpec(args.pages, args.rooms, args.texts, args.lines, args.symbols, args.seed)
+    result = run_benchmark(spec, args.repeat, args.room_source, with_pdf=not args.no_pdf, vectors=args.vectors)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    if args.compare:
+        print("\n".join(compare(json.loads(args.compare.read_text()), result)))
+    else:
+        for name, timing in result["stages"].items():
+            print(f"{name:<22} best {timing['best']:.4f}s  median {timing['median']:.4f}s")
+    print(f"{result['counts']['rooms']} rooms, {result['counts']['labels']} labels", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare vector extraction profiles on parse time, memory and retained size.
+
+    python -m benchmarks.extraction                     # a generated plan
+    python -m benchmarks.extraction drawing.pdf --repeat 5 --output extraction.json
+
+Each profile ingests the PDF without rasterizing. ``peak_mb`` is the
+tracemalloc peak of one ingest (Python allocations only, so PyMuPDF's own
+buffers are not counted) and ``retained_mb`` the pickled size of the pages it
+keeps, i.e. what the vectors cache stores.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from app.core.extraction_profile import PROFILES
+from app.core.pdf_loader import PDFLoader
+from benchmarks.__main__ import _git_commit, _time
+from benchmarks.synthetic import PlanSpec, generate_pages, write_pdf
+
+
+def run_extraction_benchmark(pdf_path: Path, profiles: Sequence[str] = tuple(PROFILES), repeat: int = 3) -> dict:
+    """Time and measure ``PDFLoader.ingest(..., rasterize=False)`` under each profile."""
+
+    results = {}
+    for name in profiles:
+        loader = PDFLoader(extraction=name)
+        ingest = lambda: loader.ingest(pdf_path, rasterize=False)  # noqa: E731
+        timing = _time(ingest, repeat)
+        tracemalloc.start()
+        try:
+            document = ingest()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        objects = sum(len(items) for page in document.vector_pages for items in page.shapes.values())
+        results[name] = {
+            **timing,
+            "peak_mb": peak / 2**20,
+            "retained_mb": len(pickle.dumps(document.vector_pages)) / 2**20,
+            "objects": objects,
+            "words": len(document.text_items),
+        }
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pdf": str(pdf_path),
+        "repeat": repeat,
+        "profiles": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare vector extraction profiles on one PDF")
+    parser.add_argument("pdf", type=Path, nargs="?", help="PDF to parse (default: a generated plan)")
+    parser.add_argument("--rooms", type=int, default=400, help="Rooms per page of the generated plan")
+    parser.add_argument("--lines", type=int, default=2000, help="Lines per page of the generated plan")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profile", action="append", choices=tuple(PROFILES), help="Profiles to run (default: all)")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results JSON here")
+    args = parser.parse_args(argv)
+
+    profiles = args.profile or tuple(PROFILES)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            spec = PlanSpec(pages=args.pages, rooms=args.rooms, texts=args.rooms, lines=args.lines)
+            pdf_path = write_pdf(generate_pages(spec), Path(tmp) / "plan.pdf")
+        result = run_extraction_benchmark(pdf_path, profiles, args.repeat)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    print(f"{'profile':<8} {'best s':>8} {'median s':>9} {'peak MB':>8} {'kept MB':>8} {'objects':>8}")
+    for name, row in result["profiles"].items():
+        print(
+            f"{name:<8} {row['best']:>8.3f} {row['median']:>9.3f} {row['peak_mb']:>8.1f} "
+            f"{row['retained_mb']:>8.2f} {row['objects']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Deterministic synthetic vector pages in the layout produced by :class:`PDFLoader`."""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from math import ceil, sqrt
+from pathlib import Path
+from typing import List
+
+from app.core.models import SymbolDetection
+from app.utils.lazy import optional_import
+
+ROOM_NAMES = ("Bedroom", "Kitchen", "Bath", "WC", "Corridor", "Living", "Store", "Office")
+FIXTURES = ("wc", "basin", "shower", "bath", "kitchen sink", "floor drain")
+NOISE_TEXT = ("A-101", "1:100", "Rev B", "FFL +0.00", "NOTE 3", "DN50")
+
+
+@dataclass
+class PlanSpec:
+    """Size of a synthetic plan; room, text, line and symbol counts are per page."""
+
+    pages: int = 1
+    rooms: int = 100
+    texts: int = 150
+    lines: int = 1000
+    symbols: int = 50
+    seed: int = 0
+
+
+def generate_pages(spec: PlanSpec) -> List[dict]:
+    """Pages of rooms on a jittered grid, labels inside them, loose text and wall-like lines.
+
+    The first ``min(texts, rooms)`` text items label rooms; the rest are
+    scattered annotations that match no room.
+    """
+
+    rng = random.Random(spec.seed)
+    columns = max(1, ceil(sqrt(spec.rooms)))
+    cell = 600.0
+    width = height = columns * cell
+    pages = []
+    for page_number in range(1, spec.pages + 1):
+        rects, texts = [], []
+        for index in range(spec.rooms):
+            x0 = (index % columns) * cell + rng.uniform(0, 40)
+            top = (index // columns) * cell + rng.uniform(0, 40)
+            x1 = x0 + rng.uniform(200, cell - 60)
+            bottom = top + rng.uniform(200, cell - 60)
+            rects.append({"x0": x0, "top": top, "x1": x1, "bottom": bottom})
+            if index < spec.texts:
+                cx, cy = (x0 + x1) / 2, (top + bottom) / 2
+                name = f"{ROOM_NAMES[index % len(ROOM_NAMES)]} {index + 1}"
+                texts.append({"text": name, "x0": cx - 40, "x1": cx + 40, "top": cy - 6, "bottom": cy + 6})
+        for _ in range(max(0, spec.texts - spec.rooms)):
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            texts.append({"text": rng.choice(NOISE_TEXT), "x0": x, "x1": x + 30, "top": y, "bottom": y + 8})
+        lines = []
+        for _ in range(spec.lines):
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            if rng.random() < 0.5:
+                end = (min(width, x + rng.uniform(10, cell)), y)
+            else:
+                end = (x, min(height, y + rng.uniform(10, cell)))
+            lines.append(
+                {
+                    "x0": min(x, end[0]),
+                    "top": min(y, end[1]),
+                    "x1": max(x, end[0]),
+                    "bottom": max(y, end[1]),
+                    "pts": [(x, y), end],
+                }
+            )
+        pages.append({"page_number": page_number, "shapes": {"rects": rects, "lines": lines}, "text_items": texts})
+    return pages
+
+
+def write_pdf(pages: List[dict], path: Path) -> Path:
+    """Draw generated pages into a real PDF (rooms as rects, walls as lines, labels as text).
+
+    Needs PyMuPDF; used to benchmark the extraction itself rather than the stages after it.
+    """
+
+    fitz = optional_import("fitz")
+    if fitz is None:
+        raise RuntimeError("PyMuPDF is required to write synthetic PDFs")
+    doc = fitz.open()
+    for page in pages:
+        rects, lines = page["shapes"]["rects"], page["shapes"]["lines"]
+        width = max((r["x1"] for r in rects + lines), default=595) + 20
+        height = max((r["bottom"] for r in rects + lines), default=842) + 20
+        pdf_page = doc.new_page(width=width, height=height)
+        shape = pdf_page.new_shape()
+        for rect in rects:
+            shape.draw_rect(fitz.Rect(rect["x0"], rect["top"], rect["x1"], rect["bottom"]))
+        for line in lines:
+            shape.draw_line(*line["pts"])
+        shape.finish(color=(0, 0, 0), closePath=False)
+        shape.commit()
+        for text in page["text_items"]:
+            pdf_page.insert_text((text["x0"], text["bottom"]), text["text"], fontsize=8)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def generate_symbols(spec: PlanSpec, pages: List[dict]) -> List[SymbolDetection]:
+    """Fixture detections placed inside random rooms of each page."""
+
+    rng = random.Random(spec.seed + 1)
+    symbols = []
+    for page in pages:
+        rects = page["shapes"]["rects"]
+        for _ in range(spec.symbols if rects else 0):
+            rect = rng.choice(rects)
+            x, y = rng.uniform(rect["x0"], rect["x1"] - 20), rng.uniform(rect["top"], rect["bottom"] - 20)
+            symbols.append(
+                SymbolDetection(rng.choice(FIXTURES), rng.uniform(0.5, 1.0), (x, y, x + 20, y + 20), page["page_number"])
+            )
+    return symbols
@@ -1,7 +1,29 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+@pytest.fixture
+def sample_pdf(tmp_path: Path) -> Path:
+    """Two-page plan drawn with PyMuPDF: rooms as rects with labels inside."""
+
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for page_number in range(2):
+        page = doc.new_page(width=1200, height=800)
+        shape = page.new_shape()
+        shape.draw_rect(fitz.Rect(0, 0, 500, 300))
+        shape.draw_rect(fitz.Rect(500, 0, 900, 300))
+        shape.finish(color=(0, 0, 0), closePath=False)  # plain "re" ops, seen as rects by pdfplumber
+        shape.commit()
+        page.insert_text((220, 160), f"Bedroom {page_number + 1}")
+        page.insert_text((660, 160), "Kitchen")
+    pdf_path = tmp_path / "plan.pdf"
+    doc.save(pdf_path)
+    doc.close()
+    return pdf_path
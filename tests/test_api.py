@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("multipart")
+
+from app.api import main  # noqa: E402
+from app.api.workers import PipelineExecutor  # noqa: E402
+
+
+@pytest.fixture
+def api(tmp_path: Path, monkeypatch):
+    executor = PipelineExecutor(max_workers=2, max_pending=4, kind="thread")
+    executor.start(initializer=None)
+    monkeypatch.setattr(main, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(main, "executor", executor)
+    yield main
+    executor.shutdown()
+
+
+def _post_all(requests):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post(url, files={"file": upload}) for url, upload in requests))
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_uploads_with_the_same_name_do_not_share_files(api, tmp_path: Path, monkeypatch):
+    both_running = threading.Barrier(2, timeout=5)
+
+    def fake_run(pdf_path: Path, export_dir: Path):
+        both_running.wait()  # both runs are in flight before either writes its outputs
+        export_dir.mkdir(parents=True)
+        output = export_dir / "output.json"
+        output.write_bytes(pdf_path.read_bytes())
+        return {"json": str(output)}
+
+    monkeypatch.setattr(api, "run_pipeline", fake_run)
+    first, second = _post_all(
+        [("/analyze", ("plan.pdf", b"first upload")), ("/analyze", ("../../plan.pdf", b"second upload"))]
+    )
+
+    outputs = [Path(response.json()["json"]) for response in (first, second)]
+    assert [path.read_bytes() for path in outputs] == [b"first upload", b"second upload"]
+    assert all(path.is_relative_to(tmp_path / "data" / "analyze") for path in outputs)
+    assert not (tmp_path / "plan.pdf").exists()
+
+
+def test_job_status_and_artifacts(api, tmp_path: Path, monkeypatch):
+    from app.api.jobs import JobStore
+
+    monkeypatch.setattr(api, "job_store", JobStore(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(api, "JOB_RUNNER", "inline")
+    release = threading.Event()
+
+    def fake_job(db_path: Path, job_id: str):
+        store = JobStore(db_path)
+        store.mark_running(job_id)
+        release.wait(5)
+        job = store.get(job_id)
+        output = Path(job["export_dir"]) / "output.csv"
+        output.parent.mkdir(parents=True)
+        output.write_text("room,area\n")
+        store.complete(job_id, {"csv": str(output)})
+        return {"csv": str(output)}
+
+    monkeypatch.setattr(api, "run_job", fake_job)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post("/jobs", files={"file": ("plan.pdf", b"%PDF")})
+            assert created.status_code == 202
+            status_url = created.json()["status_url"]
+            assert (await client.get("/jobs/unknown")).status_code == 404
+            assert (await client.get("/jobs/unknown/artifacts/csv")).status_code == 404
+            assert (await client.get(f"{status_url}/artifacts/csv")).status_code == 409
+
+            release.set()
+            for _ in range(100):
+                status = (await client.get(status_url)).json()
+                if status["status"] == "done":
+                    break
+                await asyncio.sleep(0.02)
+            assert status["artifacts"] == {"csv": f"{status_url}/artifacts/csv"}
+            artifact = await client.get(status["artifacts"]["csv"])
+            assert artifact.status_code == 200 and artifact.text == "room,area\n"
+
+    asyncio.run(scenario())
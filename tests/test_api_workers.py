@@ -0,0 +1,40 @@
+import asyncio
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.api.workers import ExecutorSaturated, PipelineExecutor
+
+
+def test_executor_rejects_jobs_beyond_pending_limit():
+    release = threading.Event()
+
+    async def scenario():
+        executor = PipelineExecutor(max_workers=1, max_pending=1, kind="thread")
+        executor.start(initializer=None)
+        running = asyncio.ensure_future(executor.submit(release.wait, 5))
+        await asyncio.sleep(0)
+        assert executor.saturated
+        with pytest.raises(ExecutorSaturated):
+            await executor.submit(lambda: None)
+        release.set()
+        assert await running is True
+        assert executor.pending == 0
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_executor_replaces_a_pool_broken_by_a_dead_worker():
+    async def scenario():
+        executor = PipelineExecutor(max_workers=1, max_pending=2, kind="process")
+        executor.start(initializer=None)
+        with pytest.raises(BrokenProcessPool):
+            await executor.submit(os._exit, 1)  # the worker process dies mid-run
+        assert executor.pending == 0
+        assert await executor.submit(os.getpid) != os.getpid()
+        executor.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.core.batch import BatchRunner, collect_inputs
+from app.core.pipeline import MEPExtractionPipeline
+
+
+def test_batch_skips_unchanged_drawings(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    project = tmp_path / "project"
+    (project / "level1").mkdir(parents=True)
+    shutil.copy(sample_pdf, project / "a.pdf")
+    shutil.copy(sample_pdf, project / "level1" / "b.pdf")
+    runner = BatchRunner(pipeline=MEPExtractionPipeline(cache_dir=tmp_path / "results"))
+
+    first = runner.run(project, tmp_path / "out")
+    assert sorted(first.processed) == ["a", "level1/b"]
+    payload = json.loads(first.project_json.read_text())
+    single = payload["files"]["a"]["underfloor"]["total_area_sqm"]
+    assert payload["totals"]["underfloor"]["total_area_sqm"] == pytest.approx(2 * single)
+    assert "TOTAL" in first.project_csv.read_text()
+
+    second = runner.run(project, tmp_path / "out")
+    assert second.processed == [] and sorted(second.skipped) == ["a", "level1/b"]
+    assert json.loads(second.project_json.read_text()) == payload
+
+    # Other settings make the previous outputs stale even though the drawings did not change.
+    rerun = BatchRunner(pipeline=MEPExtractionPipeline(cache_dir=tmp_path / "results", room_source="walls"))
+    third = rerun.run(project, tmp_path / "out")
+    assert sorted(third.processed) == ["a", "level1/b"] and third.skipped == []
+    assert set(third.stage_profile().stages) >= {"geometry", "calc.hvac"}
+
+
+def test_manifest_names_are_unique(tmp_path: Path):
+    manifest = tmp_path / "drawings.txt"
+    manifest.write_text("a/plan.pdf\nb/plan.pdf\n\n")
+    assert list(collect_inputs(manifest)) == ["plan", "plan_2"]
@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.__main__ import compare, run_benchmark
+from benchmarks.synthetic import PlanSpec, generate_pages, generate_symbols
+
+
+def test_synthetic_plan_has_requested_scale():
+    spec = PlanSpec(pages=2, rooms=9, texts=12, lines=20, symbols=5)
+    pages = generate_pages(spec)
+
+    assert len(pages) == 2
+    assert all(len(page["shapes"]["rects"]) == 9 for page in pages)
+    assert all(len(page["text_items"]) == 12 and len(page["shapes"]["lines"]) == 20 for page in pages)
+    assert len(generate_symbols(spec, pages)) == 10
+    assert generate_pages(spec) == pages
+
+
+def test_benchmark_times_every_stage():
+    result = run_benchmark(PlanSpec(rooms=16, texts=16, lines=10, symbols=4), repeat=1, with_pdf=False)
+
+    assert result["counts"]["rooms"] == 16
+    assert {"from_vectors", "assign_labels", "normalize", "calc.hvac", "export.csv"} <= set(result["stages"])
+    assert len(compare(result, result)) == len(result["stages"]) + 1
+
+
+def test_extraction_benchmark_compares_profiles(tmp_path):
+    pytest.importorskip("fitz")
+    pytest.importorskip("pdfplumber")
+    from benchmarks.extraction import run_extraction_benchmark
+    from benchmarks.synthetic import write_pdf
+
+    pdf_path = write_pdf(generate_pages(PlanSpec(rooms=9, texts=9, lines=20)), tmp_path / "plan.pdf")
+    result = run_extraction_benchmark(pdf_path, repeat=1)
+
+    assert set(result["profiles"]) == {"full", "lean"}
+    assert result["profiles"]["lean"]["objects"] == 29
+    assert result["profiles"]["lean"]["retained_mb"] < result["profiles"]["full"]["retained_mb"]
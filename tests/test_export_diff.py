@@ -0,0 +1,35 @@
+from app.output.export_diff import QuantityDiffExporter
+
+
+def _payload(rooms):
+    return {
+        "hvac": [{"room_id": room_id, "required_btus": btus, "recommended_unit": "9k"} for room_id, _, btus in rooms],
+        "rooms": [{"room_id": room_id, "page_number": 1, "bounds": bounds} for room_id, bounds, _ in rooms],
+        "plumbing": {},
+        "underfloor": {},
+    }
+
+
+def test_inserted_room_is_added_not_a_renumbering():
+    previous = _payload([("p1_rect0", (0, 0, 100, 100), 1000.0), ("p1_rect1", (200, 0, 300, 100), 1000.0)])
+    current = _payload(
+        [
+            ("p1_rect0", (0, 0, 100, 100), 1000.0),
+            ("p1_rect1", (100, 0, 200, 100), 1000.0),  # the new room takes the next positional id
+            ("p1_rect2", (200, 0, 310, 100), 1100.0),  # the old p1_rect1, slightly enlarged
+        ]
+    )
+    diff = QuantityDiffExporter().diff(previous, current)
+
+    assert diff["matched_by"] == "location"
+    assert [rec["room_id"] for rec in diff["hvac"]["added"]] == ["p1_rect1"]
+    assert diff["hvac"]["removed"] == []
+    [changed] = diff["hvac"]["changed"]
+    assert (changed["previous_room_id"], changed["room_id"]) == ("p1_rect1", "p1_rect2")
+
+
+def test_payloads_without_locations_match_room_ids():
+    previous, current = _payload([("p1_rect0", (0, 0, 1, 1), 1.0)]), _payload([("p1_rect0", (5, 5, 6, 6), 2.0)])
+    del previous["rooms"]
+    diff = QuantityDiffExporter().diff(previous, current)
+    assert diff["matched_by"] == "room_id" and [rec["room_id"] for rec in diff["hvac"]["changed"]] == ["p1_rect0"]
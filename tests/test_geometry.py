@@ -1,7 +1,10 @@
 import json
 from pathlib import Path
 
+import pytest
+
 from app.core.geometry_extractor import GeometryExtractor
+from app.core.wall_graph import polygonize
 
 
 def test_geometry_extractor_assigns_labels(tmp_path: Path):
@@ -14,3 +17,74 @@ def test_geometry_extractor_assigns_labels(tmp_path: Path):
     assert labels == ["Bedroom 1", "Kitchen"]
     assert all(room.area_sqm > 5 for room in rooms)
 
+
+def test_assign_labels_keeps_repeated_texts_and_respects_pages():
+    vectors = [
+        {
+            "page_number": page,
+            "shapes": {"rects": [{"x0": 0, "x1": 400, "top": 0, "bottom": 300}, {"x0": 400, "x1": 800, "top": 0, "bottom": 300}]},
+        }
+        for page in (1, 2)
+    ]
+    labels = [
+        {"text": "Bedroom", "x0": 150, "x1": 250, "top": 100, "bottom": 200, "page_number": 1},
+        {"text": "Bedroom", "x0": 550, "x1": 650, "top": 100, "bottom": 200, "page_number": 1},
+        {"text": "Kitchen", "x0": 150, "x1": 250, "top": 100, "bottom": 200, "page_number": 2},
+    ]
+    extractor = GeometryExtractor(min_room_area=1)
+    rooms = extractor.assign_labels(extractor.from_vectors(vectors), labels)
+    assert [(room.page_number, room.label) for room in rooms] == [
+        (1, "Bedroom"),
+        (1, "Bedroom"),
+        (2, "Kitchen"),
+        (2, None),
+    ]
+
+
+def test_from_vectors_filters_small_rects_and_reads_pdfplumber_keys():
+    page = {
+        "page_number": 3,
+        "shapes": {
+            "rect": [
+                {"x0": 0, "x1": 10, "top": 0, "bottom": 10},
+                {"x0": 0, "x1": 400, "top": 300, "bottom": 0},
+            ]
+        },
+    }
+    rooms = GeometryExtractor(min_room_area=1).from_vectors([page])
+    assert [room.room_id for room in rooms] == ["p3_rect1"]
+    assert rooms[0].area_sqm == 12.0
+    assert rooms[0].polygon.area == 120000.0
+
+
+def _line(x0, y0, x1, y1):
+    return {"pts": [(x0, y0), (x1, y1)], "x0": min(x0, x1), "x1": max(x0, x1), "top": min(y0, y1), "bottom": max(y0, y1)}
+
+
+def test_wall_linework_yields_l_shaped_rooms_and_drops_wall_cavities():
+    walls = [
+        # outer and inner faces of a 10pt exterior wall
+        _line(0, 0, 1000, 0), _line(1000, 0, 1000, 600), _line(1000, 600, 0, 600), _line(0, 600, 0, 0),
+        _line(10, 10, 990, 10), _line(990, 10, 990, 590), _line(990, 590, 10, 590), _line(10, 590, 10, 10),
+        # a bent interior wall, drawn with small gaps and overshoots
+        _line(495, 10.3, 495, 305), _line(505, 9.8, 505, 295), _line(505, 295, 990.4, 295), _line(495, 305, 990, 305),
+        # a door leaf hanging off a wall
+        _line(600, 305, 600, 360),
+    ]
+    page = {"page_number": 1, "shapes": {"line": walls}}
+    rooms = GeometryExtractor(room_source="walls").from_vectors([page])
+    assert sorted(room.area_sqm for room in rooms) == pytest.approx([13.8225, 42.2375], abs=0.02)
+    assert all(room.room_id.startswith("p1_wall") for room in rooms)
+    # "auto" keeps one room per rect on pages drawn only with rects.
+    rect_page = {"page_number": 2, "shapes": {"rects": [{"x0": 0, "x1": 400, "top": 0, "bottom": 300}]}}
+    auto = GeometryExtractor(room_source="auto").from_vectors([page, rect_page])
+    assert [room.room_id for room in auto][-1] == "p2_rect0"
+
+
+def test_polygonize_splits_crossing_walls_and_keeps_columns_as_holes():
+    square = [((0, 0), (100, 0)), ((100, 0), (100, 100)), ((100, 100), (0, 100)), ((0, 100), (0, 0))]
+    column = [((70, 70), (80, 70)), ((80, 70), (80, 80)), ((80, 80), (70, 80)), ((70, 80), (70, 70))]
+    crossing = [((40, -5), (40, 105))]
+    faces = polygonize(square + column + crossing)
+    assert sorted(face.area for face in faces) == [100.0, 4000.0, 5900.0]
+    assert sorted(len(face.holes) for face in faces) == [0, 0, 1]
@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.utils.lazy import HEAVY_MODULES
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def _import_in_subprocess(module: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {list(HEAVY_MODULES)!r} if m in sys.modules]}}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_pipeline_import_defers_heavy_dependencies():
+    result = _import_in_subprocess("app.core.pipeline")
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_api_import_defers_heavy_dependencies():
+    result = _import_in_subprocess("app.api.main")
+    assert result["loaded"] == []
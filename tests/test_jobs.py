@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from app.api import workers
+from app.api.jobs import JobStore, default_db_path
+
+
+def test_job_store_queue_lifecycle(tmp_path: Path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    first = store.create(tmp_path / "a.pdf", tmp_path / "a")
+    second = store.create(tmp_path / "b.pdf", tmp_path / "b")
+
+    claimed = store.claim_next()
+    assert claimed["id"] == first and claimed["status"] == "running"
+    assert set(claimed["stages"].values()) == {"pending"}
+
+    store.update_stage(first, "load", "done")
+    store.complete(first, {"json": "out.json"})
+    job = store.get(first)
+    assert job["status"] == "done"
+    assert job["stages"]["load"] == "done"
+    assert job["artifacts"] == {"json": "out.json"}
+
+    assert store.claim_next()["id"] == second
+    assert store.claim_next() is None
+    assert store.get("missing") is None
+
+
+def test_expired_leases_are_requeued_then_failed(tmp_path: Path):
+    store = JobStore(tmp_path / "jobs.sqlite3", lease_seconds=60, max_attempts=2)
+    job_id = store.create(tmp_path / "a.pdf", tmp_path / "a")
+
+    store.claim_next()
+    store.touch(job_id)
+    assert store.reclaim_expired() == []  # the lease is still held
+
+    _age(store, job_id)
+    assert store.claim_next()["id"] == job_id  # the crashed worker's job is claimed again
+    assert store.get(job_id)["attempts"] == 2
+
+    _age(store, job_id)
+    assert store.reclaim_expired() == [job_id]  # max_attempts used up
+    job = store.get(job_id)
+    assert job["status"] == "failed" and "stopped responding" in job["error"]
+
+
+def _age(store: JobStore, job_id: str) -> None:
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET updated = updated - 3600 WHERE id = ?", (job_id,))
+
+
+def test_claimed_jobs_count_one_attempt_per_run(tmp_path: Path, monkeypatch):
+    class FakePipeline:
+        def run(self, pdf_path, export_dir, progress):
+            progress("load", "done")
+            return {"json": export_dir / "output.json"}
+
+    monkeypatch.setattr(workers, "_worker_pipeline", FakePipeline)
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    job_id = store.create(tmp_path / "a.pdf", tmp_path / "a")
+
+    workers.run_job(store.db_path, store.claim_next()["id"])
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["attempts"] == 1
+
+    inline_id = store.create(tmp_path / "b.pdf", tmp_path / "b")
+    workers.run_job(store.db_path, inline_id)  # the inline API runs jobs without claiming them
+    assert store.get(inline_id)["attempts"] == 1
+
+
+def test_workers_default_to_the_api_queue(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("MEP_DATA_DIR", str(tmp_path))
+    assert default_db_path() == tmp_path / "jobs.sqlite3"
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.pipeline import MEPExtractionPipeline
+
+
+class _FakePaddle:
+    """Reads every crop as one "Kitchen" line centred in it."""
+
+    def __init__(self):
+        self.crops = []
+
+    def ocr(self, crop, cls=True):
+        self.crops.append(crop.shape)
+        height, width = crop.shape[:2]
+        cx, cy = width / 2, height / 2
+        box = [[cx - 20, cy - 5], [cx + 20, cy - 5], [cx + 20, cy + 5], [cx - 20, cy + 5]]
+        return [[[box, ("Kitchen", 0.95)]]]
+
+
+def _textless_plan(tmp_path: Path) -> Path:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    page = doc.new_page(width=1200, height=800)
+    shape = page.new_shape()
+    shape.draw_rect(fitz.Rect(102, 102, 498, 402))
+    shape.draw_rect(fitz.Rect(498, 102, 894, 402))
+    shape.finish(color=(0, 0, 0), closePath=False)
+    shape.commit()
+    path = tmp_path / "outlined.pdf"
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.mark.parametrize("tile_size", [None, 1024])
+def test_rooms_on_textless_pages_are_labelled_by_region_ocr(tmp_path: Path, tile_size):
+    pytest.importorskip("pdfplumber")
+    pipeline = MEPExtractionPipeline(use_cache=False, tile_size=tile_size)  # tiled: crops are rendered alone
+    pipeline.ocr_reader._ocr = engine = _FakePaddle()
+    pipeline.ocr_reader._ocr_loaded = True
+
+    pdf_path = _textless_plan(tmp_path)
+    vector_pages = pipeline.pdf_loader.ingest(pdf_path, rasterize=False).vector_pages
+    rooms = pipeline._extract_rooms(pdf_path, vector_pages)
+
+    assert [(room.label, room.attributes["category"]) for room in rooms] == [("Kitchen", "kitchen")] * 2
+    # One room-sized crop per room instead of the whole 5000x3334 px sheet.
+    assert len(engine.crops) == 2
+    assert all(height < 1300 and width < 1700 for height, width, _ in engine.crops)
+
+
+def test_ocr_items_are_in_pdf_points():
+    np = pytest.importorskip("numpy")
+    from app.core.models import PageImage
+    from app.core.ocr_reader import OCRReader
+
+    reader = OCRReader(padding=0)
+    reader._ocr = engine = _FakePaddle()
+    reader._ocr_loaded = True
+    page = PageImage(3, None, 1200, 900, dpi=144, pixels=np.zeros((900, 1200, 3), dtype=np.uint8))
+
+    [item] = reader.read_regions(page, [(100, 50, 300, 250)])
+    assert item["page_number"] == 3 and item["text"] == "Kitchen"
+    assert (item["x0"] + item["x1"]) / 2 == pytest.approx(200, abs=1)
+    assert (item["top"] + item["bottom"]) / 2 == pytest.approx(150, abs=1)
+
+    # Identical crops (repeated unit layouts, re-runs) are recognised once.
+    assert reader.read_regions(page, [(300, 50, 500, 250)]) and len(engine.crops) == 1
+
+
+def test_only_crops_are_converted_and_engine_upgrades_miss_the_cache(tmp_path: Path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from app.core import ocr_reader
+    from app.core.models import PageImage
+    from app.core.result_cache import ResultCache
+    from app.utils import image_utils
+
+    converted = []
+    to_bgr = image_utils.to_bgr
+    monkeypatch.setattr(image_utils, "to_bgr", lambda pixels: converted.append(pixels.shape) or to_bgr(pixels))
+    page = PageImage(1, None, 1200, 900, dpi=72, pixels=np.zeros((900, 1200, 3), dtype=np.uint8))
+    cache = ResultCache(tmp_path / "results")
+
+    def read(version: str) -> int:
+        monkeypatch.setattr(ocr_reader, "installed_version", lambda name: version)
+        reader = ocr_reader.OCRReader(cache=cache, padding=0)
+        reader._ocr = engine = _FakePaddle()
+        reader._ocr_loaded = True
+        reader.read_regions(page, [(100, 100, 300, 200)])
+        return len(engine.crops)
+
+    assert read("2.7.3") == 1
+    assert converted == [(101, 201, 3)]
+    assert read("2.7.3") == 0  # served from the persistent cache
+    assert read("2.8.0") == 1  # a new engine version recognises again
+
+
+def test_in_memory_crop_results_are_bounded():
+    np = pytest.importorskip("numpy")
+    from app.core.models import PageImage
+    from app.core.ocr_reader import OCRReader
+
+    reader = OCRReader(padding=0, memo_size=1)
+    reader._ocr = engine = _FakePaddle()
+    reader._ocr_loaded = True
+    page = PageImage(1, None, 1200, 900, dpi=72, pixels=np.zeros((900, 1200, 3), dtype=np.uint8))
+
+    for region in [(0, 0, 100, 100), (0, 0, 200, 100), (0, 0, 100, 100)]:
+        reader.read_regions(page, [region])
+    assert len(engine.crops) == 3 and len(reader._memo) == 1  # the first crop was evicted
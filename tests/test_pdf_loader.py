@@ -0,0 +1,169 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.core.pdf_loader import PDFLoader
+from app.utils.file_utils import hash_file
+
+
+def test_ingest_produces_hash_vectors_and_rasters_in_one_pass(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    loader = PDFLoader(raster_dpi=36, cache_dir=tmp_path / "pages")
+    document = loader.ingest(sample_pdf)
+
+    assert document.file_hash == hash_file(sample_pdf)
+    assert document.page_count == 2
+    assert [page.page_number for page in document.pages] == [1, 2]
+    assert any(item["text"] == "Kitchen" for item in document.text_items)
+    assert [image.page_number for image in document.images] == [1, 2]
+    assert all(image.pixels.shape == (image.height, image.width, 3) for image in document.images)
+
+
+def test_rasters_stay_in_memory_unless_debug_png(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("numpy")
+    in_memory = PDFLoader(raster_dpi=36, cache_dir=tmp_path / "mem").rasterize(sample_pdf)
+    assert all(image.image_path is None for image in in_memory)
+    assert not list((tmp_path / "mem").iterdir())
+
+    debug = PDFLoader(raster_dpi=36, cache_dir=tmp_path / "dbg", debug_png=True).rasterize(sample_pdf)
+    assert all(image.image_path.exists() and image.pixels is not None for image in debug)
+
+
+def _drawing_set(tmp_path: Path) -> Path:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    cover = doc.new_page(width=1190, height=842)
+    cover.insert_text((400, 300), "RESIDENTIAL BLOCK A - COVER SHEET", fontsize=20)
+    schedule = doc.new_page(width=1190, height=842)
+    shape = schedule.new_shape()
+    for row in range(8):
+        y = 100 + row * 20
+        shape.draw_line((100, y), (700, y))
+        for column, text in enumerate((f"D{row:02d}", "900 x 2100", "Timber", "FD30")):
+            schedule.insert_text((110 + column * 150, y + 14), text)
+    shape.finish(color=(0, 0, 0))
+    shape.commit()
+    plan = doc.new_page(width=2384, height=1684)  # A1 landscape
+    shape = plan.new_shape()
+    shape.draw_rect(fitz.Rect(100, 100, 600, 400))
+    shape.draw_curve((600, 200), (650, 250), (600, 300))
+    shape.finish(color=(0, 0, 0), closePath=False)
+    shape.commit()
+    plan.insert_text((300, 250), "Kitchen")
+    path = tmp_path / "set.pdf"
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_triage_rasterizes_only_plan_pages_at_their_own_dpi(tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    from app.core.page_triage import PageTriage
+
+    triage = PageTriage(min_symbol_mm=3.0, min_symbol_px=12, max_megapixels=2.0)
+    loader = PDFLoader(cache_dir=tmp_path / "pages", triage=triage)
+    for extract_vectors in (True, False):
+        document = loader.ingest(_drawing_set(tmp_path), extract_vectors=extract_vectors)
+        assert [page.page_type for page in document.pages] == ["title", "schedule", "plan"]
+        # 12 px per 3 mm asks for 102 dpi, but 2 MP on an A1 sheet only allows 50.
+        assert [(image.page_number, image.dpi) for image in document.images] == [(3, 50)]
+    assert triage.render_dpi(595, 842, max_dpi=300) == 102
+
+
+def test_raster_cache_keys_renders_by_content_and_reuses_them(sample_pdf: Path, tmp_path: Path, monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("numpy")
+    loader = PDFLoader(raster_dpi=36, cache_dir=tmp_path / "pages", cache_renders=True)
+    first = loader.rasterize(sample_pdf)
+    assert all(image.image_path.name.startswith(hash_file(sample_pdf)) for image in first)
+
+    # Another upload with the same name gets its own entries instead of overwriting these.
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    doc = fitz.open()
+    doc.new_page(width=300, height=300)
+    doc.save(other_dir / sample_pdf.name)
+    doc.close()
+    [other] = loader.rasterize(other_dir / sample_pdf.name)
+    assert other.image_path not in {image.image_path for image in first}
+
+    def _no_render(*args, **kwargs):
+        raise AssertionError("cached page should not be rendered again")
+
+    monkeypatch.setattr(fitz.Page, "get_pixmap", _no_render)
+    again = loader.rasterize(sample_pdf)
+    assert [image.pixels.tolist() for image in again] == [image.pixels.tolist() for image in first]
+
+
+def test_raster_cache_evicts_least_recently_used_renders(tmp_path: Path):
+    from app.core.raster_cache import RasterCache
+
+    cache = RasterCache(tmp_path / "pages", max_bytes=2500)
+    write = lambda path: path.write_bytes(b"\0" * 1000)  # noqa: E731
+    old, kept = (cache.put("a" * 64, page, 150, write) for page in (1, 2))
+    os.utime(old, (1, 1))
+    os.utime(kept, (2, 2))
+    assert cache.get("a" * 64, 2, 150) == kept  # a hit makes page 2 the most recently used
+
+    cache.put("b" * 64, 1, 150, write)
+    assert cache.get("a" * 64, 1, 150) is None and cache.get("a" * 64, 2, 150) == kept
+    assert cache.size() == 2000
+
+
+def test_lean_extraction_keeps_what_room_extraction_reads(sample_pdf: Path):
+    pytest.importorskip("pdfplumber")
+    from app.core.geometry_extractor import GeometryExtractor
+
+    def rooms(extraction: str):
+        document = PDFLoader(extraction=extraction).ingest(sample_pdf, rasterize=False)
+        found = GeometryExtractor().from_vectors(document.vector_pages)
+        return document, sorted((room.page_number, room.polygon.bounds) for room in found)
+
+    full, full_rooms = rooms("full")
+    lean, lean_rooms = rooms("lean")
+    assert lean_rooms == full_rooms and len(lean_rooms) == 4
+    assert [item["text"] for item in lean.text_items] == [item["text"] for item in full.text_items]
+    assert set(lean.vector_pages[0].shapes) == {"rect", "line", "curve", "image"}
+    assert "char" in full.vector_pages[0].shapes
+
+
+def test_pymupdf_paths_are_classified_like_pdfplumber(tmp_path: Path):
+    fitz = pytest.importorskip("fitz")
+    from app.core.extraction_profile import PROFILES, fitz_vectors
+
+    doc = fitz.open()
+    page = doc.new_page(width=400, height=400)
+    shape = page.new_shape()
+    shape.draw_rect(fitz.Rect(10, 10, 110, 60))
+    shape.draw_line((10, 200), (300, 200))
+    shape.draw_polyline([(10, 250), (60, 300), (110, 250)])
+    shape.draw_polyline([(200, 250), (300, 250), (300, 350), (200, 350), (200, 250)])
+    shape.finish(color=(0, 0, 0), closePath=False)
+    shape.commit()
+    page.insert_text((20, 40), "Store")
+
+    shapes, words = fitz_vectors(page, PROFILES["lean"])
+    assert sorted((obj["x0"], obj["top"], obj["x1"], obj["bottom"]) for obj in shapes["rect"]) == [
+        (10, 10, 110, 60),
+        (200, 250, 300, 350),
+    ]
+    assert [obj["pts"] for obj in shapes["line"]] == [[(10, 200), (300, 200)]]
+    assert [len(obj["pts"]) for obj in shapes["curve"]] == [3]
+    assert [word["text"] for word in words] == ["Store"]
+
+
+def test_raster_cache_rescans_by_bytes_written_and_keeps_the_new_entry(tmp_path: Path, monkeypatch):
+    from app.core.raster_cache import RasterCache
+
+    cache = RasterCache(tmp_path / "pages", max_bytes=10_000, scan_every=2500)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+    for page in range(1, 6):
+        cache.put("a" * 64, page, 150, lambda path: path.write_bytes(b"\0" * 1000))
+    assert len(scans) == 2  # the first write, then after 2.5 kB written here; not once per page
+
+    oversized = cache.put("b" * 64, 1, 150, lambda path: path.write_bytes(b"\0" * 20_000))
+    assert oversized.exists()  # evicting everything else, but not the render just stored
+    assert cache.size() == 20_000
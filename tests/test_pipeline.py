@@ -0,0 +1,122 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.pipeline import STAGES, MEPExtractionPipeline
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("PDF should not be re-ingested")
+
+
+def test_pipeline_reuses_cached_stages(sample_pdf: Path, tmp_path: Path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pipeline = MEPExtractionPipeline(cache_dir=tmp_path / "results")
+    first = pipeline.run(sample_pdf, tmp_path / "first")
+    expected = json.loads(first["json"].read_text())
+
+    monkeypatch.setattr(pipeline.pdf_loader, "ingest", _fail)
+    monkeypatch.setattr(pipeline.pdf_loader, "stream", _fail)
+    second = pipeline.run(sample_pdf, tmp_path / "second")
+    assert json.loads(second["json"].read_text()) == expected
+
+    # Changing a geometry setting only re-runs room extraction from cached vectors.
+    pipeline.geometry_extractor.min_room_area = 100.0
+    third = pipeline.run(sample_pdf, tmp_path / "third")
+    assert json.loads(third["json"].read_text())["underfloor"]["total_area_sqm"] == 0
+
+
+def test_pipeline_reports_stage_progress(sample_pdf: Path, tmp_path: Path):
+    pipeline = MEPExtractionPipeline(cache_dir=tmp_path / "results")
+    events = []
+    pipeline.run(sample_pdf, tmp_path / "out", progress=lambda stage, state: events.append((stage, state)))
+    assert {stage for stage, state in events if state == "done"} == set(STAGES)
+
+    events.clear()
+    pipeline.run(sample_pdf, tmp_path / "again", progress=lambda stage, state: events.append((stage, state)))
+    assert ("calc", "cached") in events and ("export", "done") in events
+
+
+def test_rasters_are_released_batch_by_batch(tmp_path: Path, monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("numpy")
+    import gc
+
+    from app.core.models import PageImage
+
+    doc = fitz.open()
+    for _ in range(8):
+        page = doc.new_page(width=400, height=300)
+        page.draw_rect(fitz.Rect(20, 20, 380, 280))
+        page.insert_text((150, 150), "Plant room")
+    pdf_path = tmp_path / "set.pdf"
+    doc.save(pdf_path)
+    doc.close()
+
+    pipeline = MEPExtractionPipeline(use_cache=False)
+    pipeline.symbol_detector.batch_size = 2
+    live, detect = [], pipeline.symbol_detector.detect
+
+    def counting_detect(images):
+        gc.collect()
+        live.append(sum(isinstance(obj, PageImage) and obj.pixels is not None for obj in gc.get_objects()))
+        return detect(images)
+
+    monkeypatch.setattr(pipeline.symbol_detector, "detect", counting_detect)
+    pipeline.run(pdf_path, tmp_path / "out")
+    assert len(live) == 4 and max(live) <= 2
+
+
+def test_page_parallel_run_matches_serial(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    serial = MEPExtractionPipeline(use_cache=False).run(sample_pdf, tmp_path / "serial")
+    pipeline = MEPExtractionPipeline(use_cache=False, workers=2)
+    try:
+        parallel = pipeline.run(sample_pdf, tmp_path / "parallel")
+    finally:
+        pipeline.close()
+    expected = json.loads(serial["json"].read_text())
+    assert json.loads(parallel["json"].read_text()) == expected
+    assert [rec["room_id"] for rec in expected["hvac"]] == ["p1_rect0", "p1_rect1", "p2_rect0", "p2_rect1"]
+
+
+def test_streaming_run_matches_batch_run(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    batch = MEPExtractionPipeline(use_cache=False).run(sample_pdf, tmp_path / "batch")
+    streamed = MEPExtractionPipeline(use_cache=False, streaming=True).run(sample_pdf, tmp_path / "stream")
+    assert json.loads(streamed["json"].read_text()) == json.loads(batch["json"].read_text())
+
+
+def test_revision_reextracts_only_changed_pages(sample_pdf: Path, tmp_path: Path, monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    pipeline = MEPExtractionPipeline(cache_dir=tmp_path / "results")
+    assert "diff" not in pipeline.run(sample_pdf, tmp_path / "out")
+
+    revision = tmp_path / "revision.pdf"
+    doc = fitz.open(sample_pdf)
+    shape = doc[1].new_shape()
+    shape.draw_rect(fitz.Rect(900, 0, 1100, 300))
+    shape.finish(color=(0, 0, 0), closePath=False)
+    shape.commit()
+    doc.save(revision)
+    doc.close()
+
+    parsed = []
+    stream = pipeline.pdf_loader.stream
+    monkeypatch.setattr(
+        pipeline.pdf_loader, "stream", lambda *args, **kwargs: parsed.append(kwargs.get("pages")) or stream(*args, **kwargs)
+    )
+    outputs = pipeline.run(revision, tmp_path / "revised")  # a fresh folder, like an API upload
+    assert parsed == [[1]] and pipeline.last_changed_pages == [2]
+
+    fresh = MEPExtractionPipeline(use_cache=False).run(revision, tmp_path / "fresh")
+    assert outputs["json"].read_text() == fresh["json"].read_text()
+    diff = json.loads(outputs["diff"].read_text())
+    assert diff["changed_pages"] == [2]
+    assert [rec["room_id"] for rec in diff["hvac"]["added"]] == ["p2_rect2"]
+    assert diff["underfloor"]["total_area_sqm"]["delta"] == pytest.approx(6.0)
+
+    # Re-running the revision (all cached) compares it with the same previous revision.
+    rerun = pipeline.run(revision, tmp_path / "rerun")
+    assert json.loads(rerun["diff"].read_text()) == diff
@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+
+from app.core.pipeline import MEPExtractionPipeline
+from app.core.profiling import StageMetrics, StageProfiler, profile_stage
+
+
+def test_profile_stage_is_a_no_op_without_active_profiler():
+    profiler = StageProfiler()
+    with profile_stage("outside") as sample:
+        sample.add_items(3)
+    with profiler.activate():
+        with profile_stage("inside") as sample:
+            sample.add_items(2)
+        with profile_stage("inside"):
+            pass
+    assert [(t.stage, t.items, t.calls) for t in profiler.timings()] == [("inside", 2, 2)]
+
+
+def test_pipeline_writes_stage_profile(sample_pdf: Path, tmp_path: Path):
+    pipeline = MEPExtractionPipeline(use_cache=False)
+    result = pipeline.run(sample_pdf, tmp_path / "out")
+
+    profile = json.loads(result["profile"].read_text())
+    stages = {entry["stage"]: entry for entry in profile["stages"]}
+    assert {"vector_parse", "geometry", "labels", "calc.hvac", "export.json"} <= set(stages)
+    assert stages["vector_parse"]["items"] == 2
+    assert stages["geometry"]["items"] == 4
+    assert pipeline.last_profile.to_dict() == profile
+
+    metrics = StageMetrics()
+    metrics.observe(profile)
+    metrics.observe(profile)
+    text = metrics.render()
+    assert "mep_pipeline_runs_total 2" in text
+    assert 'mep_stage_items_total{stage="geometry"} 8' in text
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.symbol_detector import SymbolDetector
+
+
+class _Column(list):
+    def tolist(self):
+        return list(self)
+
+
+class _FakeYOLO:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, sources, **options):
+        self.calls.append((list(sources), options))
+        return [
+            SimpleNamespace(boxes=SimpleNamespace(xyxy=_Column([[0, 0, 10, 10]]), conf=_Column([0.9]), cls=_Column([1])))
+            for _ in sources
+        ]
+
+
+def test_detect_arrays_runs_in_batches_and_keeps_page_numbers():
+    detector = SymbolDetector(class_names=["wc", "basin"], batch_size=2, imgsz=1024)
+    detector._model = _FakeYOLO()
+    detections = detector.detect_arrays((page, f"array-{page}") for page in (1, 2, 3))
+
+    assert [len(sources) for sources, _ in detector._model.calls] == [2, 1]
+    assert detector._model.calls[0][1]["imgsz"] == 1024
+    assert [(det.page_number, det.label) for det in detections] == [(1, "basin"), (2, "basin"), (3, "basin")]
+    assert detector.last_stats.pages == 3 and detector.last_stats.batches == 2
+
+
+class _MarkerYOLO:
+    """Reports the bbox of non-background pixels in each tile, like a perfect detector."""
+
+    def __init__(self, background=0):
+        self.background = background
+        self.tile_shapes = []
+
+    def predict(self, sources, **options):
+        results = []
+        for tile in sources:
+            self.tile_shapes.append(tile.shape)
+            ys, xs = (tile != self.background).any(axis=2).nonzero()
+            boxes = [[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]] if len(xs) else []
+            results.append(
+                SimpleNamespace(
+                    boxes=SimpleNamespace(xyxy=_Column(boxes), conf=_Column([0.8] * len(boxes)), cls=_Column([0] * len(boxes)))
+                )
+            )
+        return results
+
+
+def test_tiled_detection_merges_duplicates_across_tile_overlaps():
+    np = pytest.importorskip("numpy")
+    page = np.zeros((1000, 1000, 3), dtype=np.uint8)
+    page[350:370, 350:370] = 255  # inside the overlap of the first two tiles in each direction
+    page[900:910, 50:60] = 255
+    detector = SymbolDetector(class_names=["floor drain"], batch_size=4, tile_size=400, tile_overlap=100)
+    detector._model = _MarkerYOLO()
+
+    detections = detector.detect_arrays([(1, page)])
+
+    assert sorted(det.bbox for det in detections) == [(50, 900, 60, 910), (350, 350, 370, 370)]
+    assert detector.last_stats.pages == 1
+    assert detector.last_stats.batches == 3  # nine tiles in batches of four
+
+
+def test_boxes_from_lower_dpi_pages_are_rescaled_to_the_coordinate_dpi():
+    np = pytest.importorskip("numpy")
+    from app.core.models import PageImage
+
+    detector = SymbolDetector(class_names=["wc", "basin"], coordinate_dpi=300)
+    detector._model = _FakeYOLO()
+    pages = [
+        PageImage(1, None, 50, 50, dpi=150, pixels=np.zeros((50, 50, 3), dtype=np.uint8)),
+        PageImage(2, None, 50, 50, dpi=300, pixels=np.zeros((50, 50, 3), dtype=np.uint8)),
+    ]
+    assert [det.bbox for det in detector.detect(pages)] == [(0, 0, 20, 20), (0, 0, 10, 10)]
+
+
+def test_tiles_of_pdf_pages_are_rendered_one_at_a_time(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("numpy")
+    from app.core.pdf_loader import PDFLoader
+
+    doc = fitz.open()
+    doc.new_page(width=720, height=720).draw_rect(fitz.Rect(252, 252, 266.4, 266.4), fill=(0, 0, 0), width=0)
+    doc.save(tmp_path / "sheet.pdf")
+    loader = PDFLoader(raster_dpi=100, cache_dir=tmp_path / "pages", tiled=True)
+    [page] = loader.stream(tmp_path / "sheet.pdf", extract_vectors=False)  # the loader's handle is closed
+    image = page.image
+    assert image.pixels is None and (image.width, image.height) == (1000, 1000)
+    rendered = []
+    render_clip = image.render_clip
+    image.render_clip = lambda rect: rendered.append(rect) or render_clip(rect)
+
+    detector = SymbolDetector(class_names=["floor drain"], batch_size=4, tile_size=400, tile_overlap=100)
+    detector._model = _MarkerYOLO(background=255)
+    [detection] = detector.detect([image])
+
+    assert detection.bbox == pytest.approx((350, 350, 370, 370), abs=1)
+    assert len(rendered) == 9 and max(detector._model.tile_shapes) == (400, 400, 3)
+    assert not list(tmp_path.joinpath("pages").rglob("*.png"))
@@ -0,0 +1,71 @@
+import sys
+
+import pytest
+
+from app.core.hvac_calculator import HVACCalculator
+from app.core.models import SymbolDetection
+from app.core.plumbing_calculator import PlumbingCalculator
+from app.core.underfloor_calculator import UnderfloorCalculator
+from benchmarks.synthetic import PlanSpec, generate_pages, generate_symbols
+
+pytest.importorskip("numpy")
+
+from app.core.geometry_extractor import GeometryExtractor  # noqa: E402
+from app.core.room_classifier import RoomClassifier  # noqa: E402
+from app.core.tables import RoomTable, SymbolTable  # noqa: E402
+
+
+def _plan():
+    spec = PlanSpec(pages=2, rooms=40, texts=30, lines=0, symbols=25, seed=3)
+    pages = generate_pages(spec)
+    extractor = GeometryExtractor()
+    rooms = extractor.from_vectors(pages)
+    labels = [{**text, "page_number": page["page_number"]} for page in pages for text in page["text_items"]]
+    rooms = list(RoomClassifier().normalize(extractor.assign_labels(rooms, labels)))
+    return rooms, generate_symbols(spec, pages)
+
+
+def test_tables_round_trip():
+    rooms, symbols = _plan()
+    table = RoomTable.from_rooms(rooms)
+    assert len(table) == len(rooms)
+    assert table.room_ids.tolist() == [room.room_id for room in rooms]
+    assert table.bboxes[0].tolist() == list(rooms[0].polygon.bounds)
+    assert SymbolTable.from_detections(symbols).detections() == symbols
+    assert len(SymbolTable.concat([SymbolTable.from_detections([]), SymbolTable.from_detections(symbols)])) == 50
+
+
+def test_calculators_accept_tables():
+    rooms, symbols = _plan()
+    rooms_table, symbols_table = RoomTable.from_rooms(rooms), SymbolTable.from_detections(symbols)
+
+    assert HVACCalculator().recommendations(rooms_table) == HVACCalculator().recommendations(rooms)
+    assert PlumbingCalculator().summarize(rooms_table, symbols_table) == PlumbingCalculator().summarize(rooms, symbols)
+    assert UnderfloorCalculator().summarize(rooms_table) == UnderfloorCalculator().summarize(rooms)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="slotted dataclasses need Python 3.10")
+def test_slotted_records_have_no_instance_dict():
+    det = SymbolDetection("wc", 0.9, (0, 0, 1, 1), 1)
+    assert not hasattr(det, "__dict__")
+
+
+def test_batched_calculators_match_scalar_at_unit_thresholds():
+    from app.core.hvac_calculator import CLIMATE_FACTOR, UNIT_THRESHOLDS
+    from app.core.models import RoomGeometry
+    from app.utils.simple_polygon import SimplePolygon
+
+    square = SimplePolygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    areas = [threshold / CLIMATE_FACTOR for threshold in UNIT_THRESHOLDS] + [0.1, 1e3, 0.3 + 0.6]
+    rooms = [
+        RoomGeometry(f"r{i}", square, area, label=label, attributes={"category": category})
+        for i, area in enumerate(areas)
+        for label, category in (("WC 1", "bedroom"), (None, "mystery"), ("Kitchen", "kitchen"))
+    ]
+    table = RoomTable.from_rooms(rooms)
+
+    assert HVACCalculator().recommendations(table) == HVACCalculator().recommendations(rooms)
+    assert UnderfloorCalculator().summarize(table) == UnderfloorCalculator().summarize(rooms)
+    empty = RoomTable.from_rooms([])
+    assert UnderfloorCalculator().summarize(empty) == UnderfloorCalculator().summarize([])
+    assert PlumbingCalculator().summarize(empty, SymbolTable.from_detections([])).sewage_points == 0
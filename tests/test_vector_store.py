@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+
+from app.core.geometry_extractor import GeometryExtractor
+from app.core.pdf_loader import PDFLoader, PDFPageVectorData
+from app.core.vector_store import VectorStore
+from app.core.vector_symbols import VectorSymbolMatcher
+from benchmarks.synthetic import PlanSpec, generate_pages
+
+
+def _labelled_rooms(extractor, pages):
+    rooms = extractor.from_vectors(pages)
+    labels = [{**text, "page_number": page.page_number} for page in pages for text in page.text_items]
+    return extractor.assign_labels(rooms, labels)
+
+
+def _summary(rooms):
+    return [(room.room_id, room.label, round(room.area_sqm, 9), room.page_number) for room in rooms]
+
+
+@pytest.mark.parametrize("room_source", ["rects", "walls"])
+def test_mapped_pages_give_the_same_rooms_and_labels(tmp_path: Path, room_source: str):
+    np = pytest.importorskip("numpy")
+    pages = [PDFPageVectorData(**page) for page in generate_pages(PlanSpec(2, 12, 20, 40, 0, seed=3))]
+    store = VectorStore.open(VectorStore.write(pages, tmp_path / "vectors"))
+    assert isinstance(store.pages[0].shapes["rects"], np.memmap)
+
+    extractor = GeometryExtractor(room_source=room_source)
+    expected = _labelled_rooms(extractor, pages)
+    assert _summary(_labelled_rooms(extractor, store.pages)) == _summary(expected)
+    assert expected and any(room.label for room in expected)
+
+
+def test_pdf_vectors_round_trip_through_the_store(sample_pdf: Path, tmp_path: Path):
+    pytest.importorskip("pdfplumber")
+    pytest.importorskip("numpy")
+    loader = PDFLoader(cache_dir=tmp_path / "pages")
+    vector_pages = loader.ingest(sample_pdf, rasterize=False).vector_pages
+    store = VectorStore.open(loader.export_vector_store(vector_pages, tmp_path / "vectors"))
+
+    assert [page.page_number for page in store.pages] == [1, 2]
+    assert [item["text"] for item in store.pages[1].text_items] == ["Bedroom", "2", "Kitchen"]
+    matcher = VectorSymbolMatcher()
+    assert [len(matcher.clusters(page)) for page in store.pages] == [len(matcher.clusters(page)) for page in vector_pages]
+    extractor = GeometryExtractor()
+    assert _summary(extractor.from_vectors(store.pages)) == _summary(extractor.from_vectors(vector_pages))
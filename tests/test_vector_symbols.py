@@ -0,0 +1,75 @@
+import json
+from math import cos, radians, sin
+from pathlib import Path
+
+import pytest
+
+from app.core.pipeline import MEPExtractionPipeline
+from app.core.vector_symbols import SymbolLibrary, VectorSymbolMatcher, cluster_fingerprint
+
+WC = [((0, 0), (10, 0)), ((10, 0), (10, 16)), ((10, 16), (0, 16)), ((0, 16), (0, 0)), ((2, 4), (8, 4)), ((5, 4), (5, 12))]
+
+
+def _transform(segments, angle, scale, dx, dy):
+    c, s = cos(radians(angle)), sin(radians(angle))
+
+    def move(point):
+        x, y = point
+        return scale * (x * c - y * s) + dx, scale * (x * s + y * c) + dy
+
+    return [(move(a), move(b)) for a, b in segments]
+
+
+def test_fingerprint_ignores_position_rotation_and_scale():
+    expected = cluster_fingerprint(WC)
+    for angle, scale in ((30, 1.0), (90, 2.0), (217, 0.5)):
+        assert cluster_fingerprint(_transform(WC, angle, scale, 300, 120)) == expected
+    assert cluster_fingerprint(WC[:4]) != expected
+
+
+def _lines(segments):
+    return [{"pts": [a, b], "x0": min(a[0], b[0]), "x1": max(a[0], b[0]), "top": min(a[1], b[1]),
+             "bottom": max(a[1], b[1]), "object_type": "line"} for a, b in segments]
+
+
+def test_matcher_covers_page_of_known_blocks():
+    wall = [((0, 0), (800, 0))]
+    page = {"page_number": 2, "shapes": {"line": _lines(wall + WC + _transform(WC, 90, 1.0, 200, 100))}}
+    library = SymbolLibrary()
+    library.add(cluster_fingerprint(WC), "wc")
+    match = VectorSymbolMatcher(library, scale=2.0).match_page(page)
+    assert match.covered and match.clusters == 2
+    assert [det.label for det in match.detections] == ["wc", "wc"]
+    assert match.detections[0].bbox == (0.0, 0.0, 20.0, 32.0)
+    assert match.detections[0].page_number == 2
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("covered pages must not be rasterized for YOLO")
+
+
+def test_pipeline_skips_raster_detection_on_covered_pages(sample_pdf: Path, tmp_path: Path, monkeypatch):
+    fitz = pytest.importorskip("fitz")
+    pytest.importorskip("pdfplumber")
+    pdf_path = tmp_path / "fixtures.pdf"
+    doc = fitz.open(sample_pdf)
+    for page in doc:
+        shape = page.new_shape()
+        for x in (600, 700, 800):
+            shape.draw_rect(fitz.Rect(x, 500, x + 20, 532))
+            shape.draw_line((x + 4, 508), (x + 16, 508))
+        shape.finish(color=(0, 0, 0), closePath=False)
+        shape.commit()
+    doc.save(pdf_path)
+
+    library = SymbolLibrary()
+    matcher = VectorSymbolMatcher(library)
+    first_page = MEPExtractionPipeline(use_cache=False).pdf_loader.ingest(pdf_path, rasterize=False).vector_pages[0]
+    assert matcher.learn(first_page, [("wc", (590, 490, 630, 540))]) == 1
+    library_path = library.save(tmp_path / "library.json")
+
+    pipeline = MEPExtractionPipeline(use_cache=False, symbol_library=library_path)
+    monkeypatch.setattr(pipeline.pdf_loader, "_render_page", _fail)
+    result = pipeline.run(pdf_path, tmp_path / "out")
+    plumbing = json.loads(result["json"].read_text())["plumbing"]
+    assert plumbing["sewage_points"] == 6  # three WCs on each of the two pages